@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Benchmark the fast transfer-list parser against the BeautifulSoup path.
+
+Uses the /transfers page captured in tixati_webui_dump.html, plus synthetic
+variants with the row set repeated to simulate large Tixati instances.
+
+Usage:
+    python benchmark_transfer_parser.py                    # default sizes
+    python benchmark_transfer_parser.py --sizes 1 100 5000 # custom row multipliers
+    python benchmark_transfer_parser.py --repeat 20        # more timing runs
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from transfer_parser import TransferRow, parse_transfer_rows
+
+DUMP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tixati_webui_dump.html')
+
+
+def load_transfers_page(dump_path: str) -> str:
+    """Extract the /transfers page from the concatenated WebUI dump"""
+    with open(dump_path, 'r', encoding='utf-8') as f:
+        dump = f.read()
+    parts = re.split(r'<!-- http://[^/]+(/\S*) -->', dump)
+    for i in range(1, len(parts), 2):
+        if parts[i] == '/transfers':
+            return parts[i + 1]
+    raise ValueError(f"No /transfers page found in {dump_path}")
+
+
+def enlarge_page(page: str, multiplier: int) -> str:
+    """Repeat the table body rows, giving each copy a unique name and checkbox id"""
+    body_match = re.search(r'(<tbody>)(.*?)(</tbody>)', page, re.DOTALL)
+    if not body_match or multiplier <= 1:
+        return page
+    body = body_match.group(2)
+    copies = []
+    for n in range(multiplier):
+        copy = re.sub(r'name="([0-9a-f]+)"', lambda m: f'name="{m.group(1)}{n:x}"', body)
+        copy = re.sub(r'(\.rar|\))(</a>)', lambda m: f'{m.group(1)} #{n}{m.group(2)}', copy)
+        copies.append(copy)
+    return page[:body_match.start(2)] + ''.join(copies) + page[body_match.end(2):]
+
+
+def parse_with_bs4(html: str):
+    """The original run_local_app.py parsing path, kept here as the baseline"""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='xferslist')
+    rows = []
+    if not table:
+        return rows
+    for row in table.find_all('tr')[1:]:
+        cols = row.find_all('td')
+        if len(cols) < 2:
+            continue
+        checkbox = cols[0].find('input', {'type': 'checkbox'})
+        texts = [c.get_text(strip=True) for c in cols[1:9]]
+        texts += [''] * (8 - len(texts))
+        checkbox_id = checkbox['name'] if checkbox and 'name' in checkbox.attrs else None
+        rows.append(TransferRow(checkbox_id, *texts))
+    return rows
+
+
+def time_parser(parser, html: str, repeat: int) -> float:
+    """Best-of-N wall time in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Tixati transfer-list parsers')
+    parser.add_argument('--dump', type=str, default=DUMP_FILE,
+                        help='Path to the WebUI dump (default: tixati_webui_dump.html)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 500],
+                        help='Row multipliers to benchmark (default: 1 10 100 500)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timing runs per parser, best is reported (default: 5)')
+    args = parser.parse_args()
+
+    page = load_transfers_page(args.dump)
+
+    print(f"{'rows':>8} {'bytes':>11} {'bs4 ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for multiplier in args.sizes:
+        html = enlarge_page(page, multiplier)
+        expected = parse_with_bs4(html)
+        actual = parse_transfer_rows(html)
+        if actual != expected:
+            print(f"[ERROR] Parser output differs from BeautifulSoup at x{multiplier}")
+            sys.exit(1)
+
+        bs4_time = time_parser(parse_with_bs4, html, args.repeat)
+        fast_time = time_parser(parse_transfer_rows, html, args.repeat)
+        print(f"{len(actual):>8} {len(html):>11,} {bs4_time * 1000:>10.2f} "
+              f"{fast_time * 1000:>10.2f} {bs4_time / fast_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
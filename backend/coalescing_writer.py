@@ -0,0 +1,62 @@
+"""
+Coalescing Writer
+Turns many "state changed" signals into one write: the first change opens a
+short window, every change inside it rides along, and a single write at the
+end persists them all. flush() is the barrier for shutdown and tests.
+"""
+import threading
+import time
+from typing import Callable
+
+
+class CoalescingWriter:
+    """Calls write() once per delay window for any number of mark_dirty() calls
+
+    A write that raises leaves the state dirty, so the next window retries it.
+    """
+
+    def __init__(self, write: Callable[[], None], delay: float = 0.5, name: str = "CoalescingWriter"):
+        self._write = write
+        self.delay = delay
+        self.name = name
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # one write at a time (background window or flush)
+        self._dirty = False
+        self.writes = 0  # completed writes, for status and tests
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        with self._cond:
+            self._dirty = True
+            self._cond.notify()
+
+    def flush(self) -> bool:
+        """Write now if anything changed since the last write; True if nothing is left unsaved"""
+        self._write_pending()
+        return not self._dirty
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+            time.sleep(self.delay)  # let the rest of the burst land in this write
+            self._write_pending()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._cond:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                self._write()
+                self.writes += 1
+            except Exception as e:
+                print(f"[{self.name}] Write failed, retrying in {self.delay}s: {e}")
+                with self._cond:
+                    self._dirty = True
@@ -0,0 +1,57 @@
+"""
+Copy-on-Write Config Snapshots
+The config is published as a series of versions that never change once
+published. Readers (request handlers, the copy worker, the writer thread
+serializing a snapshot) take the current version and use it without a lock.
+A writer builds the next version from a shallow copy under the edit lock and
+publishes it with a single reference swap. Only what it changes is copied:
+the top-level dict, plus a collection the first time the edit touches it
+(which shares everything but the shards and pages the edit writes to).
+"""
+from typing import Callable, List, Optional, Set
+
+from keyed_collection import KeyedCollection
+
+
+class ConfigDraft:
+    """The next config version, built from the published one
+
+    set() replaces a setting. collection() gives a private copy of a keyed
+    collection (one scope of it for the library index) to change. Values taken
+    from the published version must not be changed in place: build a new
+    value and set() or put() it. records collects the persistence records
+    (journal format) for the changes; they are only written if the draft is
+    published.
+    """
+
+    def __init__(self, base: dict):
+        self.data = dict(base)
+        self.settings_changed = False
+        self.entries_changed = False
+        self.records: List[dict] = []
+        self._copied: Set = set()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.settings_changed = True
+
+    def collection(self, name: str, scope: Optional[str] = None,
+                   new: Optional[Callable[[], KeyedCollection]] = None) -> KeyedCollection:
+        """This draft's copy of a collection, made on first use (new() creates a missing scope)"""
+        self.entries_changed = True
+        if scope is None:
+            if name not in self._copied:
+                self.data[name] = self.data[name].copy()
+                self._copied.add(name)
+            return self.data[name]
+        if name not in self._copied:
+            self.data[name] = dict(self.data.get(name) or {})
+            self._copied.add(name)
+        if (name, scope) not in self._copied:
+            current = self.data[name].get(scope)
+            self.data[name][scope] = current.copy() if current is not None else new()
+            self._copied.add((name, scope))
+        return self.data[name][scope]
@@ -0,0 +1,514 @@
+"""
+Library Placement Engine
+Puts a finished download into its library folder with the cheapest strategy
+available: an atomic rename (or hardlinks while seeding continues) when the
+source and destination share a volume, kernel-assisted copies otherwise.
+Copies stream in large chunks and report bytes and throughput as they go;
+each copied file is verified before it counts as placed, and a per-job
+journal of finished files lets a restarted job resume.
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from copy_executor import volume_of
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+STRATEGY_RENAME = 'rename'
+STRATEGY_HARDLINK = 'hardlink'
+STRATEGY_REFLINK = 'reflink'
+STRATEGY_COPY_FILE_RANGE = 'copy_file_range'
+STRATEGY_SENDFILE = 'sendfile'
+STRATEGY_COPY = 'copy'
+STRATEGY_RESUMED = 'resumed'  # every file was already in place from an earlier run
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# How copied files are checked before the source may be deleted
+VERIFY_SIZE = 'size'  # destination size equals source size
+VERIFY_SAMPLE = 'sample'  # size, plus a few blocks re-read from both sides and compared
+VERIFY_FULL = 'full'  # source hashed while streaming, destination hashed after writing
+VERIFY_MODES = (VERIFY_SIZE, VERIFY_SAMPLE, VERIFY_FULL)
+VERIFY_SAMPLES = 8
+VERIFY_SAMPLE_SIZE = 1024 * 1024
+
+# Linux FICLONE ioctl: share extents on btrfs/XFS instead of copying them
+_FICLONE = 0x40049409
+
+
+class CopyVerificationError(Exception):
+    """A copied file does not match its source; the source must be kept"""
+
+
+class CopyProgress:
+    """Live byte/file counters for one placement job (single writer, any readers)"""
+
+    def __init__(self, label: str, log_interval: float = 10.0,
+                 on_state: Optional[Callable[[str], None]] = None):
+        self.label = label
+        self.log_interval = log_interval
+        self.on_state = on_state
+        self.state = 'pending'
+        self.strategy: Optional[str] = None
+        self.error: Optional[str] = None
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.files_total = 0
+        self.files_done = 0
+        self.current_file: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.verify_mode: Optional[str] = None
+        self.files_verified = 0
+        self.verify_failures: List[str] = []
+        self._last_log = 0.0
+
+    def set_state(self, state: str):
+        self.state = state
+        if self.on_state:
+            self.on_state(state)
+
+    def start(self, bytes_total: int, files_total: int):
+        self.set_state('copying')
+        self.bytes_total = bytes_total
+        self.files_total = files_total
+        self.started_at = self._last_log = time.time()
+
+    def add(self, count: int):
+        self.bytes_done += count
+        now = time.time()
+        if self.log_interval and now - self._last_log >= self.log_interval:
+            self._last_log = now
+            print(f"[Copy] {self.label}: {self.percent:.0f}% "
+                  f"({self.bytes_done / 1024**3:.2f}/{self.bytes_total / 1024**3:.2f} GB) "
+                  f"at {self.throughput / 1024**2:.1f} MB/s")
+
+    def finish(self, strategy: Optional[str] = None, error: Optional[str] = None):
+        self.strategy = strategy or self.strategy
+        self.error = error
+        self.state = 'failed' if error else 'done'
+        self.current_file = None
+        self.finished_at = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.bytes_done / self.bytes_total if self.bytes_total else 100.0
+
+    @property
+    def throughput(self) -> float:
+        """Average bytes per second since the job started"""
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "state": self.state,
+            "strategy": self.strategy,
+            "error": self.error,
+            "bytesTotal": self.bytes_total,
+            "bytesDone": self.bytes_done,
+            "filesTotal": self.files_total,
+            "filesDone": self.files_done,
+            "currentFile": self.current_file,
+            "percent": round(self.percent, 1),
+            "throughputMBps": round(self.throughput / 1024**2, 1),
+            "elapsed": round(self.elapsed, 1),
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "verify": {
+                "mode": self.verify_mode,
+                "filesVerified": self.files_verified,
+                "failures": list(self.verify_failures),
+            },
+        }
+
+
+class CopyJournal:
+    """Append-only record of the files a job has fully placed, one JSON line per file
+
+    Each line is flushed and fsynced once its file is complete, so after a
+    crash the journal lists exactly the files that need no second copy. A
+    torn last line is ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done: Dict[str, Tuple[int, int]] = {}  # relative path -> (size, mtime_ns) of the source
+        self._file = None
+        self._torn = False  # the file ends mid-line; the next record starts a new one
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                self._torn = not line.endswith('\n')
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 'file' in entry:
+                    self._done[entry['file']] = (entry['size'], entry['mtime_ns'])
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, rel: str, stat: os.stat_result) -> bool:
+        return self._done.get(rel) == (stat.st_size, stat.st_mtime_ns)
+
+    def record(self, rel: str, stat: os.stat_result):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if self._torn:
+                self._file.write('\n')
+                self._torn = False
+        self._file.write(json.dumps({"file": rel, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._done[rel] = (stat.st_size, stat.st_mtime_ns)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Delete the journal once the job has finished"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def same_volume(src: str, dest: str) -> bool:
+    return volume_of(src) == volume_of(dest)
+
+
+def _tree_files(src: str, dest: str) -> List[Tuple[str, str]]:
+    """(source file, destination file) pairs for a file or a directory tree"""
+    if not os.path.isdir(src):
+        return [(src, dest)]
+    pairs = []
+    for root, _, files in os.walk(src):
+        target_root = os.path.join(dest, os.path.relpath(root, src))
+        for name in files:
+            pairs.append((os.path.join(root, name), os.path.join(target_root, name)))
+    return pairs
+
+
+def _make_dirs(src: str, dest: str):
+    if not os.path.isdir(src):
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+        return
+    for root, _, _ in os.walk(src):
+        os.makedirs(os.path.join(dest, os.path.relpath(root, src)), exist_ok=True)
+
+
+def _try_reflink(fsrc, fdst) -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        import fcntl
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def _kernel_copy(fsrc, fdst, size: int, chunk_size: int, progress: Optional[CopyProgress],
+                 throttle: Optional[Callable[[int], None]] = None) -> str:
+    """Copy an open file with copy_file_range or sendfile; raises OSError if neither works"""
+    offset = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), min(chunk_size, size - offset))
+                if sent == 0:
+                    break
+                offset += sent
+                if progress:
+                    progress.add(sent)
+                if throttle:
+                    throttle(sent)
+            return STRATEGY_COPY_FILE_RANGE
+        except OSError:
+            if offset:
+                raise
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        while offset < size:
+            sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, min(chunk_size, size - offset))
+            if sent == 0:
+                break
+            offset += sent
+            if progress:
+                progress.add(sent)
+            if throttle:
+                throttle(sent)
+        return STRATEGY_SENDFILE
+    raise OSError("no kernel copy available")
+
+
+def _buffered_copy(fsrc, fdst, chunk_size: int, progress: Optional[CopyProgress], hasher=None,
+                   throttle: Optional[Callable[[int], None]] = None):
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while True:
+        count = fsrc.readinto(buffer)
+        if not count:
+            break
+        fdst.write(view[:count])
+        if hasher is not None:
+            hasher.update(view[:count])
+        if progress:
+            progress.add(count)
+        if throttle:
+            throttle(count)
+
+
+def _new_hasher():
+    # xxh3 keeps up with fast disks; BLAKE2 is the stdlib fallback
+    return xxhash.xxh3_128() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+
+
+def _file_digest(path: str, chunk_size: int, throttle: Optional[Callable[[int], None]] = None) -> bytes:
+    hasher = _new_hasher()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb') as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            hasher.update(view[:count])
+            if throttle:
+                throttle(count)
+    return hasher.digest()
+
+
+def _samples_match(src: str, dest: str, size: int) -> bool:
+    """Compare a few evenly spaced blocks (always the first and last) of src and dest"""
+    if size <= VERIFY_SAMPLES * VERIFY_SAMPLE_SIZE:
+        offsets = range(0, size, VERIFY_SAMPLE_SIZE)
+    else:
+        step = (size - VERIFY_SAMPLE_SIZE) // (VERIFY_SAMPLES - 1)
+        offsets = [i * step for i in range(VERIFY_SAMPLES)]
+    with open(src, 'rb') as fsrc, open(dest, 'rb') as fdst:
+        for offset in offsets:
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            if fsrc.read(VERIFY_SAMPLE_SIZE) != fdst.read(VERIFY_SAMPLE_SIZE):
+                return False
+    return True
+
+
+def _verify_copy(src: str, dest: str, size: int, verify: str, strategy: str, source_digest: Optional[bytes],
+                 chunk_size: int, progress: Optional[CopyProgress], throttle: Optional[Callable[[int], None]]):
+    """Raise CopyVerificationError (after removing dest) if dest does not match src"""
+    problem = None
+    if os.path.getsize(dest) != size:
+        problem = f"size {os.path.getsize(dest)} != {size}"
+    elif strategy == STRATEGY_REFLINK:
+        pass  # shares the source's extents, so the data is identical by construction
+    elif verify == VERIFY_SAMPLE and not _samples_match(src, dest, size):
+        problem = "sampled blocks differ"
+    elif verify == VERIFY_FULL:
+        if progress:
+            progress.set_state('verifying')
+        if _file_digest(dest, chunk_size, throttle) != source_digest:
+            problem = "hash mismatch"
+        if progress:
+            progress.set_state('copying')
+    if problem:
+        # Drop the bad copy so a retry cannot mistake it for a finished file
+        os.unlink(dest)
+        if progress:
+            progress.verify_failures.append(f"{src}: {problem}")
+        raise CopyVerificationError(f"Verification failed for {dest}: {problem}")
+    if progress:
+        progress.files_verified += 1
+
+
+def copy_file(src: str, dest: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: Optional[CopyProgress] = None, verify: str = VERIFY_SAMPLE,
+              throttle: Optional[Callable[[int], None]] = None) -> str:
+    """Copy one file with metadata and verify it; returns the strategy
+
+    Prefers reflink, then kernel copies. VERIFY_FULL streams through user space
+    instead so the source is hashed as it is read, not read a second time.
+    throttle(bytes) is called after each chunk and may sleep to hold a rate.
+    """
+    size = os.path.getsize(src)
+    strategy = STRATEGY_COPY
+    hasher = _new_hasher() if verify == VERIFY_FULL else None
+    if os.path.lexists(dest):
+        # Never write through an existing hardlink into the source's data
+        os.unlink(dest)
+    if progress:
+        progress.current_file = src
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        if _try_reflink(fsrc, fdst):
+            strategy = STRATEGY_REFLINK
+            if progress:
+                progress.add(size)
+        elif hasher is not None:
+            _buffered_copy(fsrc, fdst, chunk_size, progress, hasher, throttle)
+        else:
+            try:
+                strategy = _kernel_copy(fsrc, fdst, size, chunk_size, progress, throttle)
+            except OSError:
+                fdst.seek(0)
+                fdst.truncate()
+                fsrc.seek(0)
+                _buffered_copy(fsrc, fdst, chunk_size, progress, throttle=throttle)
+    _verify_copy(src, dest, size, verify, strategy, hasher.digest() if hasher else None, chunk_size, progress,
+                 throttle)
+    shutil.copystat(src, dest)
+    if progress:
+        progress.files_done += 1
+    return strategy
+
+
+def _describe(strategies) -> str:
+    return '+'.join(sorted(set(strategies))) or STRATEGY_COPY
+
+
+def _already_placed(src_file: str, dest_file: str, rel: str, journal: Optional[CopyJournal]) -> bool:
+    """True if an earlier run already put this file in place (journaled, or same size and mtime)"""
+    try:
+        src_stat = os.stat(src_file)
+        dest_stat = os.stat(dest_file)
+    except OSError:
+        return False
+    if dest_stat.st_size != src_stat.st_size:
+        return False
+    if journal is not None and journal.is_done(rel, src_stat):
+        return True
+    # copystat carries the mtime over, so a finished copy from a run without a journal matches too
+    return dest_stat.st_mtime_ns == src_stat.st_mtime_ns
+
+
+def place_tree(src: str, dest: str, keep_source: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               progress: Optional[CopyProgress] = None, journal: Optional[CopyJournal] = None,
+               verify: str = VERIFY_SAMPLE, throttle: Optional[Callable[[int], None]] = None) -> str:
+    """Place src (file or folder) at dest and return the strategy used
+
+    keep_source=True means Tixati keeps seeding from src, so the data must stay
+    there too: hardlinks on the same volume, copies across volumes. Otherwise
+    the source is renamed into place when possible (the caller removes any
+    remaining source after a copy).
+
+    If dest already holds part of the tree from an interrupted run, only the
+    files not yet in place are transferred. Copied files are checked per
+    verify (VERIFY_* constant); a mismatch raises CopyVerificationError, so the
+    caller never deletes a source whose copy is bad.
+    """
+    pairs = _tree_files(src, dest)
+    if progress:
+        progress.verify_mode = verify
+        progress.start(sum(os.path.getsize(s) for s, _ in pairs), len(pairs))
+    try:
+        strategy = _place(src, dest, pairs, keep_source, chunk_size, progress, journal, verify, throttle)
+    except Exception as e:
+        if progress:
+            progress.finish(error=str(e))
+        raise
+    if progress:
+        progress.finish(strategy)
+    return strategy
+
+
+def _place(src, dest, pairs, keep_source, chunk_size, progress, journal, verify, throttle) -> str:
+    if same_volume(src, dest):
+        if not keep_source:
+            try:
+                if not os.path.exists(dest):
+                    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+                    os.rename(src, dest)
+                else:
+                    # Resuming into an existing folder: move the remaining files one by one
+                    _make_dirs(src, dest)
+                    _move_files(pairs)
+                _mark_all_done(progress)
+                return STRATEGY_RENAME
+            except OSError as e:
+                print(f"[Placement] Rename failed ({e}), copying instead")
+        else:
+            try:
+                _make_dirs(src, dest)
+                for src_file, dest_file in pairs:
+                    if not os.path.exists(dest_file):
+                        os.link(src_file, dest_file)
+                _mark_all_done(progress)
+                return STRATEGY_HARDLINK
+            except OSError as e:
+                # e.g. FAT/exFAT volumes or files Tixati holds exclusively
+                print(f"[Placement] Hardlink failed ({e}), copying instead")
+
+    _make_dirs(src, dest)
+    strategies = []
+    skipped = 0
+    for src_file, dest_file in pairs:
+        rel = os.path.relpath(src_file, src) if os.path.isdir(src) else os.path.basename(src_file)
+        if _already_placed(src_file, dest_file, rel, journal):
+            skipped += 1
+            if progress:
+                progress.add(os.path.getsize(src_file))
+                progress.files_done += 1
+            continue
+        strategies.append(copy_file(src_file, dest_file, chunk_size, progress, verify, throttle))
+        if journal is not None:
+            journal.record(rel, os.stat(src_file))
+    if skipped:
+        print(f"[Placement] Resumed {dest}: {skipped} of {len(pairs)} files were already in place")
+    if os.path.isdir(src):
+        shutil.copystat(src, dest)
+    return _describe(strategies) if strategies else STRATEGY_RESUMED
+
+
+def _move_files(pairs: List[Tuple[str, str]]):
+    """Rename every (source, destination) pair, or none of them
+
+    If a rename fails, the files already moved are put back before the error
+    is re-raised, so a copy fallback still finds the whole source. If they
+    cannot be put back, RuntimeError is raised instead (no fallback).
+    """
+    moved = []
+    try:
+        for src_file, dest_file in pairs:
+            os.replace(src_file, dest_file)
+            moved.append((src_file, dest_file))
+    except OSError:
+        for src_file, dest_file in reversed(moved):
+            try:
+                os.replace(dest_file, src_file)
+            except OSError as undo_err:
+                raise RuntimeError(f"Rename failed partway and {dest_file} could not be moved back "
+                                   f"to {src_file}: {undo_err}") from undo_err
+        raise
+
+
+def _mark_all_done(progress: Optional[CopyProgress]):
+    # Metadata-only strategies move no bytes, so there is nothing to verify
+    if progress:
+        progress.verify_mode = None
+        progress.bytes_done = progress.bytes_total
+        progress.files_done = progress.files_total
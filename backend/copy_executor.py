@@ -0,0 +1,281 @@
+"""
+Per-Volume Copy Job Queue
+Library copies are persistent jobs (queued -> copying -> verifying -> done or
+failed) run by worker threads per destination volume: copies to different
+disks run side by side, copies to the same disk are serialized (or limited to
+a configured concurrency) and taken in priority order.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+JOB_QUEUED = 'queued'
+JOB_COPYING = 'copying'
+JOB_VERIFYING = 'verifying'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+ACTIVE_STATES = (JOB_QUEUED, JOB_COPYING, JOB_VERIFYING)
+
+
+def volume_of(path: str) -> str:
+    """Volume holding path: drive letter / UNC share on Windows, device id elsewhere"""
+    path = os.path.abspath(path)
+    drive, _ = os.path.splitdrive(path)
+    if drive:
+        return drive.upper()
+    # The destination may not exist yet; its nearest existing parent is on the same volume
+    probe = path
+    while not os.path.exists(probe):
+        parent = os.path.dirname(probe)
+        if parent == probe:
+            break
+        probe = parent
+    try:
+        return f"dev:{os.stat(probe).st_dev}"
+    except OSError:
+        return probe
+
+
+class CopyCancelled(Exception):
+    """Raised inside a running job once it has been cancelled"""
+
+
+class CopyMoved(Exception):
+    """Raised by a job whose destination is now on another volume; it is queued again there"""
+
+    def __init__(self, dest: str):
+        super().__init__(f"Destination moved to {dest}")
+        self.dest = dest
+
+
+class CopyJobQueue:
+    """Persistent copy jobs run by per-volume workers, highest priority first
+
+    Jobs are plain dicts so they persist as JSON: load() returns the saved
+    list, save(job) stores a job after each of its state changes and
+    remove(job_ids) drops finished jobs pruned from the list. run(job) does the
+    work and returns a dict merged into the job (e.g. the destination), or
+    raises to fail it (CopyMoved hands it to the new destination's volume).
+    Jobs interrupted by a restart are queued again.
+    """
+
+    def __init__(self, run: Callable[[dict], Optional[dict]], load: Callable[[], List[dict]],
+                 save: Callable[[dict], None], remove: Callable[[List[str]], None], concurrency: int = 1,
+                 per_volume: Optional[Dict[str, int]] = None, keep_finished: int = 50):
+        self._run = run
+        self._save = save
+        self._remove = remove
+        self.concurrency = max(1, concurrency)
+        self.per_volume = {k.upper(): v for k, v in (per_volume or {}).items()}
+        self.keep_finished = keep_finished
+        self._jobs: Dict[str, dict] = {}
+        self._cancelled = set()  # ids of running jobs asked to stop
+        self._running: Dict[str, int] = {}  # volume -> jobs currently executing
+        self._workers: Dict[str, int] = {}  # volume -> worker threads started
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._seq = 0
+        for job in load() or []:
+            if job.get('state') in (JOB_COPYING, JOB_VERIFYING):
+                job['state'] = JOB_QUEUED  # the copy journal lets it resume where it stopped
+            self._jobs[job['id']] = job
+            self._seq = max(self._seq, job.get('seq', 0))
+
+    def workers_for(self, volume: str) -> int:
+        return max(1, self.per_volume.get(volume.upper(), self.concurrency))
+
+    def start(self):
+        """Start workers for volumes with jobs left from the last run"""
+        with self._cond:
+            for job in self._jobs.values():
+                if job['state'] == JOB_QUEUED:
+                    self._ensure_workers(job['volume'])
+
+    def _ensure_workers(self, volume: str):
+        started = self._workers.get(volume, 0)
+        self._running.setdefault(volume, 0)
+        for i in range(started, self.workers_for(volume)):
+            threading.Thread(target=self._work, args=(volume,), name=f"Copy-{volume}-{i}", daemon=True).start()
+        self._workers[volume] = max(started, self.workers_for(volume))
+
+    def _persist(self, job_id: str, pruned: List[str] = ()):
+        # Snapshot and write under one lock so an older snapshot never lands after a newer one
+        with self._save_lock:
+            with self._cond:
+                job = self._jobs.get(job_id)
+                job = dict(job) if job else None
+            if pruned:
+                self._remove(list(pruned))
+            if job:
+                self._save(job)
+
+    def enqueue(self, job_id: str, key: str, name: str, dest: str, priority: int = 0, force: bool = False) -> dict:
+        """Queue a copy job; an active job with this id is returned as is (priority raised if higher)
+
+        A cancelled job stays cancelled unless force is set; failed and
+        finished jobs are queued again.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job and job['state'] in ACTIVE_STATES:
+                if priority > job['priority']:
+                    job['priority'] = priority
+                    self._cond.notify_all()
+                return dict(job)
+            if job and job['state'] == JOB_CANCELLED and not force:
+                return dict(job)
+            now = time.time()
+            self._seq += 1
+            job = {
+                "id": job_id,
+                "key": key,
+                "name": name,
+                "dest": dest,
+                "volume": volume_of(dest),
+                "state": JOB_QUEUED,
+                "priority": priority,
+                "seq": self._seq,
+                "attempts": job['attempts'] if job else 0,
+                "error": None,
+                "created_at": job['created_at'] if job else now,
+                "updated_at": now,
+            }
+            self._jobs[job_id] = job
+            self._ensure_workers(job['volume'])
+            self._cond.notify_all()
+            result = dict(job)
+        self._persist(job_id)
+        print(f"[CopyQueue] Queued {name} on {result['volume']} (priority {priority})")
+        return result
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def is_active(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return bool(job) and job['state'] in ACTIVE_STATES
+
+    def is_cancelled(self, job_id: str) -> bool:
+        return job_id in self._cancelled
+
+    def list(self) -> List[dict]:
+        """Active jobs in run order, then finished jobs newest first"""
+        with self._cond:
+            jobs = [dict(job) for job in self._jobs.values()]
+        active = sorted((j for j in jobs if j['state'] in ACTIVE_STATES),
+                        key=lambda j: (j['state'] == JOB_QUEUED, -j['priority'], j['seq']))
+        finished = sorted((j for j in jobs if j['state'] not in ACTIVE_STATES),
+                          key=lambda j: j['updated_at'], reverse=True)
+        return active + finished
+
+    def set_state(self, job_id: str, state: str):
+        """Switch a running job between copying and verifying (not persisted)"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job and job['state'] in (JOB_COPYING, JOB_VERIFYING):
+                job['state'] = state
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job now, or ask a running one to stop at its next chunk"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job['state'] not in ACTIVE_STATES:
+                return False
+            if job['state'] == JOB_QUEUED:
+                job['state'] = JOB_CANCELLED
+                job['updated_at'] = time.time()
+            else:
+                self._cancelled.add(job_id)
+        self._persist(job_id)
+        return True
+
+    def retry(self, job_id: str) -> Optional[dict]:
+        """Queue a failed or cancelled job again"""
+        job = self.get(job_id)
+        if not job or job['state'] not in (JOB_FAILED, JOB_CANCELLED):
+            return None
+        return self.enqueue(job_id, job['key'], job['name'], job['dest'], job['priority'], force=True)
+
+    def reprioritize(self, job_id: str, priority: int) -> Optional[dict]:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            job['priority'] = priority
+            job['updated_at'] = time.time()
+            self._cond.notify_all()
+            result = dict(job)
+        self._persist(job_id)
+        return result
+
+    def status(self) -> Dict[str, Dict[str, int]]:
+        """Queued and running job counts per volume"""
+        with self._cond:
+            return {
+                volume: {"queued": sum(1 for j in self._jobs.values()
+                                       if j['volume'] == volume and j['state'] == JOB_QUEUED),
+                         "running": self._running.get(volume, 0),
+                         "workers": self.workers_for(volume)}
+                for volume in self._workers
+            }
+
+    def _next_job(self, volume: str) -> Optional[dict]:
+        queued = [j for j in self._jobs.values() if j['volume'] == volume and j['state'] == JOB_QUEUED]
+        return min(queued, key=lambda j: (-j['priority'], j['seq'])) if queued else None
+
+    def _prune(self) -> List[str]:
+        """Drop the oldest finished jobs beyond keep_finished; their ids"""
+        finished = sorted((j for j in self._jobs.values() if j['state'] not in ACTIVE_STATES),
+                          key=lambda j: j['updated_at'])
+        pruned = [job['id'] for job in finished[:max(0, len(finished) - self.keep_finished)]]
+        for job_id in pruned:
+            self._jobs.pop(job_id, None)
+        return pruned
+
+    def _work(self, volume: str):
+        while True:
+            with self._cond:
+                job = self._next_job(volume)
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job(volume)
+                job['state'] = JOB_COPYING
+                job['attempts'] += 1
+                job['error'] = None
+                job['started_at'] = job['updated_at'] = time.time()
+                self._running[volume] += 1
+                snapshot = dict(job)
+            self._persist(job['id'])
+
+            state, error, result = JOB_DONE, None, None
+            try:
+                result = self._run(snapshot)
+            except CopyMoved as moved:
+                state, result = JOB_QUEUED, {"dest": moved.dest, "volume": volume_of(moved.dest)}
+                print(f"[CopyQueue] Moving {job['name']} to {result['volume']}")
+            except CopyCancelled:
+                state = JOB_CANCELLED
+                print(f"[CopyQueue] Cancelled {job['name']}")
+            except Exception as e:
+                state, error = JOB_FAILED, str(e)
+                print(f"[CopyQueue] Job {job['name']} failed: {e}")
+
+            with self._cond:
+                self._running[volume] -= 1
+                self._cancelled.discard(job['id'])
+                job.update(result or {})
+                job['state'] = state
+                job['error'] = error
+                job['updated_at'] = time.time()
+                if state == JOB_QUEUED:
+                    self._ensure_workers(job['volume'])
+                    self._cond.notify_all()
+                else:
+                    job['finished_at'] = job['updated_at']
+                pruned = self._prune()
+            self._persist(job['id'], pruned)
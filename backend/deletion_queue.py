@@ -0,0 +1,260 @@
+"""
+Background Temp Deletion Queue
+Removing a finished download from temp (hundreds of files in a season pack on
+a spinning disk) runs on its own thread instead of inside copy_worker. Files
+are unlinked in batches under an operations-per-second budget so the deletes
+do not starve Tixati's reads. Files Tixati still holds open are retried with
+backoff, and the bytes waiting to be freed are reported.
+"""
+import errno
+import os
+import stat
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from io_throttle import TokenBucket
+
+DELETE_PENDING = 'pending'
+DELETE_RETRYING = 'retrying'
+DELETE_FAILED = 'failed'
+
+# Windows sharing / lock violations: the file is open in another process (usually Tixati)
+_LOCKED_WINERRORS = (32, 33)
+
+
+def is_locked_error(err: OSError) -> bool:
+    """Whether an unlink failed because another process holds the file"""
+    return getattr(err, 'winerror', None) in _LOCKED_WINERRORS or err.errno in (errno.EBUSY, errno.ETXTBSY)
+
+
+def _scan(path: str) -> Tuple[List[Tuple[str, bool, int]], int]:
+    """Entries under path, deepest first, as (path, is_dir, size), plus their total size"""
+    if not os.path.isdir(path) or os.path.islink(path):
+        size = os.lstat(path).st_size
+        return [(path, False, size)], size
+    entries, total = [], 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            full = os.path.join(root, name)
+            try:
+                size = os.lstat(full).st_size
+            except FileNotFoundError:
+                continue
+            entries.append((full, False, size))
+            total += size
+        for name in dirs:
+            full = os.path.join(root, name)
+            # Symlinked folders are unlinked, never followed
+            entries.append((full, not os.path.islink(full), 0))
+    entries.append((path, True, 0))
+    return entries, total
+
+
+def _remove(path: str, is_dir: bool):
+    if is_dir:
+        os.rmdir(path)
+        return
+    try:
+        os.unlink(path)
+    except PermissionError:
+        # Read-only files cannot be unlinked on Windows; clear the flag once and try again
+        os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+        os.unlink(path)
+
+
+class DeletionQueue:
+    """Deletes queued temp paths on a background thread
+
+    Paths persist through load(), save(item) and remove(paths) so a restart
+    finishes the job.
+    Only paths inside root are accepted. Deletes run in batches of
+    batch_size entries charged to an ops_per_sec budget. An item with files
+    that could not be removed is retried after retry_delay seconds, doubling
+    up to max_retry_delay, and is marked failed after max_attempts.
+    on_freed(path) runs after a path is fully gone (e.g. to refresh disk usage).
+    """
+
+    def __init__(self, load: Callable[[], List[dict]], save: Callable[[dict], None],
+                 remove: Callable[[List[str]], None], root: Optional[str] = None, ops_per_sec: float = 200, batch_size: int = 64,
+                 retry_delay: float = 5.0, max_retry_delay: float = 300.0, max_attempts: int = 12,
+                 on_freed: Optional[Callable[[str], None]] = None):
+        self._save = save
+        self._remove = remove
+        self.root = os.path.abspath(root) if root else None
+        self.batch_size = max(1, batch_size)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.on_freed = on_freed
+        self._bucket = TokenBucket(ops_per_sec or None)
+        self._cond = threading.Condition()
+        self._save_lock = threading.Lock()
+        self._items: List[dict] = []
+        self.freed_bytes = 0  # since start
+        for saved in load() or []:
+            item = self._new_item(saved['path'], saved.get('reason', ''), saved.get('size', 0))
+            item['queued_at'] = saved.get('queued_at', item['queued_at'])
+            item['attempts'] = saved.get('attempts', 0)
+            if saved.get('state') == DELETE_FAILED:
+                item['state'], item['error'] = DELETE_FAILED, saved.get('error')
+            self._items.append(item)
+
+    def start(self):
+        threading.Thread(target=self._work, name="TempDeleter", daemon=True).start()
+
+    @staticmethod
+    def _new_item(path: str, reason: str, size: int) -> dict:
+        return {
+            "path": path,
+            "reason": reason,
+            "state": DELETE_PENDING,
+            "size": size,  # bytes still to free (refined by each scan)
+            "freed": 0,
+            "files_left": None,
+            "attempts": 0,
+            "error": None,
+            "queued_at": time.time(),
+            "next_attempt": 0.0,
+        }
+
+    def _inside_root(self, path: str) -> bool:
+        if not self.root:
+            return True
+        path = os.path.abspath(path)
+        try:
+            return path != self.root and os.path.commonpath([path, self.root]) == self.root
+        except ValueError:
+            return False  # different drives
+
+    def _persist(self, item: dict):
+        with self._save_lock:
+            with self._cond:
+                queued = any(queued is item for queued in self._items)
+                record = {key: item[key] for key in ("path", "reason", "state", "size", "attempts",
+                                                    "error", "queued_at")}
+            if queued:
+                self._save(record)
+            else:
+                self._remove([record['path']])
+
+    def enqueue(self, path: str, reason: str = '', size: int = 0) -> bool:
+        """Queue path for deletion; False if it is outside root or already queued"""
+        if not self._inside_root(path):
+            print(f"[Deleter] Refusing to delete outside {self.root}: {path}")
+            return False
+        with self._cond:
+            for item in self._items:
+                if item['path'] == path:
+                    if item['state'] == DELETE_FAILED:
+                        item.update(state=DELETE_PENDING, attempts=0, error=None, next_attempt=0.0)
+                        break
+                    return False
+            else:
+                item = self._new_item(path, reason, size)
+                self._items.append(item)
+            self._cond.notify_all()
+        self._persist(item)
+        print(f"[Deleter] Queued {path}" + (f" ({reason})" if reason else ""))
+        return True
+
+    def pending_bytes(self) -> int:
+        with self._cond:
+            return sum(item['size'] for item in self._items if item['state'] != DELETE_FAILED)
+
+    def status(self) -> dict:
+        with self._cond:
+            items = [{key: value for key, value in item.items() if key != 'next_attempt'}
+                     for item in self._items]
+        active = [item for item in items if item['state'] != DELETE_FAILED]
+        return {
+            "pendingBytes": sum(item['size'] for item in active),
+            "pendingItems": len(active),
+            "freedBytes": self.freed_bytes,
+            "items": items,
+        }
+
+    def _next_item(self) -> Tuple[Optional[dict], Optional[float]]:
+        """Item due now, or the seconds until the next retry comes due"""
+        now = time.time()
+        waits = []
+        for item in self._items:
+            if item['state'] == DELETE_FAILED:
+                continue
+            if item['next_attempt'] <= now:
+                return item, None
+            waits.append(item['next_attempt'] - now)
+        return None, min(waits) if waits else None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                item, wait = self._next_item()
+                while item is None:
+                    self._cond.wait(wait)
+                    item, wait = self._next_item()
+                path = item['path']
+            self._delete(item, path)
+
+    def _delete(self, item: dict, path: str):
+        try:
+            entries, total = _scan(path)
+        except FileNotFoundError:
+            entries, total = [], 0
+        except OSError as e:
+            self._attempt_failed(item, str(e))
+            return
+        with self._cond:
+            item['size'], item['files_left'] = total, sum(1 for _, is_dir, _ in entries if not is_dir)
+
+        left, last_error = 0, None
+        for start in range(0, len(entries), self.batch_size):
+            batch = entries[start:start + self.batch_size]
+            freed = removed = 0
+            for entry, is_dir, size in batch:
+                try:
+                    _remove(entry, is_dir)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    # A folder is left non-empty by a locked file inside it; only count the file
+                    if not is_dir:
+                        left += 1
+                        last_error = f"{entry}: {'locked' if is_locked_error(e) else e}"
+                    continue
+                if not is_dir:
+                    freed += size
+                    removed += 1
+            with self._cond:
+                item['size'] -= freed
+                item['freed'] += freed
+                item['files_left'] -= removed
+                self.freed_bytes += freed
+            wait = self._bucket.reserve(len(batch))
+            if wait:
+                time.sleep(wait)
+
+        if left or os.path.lexists(path):
+            self._attempt_failed(item, last_error or f"{path}: could not remove")
+            return
+        with self._cond:
+            self._items.remove(item)
+        self._persist(item)
+        print(f"[Deleter] Removed {path} ({item['freed'] / 1024**3:.2f} GB freed)")
+        if self.on_freed:
+            self.on_freed(path)
+
+    def _attempt_failed(self, item: dict, error: str):
+        with self._cond:
+            item['attempts'] += 1
+            item['error'] = error
+            if item['attempts'] >= self.max_attempts:
+                item['state'] = DELETE_FAILED
+                print(f"[Deleter] Giving up on {item['path']} after {item['attempts']} attempts: {error}")
+            else:
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (item['attempts'] - 1))
+                item['state'] = DELETE_RETRYING
+                item['next_attempt'] = time.time() + delay
+                print(f"[Deleter] {item['files_left']} files left in {item['path']} ({error}); "
+                      f"retrying in {delay:.0f}s")
+        self._persist(item)
@@ -0,0 +1,84 @@
+"""
+Server-Sent Events Fan-Out
+A single producer publishes events once; every connected dashboard or mobile
+client receives them from its own bounded queue.
+"""
+import json
+import queue
+import threading
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Sentinel telling a stream generator to end (client fell too far behind)
+_CLOSE = object()
+
+
+def format_sse(event: str, data, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, separators=(',', ':'))
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventBroadcaster:
+    """Fan out published events to all subscribed client queues"""
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event: str, data):
+        """Queue an event for every subscriber; drop clients that stopped reading"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                # A lagging client has missed deltas; close it so EventSource
+                # reconnects and receives a fresh full state
+                self.unsubscribe(q)
+                try:
+                    while True:
+                        q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(_CLOSE)
+
+    def stream(self, q: queue.Queue, initial: Iterable[Tuple[str, object]] = (),
+               heartbeat: float = 15.0) -> Iterator[str]:
+        """SSE generator for one subscriber; unsubscribes when the client disconnects"""
+        try:
+            yield 'retry: 3000\n\n'
+            for event, data in initial:
+                yield format_sse(event, data)
+            while True:
+                try:
+                    item = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if item is _CLOSE:
+                    return
+                event, data = item
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,49 @@
+"""
+Concurrent Source Fan-Out
+Runs independent data sources (Tixati scrape, disk usage, psutil, nvidia-smi)
+in parallel with a deadline per source, so an endpoint takes as long as its
+slowest source, capped by that source's deadline, instead of the sum of all.
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Tuple
+
+
+class SourceFanout:
+    """Shared worker pool for multi-source endpoints.
+
+    A source that misses its deadline keeps running in the background; callers
+    asking for the same source meanwhile wait on that run instead of starting
+    another, so a hung source never piles up threads.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Fanout")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, name: str, fn: Callable[[], Any]) -> Future:
+        with self._lock:
+            future = self._inflight.get(name)
+            if future is None or future.done():
+                future = self._executor.submit(fn)
+                self._inflight[name] = future
+            return future
+
+    def gather(self, sources: Dict[str, Tuple[Callable[[], Any], float]]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run {name: (fn, deadline_seconds)} concurrently; return (results, errors) by name"""
+        started = time.monotonic()
+        futures = {name: self._submit(name, fn) for name, (fn, _) in sources.items()}
+        results, errors = {}, {}
+        for name, future in futures.items():
+            deadline = sources[name][1]
+            remaining = max(0.0, started + deadline - time.monotonic())
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeout:
+                errors[name] = f"timed out after {deadline}s"
+            except Exception as e:
+                errors[name] = str(e)
+        return results, errors
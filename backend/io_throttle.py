@@ -0,0 +1,166 @@
+"""
+Library Copy I/O Throttle
+Token buckets that cap how fast library copies read and write: one global
+bucket plus optional read/write buckets per volume. The global rate backs off
+while Tixati is uploading hard (the temp drive is busy seeding) and ramps back
+up once the swarm goes quiet.
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from copy_executor import volume_of
+
+_RATE_RE = re.compile(r'([\d.,]+)\s*([KMGT]?i?B)', re.IGNORECASE)
+_RATE_UNITS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+
+# Longest single sleep, so an interrupt check runs at least this often while throttled
+MAX_SLEEP_SLICE = 0.5
+
+# Global rate never ramps above this many times the busy rate unless a cap is set; past it copies run unthrottled
+UNCAPPED_RAMP_FACTOR = 16
+
+
+def parse_rate(text: str) -> float:
+    """Bytes per second from a Tixati rate such as "1.2 MB/s" or "512 KB/s" (0 if unreadable)"""
+    match = _RATE_RE.search(text or '')
+    if not match:
+        return 0.0
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return 0.0
+    prefix = match.group(2).upper().rstrip('B').rstrip('I')
+    return value * _RATE_UNITS.get(prefix, 1)
+
+
+class TokenBucket:
+    """Byte-rate limiter; rate None means unlimited. Thread-safe."""
+
+    def __init__(self, rate: Optional[float], burst_seconds: float = 1.0):
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = self._capacity()
+        self._stamp = time.monotonic()
+
+    def _capacity(self) -> float:
+        return (self._rate or 0) * self.burst_seconds
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def set_rate(self, rate: Optional[float]):
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            self._tokens = min(self._tokens, self._capacity())
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._stamp) * self._rate)
+        self._stamp = now
+
+    def reserve(self, count: int) -> float:
+        """Take count bytes of budget (going into debt if needed); seconds the caller should wait"""
+        with self._lock:
+            if not self._rate:
+                return 0.0
+            self._refill()
+            self._tokens -= count
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+
+class CopyThrottle:
+    """Global plus per-volume read/write token buckets for library copies
+
+    per_volume maps a volume ("K:" or "dev:<id>") to a rate in bytes/s for
+    both directions, or to {"read": rate, "write": rate}. Rates of 0 or None
+    mean unlimited.
+    """
+
+    def __init__(self, global_rate: Optional[float] = None, per_volume: Optional[Dict[str, object]] = None,
+                 busy_outrate: float = 0.0, idle_outrate: float = 0.0, busy_rate: Optional[float] = None):
+        self.base_rate = global_rate or None
+        self.busy_outrate = busy_outrate
+        self.idle_outrate = idle_outrate
+        self.busy_rate = busy_rate or None
+        self.swarm_outrate = 0.0
+        self._global = TokenBucket(self.base_rate)
+        self._volumes: Dict[str, Dict[str, TokenBucket]] = {}
+        for volume, limit in (per_volume or {}).items():
+            if isinstance(limit, dict):
+                read, write = limit.get('read'), limit.get('write')
+            else:
+                read = write = limit
+            self._volumes[volume.upper()] = {'read': TokenBucket(read or None), 'write': TokenBucket(write or None)}
+
+    @property
+    def adaptive(self) -> bool:
+        return bool(self.busy_outrate and self.busy_rate)
+
+    def _volume_bucket(self, volume: str, direction: str) -> Optional[TokenBucket]:
+        buckets = self._volumes.get(volume.upper())
+        return buckets[direction] if buckets else None
+
+    def for_job(self, src: str, dest: str, interrupt: Optional[Callable[[], None]] = None) -> Callable[[int], None]:
+        """Callable charging each copied chunk to the global, source-read and destination-write buckets
+
+        interrupt() is called between sleep slices and may raise to abort the copy.
+        """
+        buckets = [self._global]
+        for path, direction in ((src, 'read'), (dest, 'write')):
+            bucket = self._volume_bucket(volume_of(path), direction)
+            if bucket is not None:
+                buckets.append(bucket)
+
+        def throttle(count: int):
+            wait = max(bucket.reserve(count) for bucket in buckets)
+            while wait > 0:
+                if interrupt:
+                    interrupt()
+                time.sleep(min(wait, MAX_SLEEP_SLICE))
+                wait -= MAX_SLEEP_SLICE
+        return throttle
+
+    def adapt(self, outrate: float):
+        """Retune the global rate from Tixati's current upload rate (bytes/s)
+
+        Above busy_outrate the rate drops straight to busy_rate so seeding
+        recovers at once; below idle_outrate it doubles per sample back to the
+        configured cap (or to unlimited). In between it holds.
+        """
+        self.swarm_outrate = outrate
+        if not self.adaptive:
+            return
+        current = self._global.rate
+        if outrate >= self.busy_outrate:
+            target = min(self.busy_rate, self.base_rate) if self.base_rate else self.busy_rate
+            if current is None or current > target:
+                self._global.set_rate(target)
+                print(f"[Throttle] Tixati uploading {outrate / 1024**2:.1f} MB/s, "
+                      f"copies limited to {target / 1024**2:.1f} MB/s")
+        elif outrate <= self.idle_outrate and current is not None and current != self.base_rate:
+            raised = current * 2
+            ceiling = self.base_rate or self.busy_rate * UNCAPPED_RAMP_FACTOR
+            target = self.base_rate if raised >= ceiling else raised
+            self._global.set_rate(target)
+            print(f"[Throttle] Swarm idle, copies raised to "
+                  f"{f'{target / 1024**2:.1f} MB/s' if target else 'unlimited'}")
+
+    def status(self) -> dict:
+        def mbps(rate):
+            return round(rate / 1024**2, 1) if rate else None
+        return {
+            "globalMBps": mbps(self._global.rate),
+            "baseMBps": mbps(self.base_rate),
+            "adaptive": self.adaptive,
+            "swarmOutMBps": round(self.swarm_outrate / 1024**2, 2),
+            "volumes": {
+                volume: {direction: mbps(bucket.rate) for direction, bucket in buckets.items()}
+                for volume, buckets in self._volumes.items()
+            },
+        }
@@ -0,0 +1,243 @@
+"""
+Keyed Collections
+Insertion-ordered entries keyed by id, with secondary indexes, for the config
+collections (intents, batch queue, library index). Lookups, updates and
+deletes are O(1) whatever the queue size, and the collection still iterates
+and serializes as the plain list the API returns.
+
+Copies share structure: the key map and each index are split into hash
+shards and the order into fixed-size pages, and copy() only copies the lists
+holding them. A copy that is then changed copies just the shards, pages and
+index buckets it writes to, so a config edit costs the same for a queue of a
+hundred entries as for one of fifty thousand.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+_MIN_SHARDS = 16  # per map; doubled as it grows so shards hold about as many keys as there are shards
+_PAGE_SIZE = 128  # entries per order page
+
+
+class _ShardedDict:
+    """Dict split into shards by key hash; copy() shares the shards, a write copies only its own"""
+
+    __slots__ = ('_shards', '_mask', '_owned', '_len')
+
+    def __init__(self):
+        self._shards: List[Optional[dict]] = [None] * _MIN_SHARDS
+        self._mask = _MIN_SHARDS - 1
+        self._owned: Set[int] = set()  # shards this dict may change in place
+        self._len = 0
+
+    def copy(self) -> "_ShardedDict":
+        clone = _ShardedDict.__new__(_ShardedDict)
+        clone._shards, clone._mask, clone._owned, clone._len = list(self._shards), self._mask, set(), self._len
+        self._owned = set()  # the shards are shared from now on
+        return clone
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key) -> bool:
+        shard = self._shards[hash(key) & self._mask]
+        return shard is not None and key in shard
+
+    def get(self, key, default=None):
+        shard = self._shards[hash(key) & self._mask]
+        return default if shard is None else shard.get(key, default)
+
+    def _writable(self, key) -> dict:
+        slot = hash(key) & self._mask
+        if slot not in self._owned:
+            shard = self._shards[slot]
+            self._shards[slot] = dict(shard) if shard else {}
+            self._owned.add(slot)
+        return self._shards[slot]
+
+    def __setitem__(self, key, value):
+        shard = self._writable(key)
+        if key not in shard:
+            self._len += 1
+            if self._len > 2 * len(self._shards) ** 2:
+                self._grow()
+                shard = self._writable(key)
+        shard[key] = value
+
+    def _grow(self):
+        """Double the shards (a one-off O(n) rehash, shared by the copies made after it)"""
+        count = len(self._shards) * 2
+        shards: List[Optional[dict]] = [None] * count
+        for shard in self._shards:
+            for key, value in (shard or {}).items():
+                slot = hash(key) & (count - 1)
+                if shards[slot] is None:
+                    shards[slot] = {}
+                shards[slot][key] = value
+        self._shards, self._mask, self._owned = shards, count - 1, set(range(count))
+
+    def pop(self, key, default=None):
+        if key not in self:
+            return default
+        self._len -= 1
+        return self._writable(key).pop(key)
+
+
+class _Page:
+    """A run of entries in insertion order, with the sequence numbers that order them"""
+
+    __slots__ = ('seqs', 'entries', 'owner')
+
+    def __init__(self, seqs: List[int], entries: List[dict], owner: object):
+        self.seqs, self.entries, self.owner = seqs, entries, owner
+
+
+class KeyedCollection:
+    """Ordered dict of entries plus secondary indexes
+
+    key(entry) is the primary key. indexes maps an index name to a function
+    giving the value an entry is filed under (None leaves it out). Entries are
+    the caller's dicts and are not copied; to change one, put() an updated
+    copy so collections sharing the old dict (see copy()) keep seeing it.
+    """
+
+    def __init__(self, key: Callable[[dict], Hashable], indexes: Optional[Dict[str, Callable[[dict], Hashable]]] = None,
+                 entries: Iterable[dict] = ()):
+        self._key = key
+        self._index_funcs = indexes or {}
+        self.replace(entries)
+
+    def __iter__(self) -> Iterator[dict]:
+        for page in self._pages:
+            yield from page.entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, KeyedCollection):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def copy(self) -> "KeyedCollection":
+        """A collection that can be changed without affecting this one (unchanged parts are shared)"""
+        clone = KeyedCollection.__new__(KeyedCollection)
+        clone._key, clone._index_funcs, clone._seq = self._key, self._index_funcs, self._seq
+        clone._entries = self._entries.copy()
+        clone._pages, clone._starts = list(self._pages), list(self._starts)
+        clone._indexes = {name: index.copy() for name, index in self._indexes.items()}
+        # Pages and index buckets made so far are shared now: neither side changes them in place
+        clone._owner, clone._own_buckets = object(), set()
+        self._owner, self._own_buckets = object(), set()
+        return clone
+
+    def key_of(self, entry: dict) -> Hashable:
+        return self._key(entry)
+
+    def to_list(self) -> List[dict]:
+        return [entry for page in self._pages for entry in page.entries]
+
+    def get(self, key) -> Optional[dict]:
+        stored = self._entries.get(key)
+        return stored[1] if stored else None
+
+    def find(self, index: str, value) -> List[dict]:
+        """Entries filed under value in an index, in insertion order"""
+        return [self._entries.get(key)[1] for key in self._indexes[index].get(value, ())]
+
+    def first(self, index: str, value) -> Optional[dict]:
+        for key in self._indexes[index].get(value, ()):
+            return self._entries.get(key)[1]
+        return None
+
+    def put(self, entry: dict):
+        """Add an entry at the end, or replace the one with its key in place"""
+        key = self._key(entry)
+        stored = self._entries.get(key)
+        if stored:
+            seq = stored[0]
+            self._unfile(key, stored[2])
+            page, pos = self._locate(seq)
+            page.entries[pos] = entry
+        else:
+            seq = self._seq
+            self._seq += 1
+            self._append(seq, entry)
+        self._entries[key] = (seq, entry, self._file(key, entry))
+
+    def append(self, entry: dict):
+        """Add an entry at the end, moving any entry with its key there"""
+        self.remove(self._key(entry))
+        self.put(entry)
+
+    def remove(self, key) -> Optional[dict]:
+        stored = self._entries.pop(key)
+        if stored is None:
+            return None
+        seq, entry, filed = stored
+        self._unfile(key, filed)
+        page, pos = self._locate(seq)
+        del page.seqs[pos], page.entries[pos]
+        if not page.entries:
+            slot = bisect_right(self._starts, seq) - 1
+            del self._pages[slot], self._starts[slot]
+        return entry
+
+    def replace(self, entries: Iterable[dict]):
+        """Swap in new contents (a repeated key keeps its first position and last entry)"""
+        self._entries = _ShardedDict()  # key -> (seq, entry, {index name: value it is filed under})
+        self._pages: List[_Page] = []
+        self._starts: List[int] = []  # lowest seq each page holds (never raised, so bisect finds a seq's page)
+        # index name -> value -> keys filed under it (dict keeps them in insertion order)
+        self._indexes: Dict[str, _ShardedDict] = {name: _ShardedDict() for name in self._index_funcs}
+        self._owner = object()  # pages created by this collection carry it and may be changed in place
+        self._own_buckets: Set[Tuple[str, Hashable]] = set()
+        self._seq = 0
+        for entry in entries:
+            self.put(entry)
+
+    def _locate(self, seq: int) -> Tuple[_Page, int]:
+        """The page holding seq (made writable) and its position there"""
+        slot = bisect_right(self._starts, seq) - 1
+        page = self._pages[slot]
+        if page.owner is not self._owner:
+            page = self._pages[slot] = _Page(list(page.seqs), list(page.entries), self._owner)
+        return page, bisect_left(page.seqs, seq)
+
+    def _append(self, seq: int, entry: dict):
+        if self._pages and len(self._pages[-1].entries) < _PAGE_SIZE:
+            page, _ = self._locate(self._pages[-1].seqs[-1])
+            page.seqs.append(seq)
+            page.entries.append(entry)
+        else:
+            self._pages.append(_Page([seq], [entry], self._owner))
+            self._starts.append(seq)
+
+    def _bucket(self, name: str, value) -> Dict[Hashable, None]:
+        """The keys filed under value, copied first if the bucket is shared"""
+        index = self._indexes[name]
+        bucket = index.get(value)
+        if (name, value) not in self._own_buckets:
+            bucket = dict(bucket) if bucket else {}
+            index[value] = bucket
+            self._own_buckets.add((name, value))
+        return bucket
+
+    def _file(self, key, entry: dict) -> Dict[str, Hashable]:
+        filed = {}
+        for name, func in self._index_funcs.items():
+            value = func(entry)
+            if value is not None:
+                self._bucket(name, value)[key] = None
+                filed[name] = value
+        return filed
+
+    def _unfile(self, key, filed: Dict[str, Hashable]):
+        for name, value in filed.items():
+            keys = self._bucket(name, value)
+            keys.pop(key, None)
+            if not keys:
+                self._indexes[name].pop(value)
+                self._own_buckets.discard((name, value))
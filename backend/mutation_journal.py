@@ -0,0 +1,141 @@
+"""
+Config Mutation Journal
+Write-ahead log for the config: every change is appended as one small JSON
+line ({"seq", "op", ...}) instead of rewriting the whole file, and the full
+snapshot is only rewritten when the journal is compacted. On startup the
+snapshot is loaded and the records newer than it are replayed.
+
+Records:
+    {"op": "put", "c": collection, "s": scope, "k": key, "v": entry}
+    {"op": "del", "c": collection, "s": scope, "k": [keys]}
+    {"op": "replace", "c": collection, "s": scope, "v": [entries]}
+    {"op": "set", "k": setting, "v": value}
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+# Collections whose entries are split by scope (e.g. the library index per category)
+SCOPED_COLLECTIONS = ('library_index',)
+
+
+def _entries(config: dict, collection: str, scope: str) -> list:
+    if collection in SCOPED_COLLECTIONS:
+        return config.setdefault(collection, {}).setdefault(scope, [])
+    return config.setdefault(collection, [])
+
+
+def apply_record(config: dict, record: dict, key_of: Callable[[str, dict], Optional[str]]):
+    """Apply one journal record to a config dict in place"""
+    op = record.get('op')
+    if op == 'set':
+        config[record['k']] = record['v']
+        return
+    collection, scope = record['c'], record.get('s', '')
+    entries = _entries(config, collection, scope)
+    if op == 'put':
+        for idx, entry in enumerate(entries):
+            if key_of(collection, entry) == record['k']:
+                entries[idx] = record['v']
+                return
+        entries.append(record['v'])
+    elif op == 'del':
+        keys = set(record['k'])
+        entries[:] = [entry for entry in entries if key_of(collection, entry) not in keys]
+    elif op == 'replace':
+        entries[:] = record['v']
+
+
+def replay(path: str, config: dict, key_of: Callable[[str, dict], Optional[str]],
+           after_seq: int = 0) -> Tuple[int, int]:
+    """Apply the records in path newer than after_seq; (records applied, last seq seen)
+
+    A torn last line (crash mid-append) ends the replay.
+    """
+    applied, last_seq = 0, after_seq
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"[Journal] Ignoring torn record after seq {last_seq}")
+                break
+            if record.get('seq', 0) <= last_seq:
+                continue  # already in the snapshot, or a duplicate from a retried append
+            apply_record(config, record, key_of)
+            applied += 1
+            last_seq = record['seq']
+    return applied, last_seq
+
+
+class MutationJournal:
+    """Append-only journal file; appends are buffered until commit() writes and fsyncs them"""
+
+    def __init__(self, path: str, seq: int = 0):
+        self.path = path
+        self.seq = seq  # last sequence number handed out
+        self.committed_seq = seq  # last sequence number on disk
+        self.compacted_at = time.time()
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # one append or truncate on the file at a time
+        self._pending: List[str] = []
+
+    def append(self, record: dict):
+        """Queue a record (serialized now, so later changes to its entry do not leak in)"""
+        with self._lock:
+            self.seq += 1
+            self._pending.append(json.dumps({"seq": self.seq, **record}, ensure_ascii=False))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def commit(self) -> int:
+        """Append every queued record with one write and one fsync; returns the last committed seq"""
+        with self._lock:
+            lines, self._pending = self._pending, []
+            seq = self.seq
+        with self._file_lock:
+            if lines:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write('\n'.join(lines) + '\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception:
+                    with self._lock:
+                        self._pending[:0] = lines
+                    raise
+            self.committed_seq = max(self.committed_seq, seq)
+        return seq
+
+    def truncate(self, upto_seq: int):
+        """Drop the records a snapshot holds (seq <= upto_seq); later ones, on disk or queued, stay"""
+        with self._file_lock:
+            keep = []
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            break  # torn tail
+                        if record.get('seq', 0) > upto_seq:
+                            keep.append(line if line.endswith('\n') else line + '\n')
+            except FileNotFoundError:
+                pass
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                f.writelines(keep)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)
+        self.compacted_at = time.time()
@@ -0,0 +1,162 @@
+"""
+Torrent Name Matching Index
+Normalizes each name once and answers "which indexed name matches this one"
+with a hash map (exact), an Aho-Corasick automaton (indexed name inside the
+query) and one scan of the joined names (query inside an indexed name), so a
+lookup costs about the length of the query instead of one comparison per
+tracked torrent.
+"""
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+MATCH_EXACT = 'exact'
+MATCH_NAME_IN_QUERY = 'name_in_query'  # the indexed name is a substring of the query
+MATCH_QUERY_IN_NAME = 'query_in_name'  # the query is a substring of the indexed name
+
+_UINDEX_PREFIX_RE = re.compile(r'^\s*www\.uindex\.org\s*', re.IGNORECASE)
+_BRACKET_TAG_RE = re.compile(r'^\s*\[.*?\]\s*')
+_BRACE_TAG_RE = re.compile(r'^\s*\{.*?\}\s*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Joins names for the substring scan; cannot occur in a torrent name
+_SEPARATOR = '\x00'
+
+
+def clean_torrent_name(raw_name):
+    """Clean torrent name by removing common prefixes and normalizing whitespace"""
+    if not raw_name:
+        return raw_name
+
+    # Remove common prefixes
+    name = raw_name.strip()
+    # Remove www.UIndex.org and similar prefixes with whitespace
+    name = _UINDEX_PREFIX_RE.sub('', name)
+    # Remove other common tracker prefixes
+    name = _BRACKET_TAG_RE.sub('', name)  # Remove [tracker] tags
+    name = _BRACE_TAG_RE.sub('', name)  # Remove {tracker} tags
+    # Normalize whitespace
+    name = _WHITESPACE_RE.sub(' ', name).strip()
+    return name
+
+
+@lru_cache(maxsize=16384)
+def normalize_name(raw_name: str) -> str:
+    """Cleaned, lower-cased name used for matching (cached per raw name)"""
+    return (clean_torrent_name(raw_name or '') or '').lower()
+
+
+class _AhoCorasick:
+    """Multi-pattern matcher returning the lowest pattern id found in a text"""
+
+    def __init__(self, patterns: Sequence[Tuple[str, int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]  # lowest id ending here, via fail links too
+        for pattern, pattern_id in patterns:
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = nxt
+            if self._best[node] is None or pattern_id < self._best[node]:
+                self._best[node] = pattern_id
+
+        # Breadth-first so every fail target is complete before it is used
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for char, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def first(self, text: str) -> Optional[int]:
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        found = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = best[node]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+        return found
+
+
+class NameIndex(Generic[T]):
+    """Immutable index over items by normalized name; earlier items win ties"""
+
+    def __init__(self, items: Iterable[T], name_of: Callable[[T], str]):
+        self._items: List[T] = []
+        names: List[str] = []
+        self._exact: Dict[str, int] = {}
+        for item in items:
+            name = normalize_name(name_of(item))
+            if not name:
+                continue
+            position = len(self._items)
+            self._items.append(item)
+            names.append(name)
+            self._exact.setdefault(name, position)
+
+        self._matcher = _AhoCorasick([(name, i) for i, name in enumerate(names)])
+        self._joined = _SEPARATOR.join(names)
+        self._starts = []
+        offset = 0
+        for name in names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _position_at(self, offset: int) -> int:
+        # Names were joined in item order, so the owning item is the last start <= offset
+        low, high = 0, len(self._starts) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self._starts[mid] <= offset:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def lookup(self, query: str, kind: str) -> Optional[T]:
+        """First item whose name relates to query as kind (MATCH_* constant)"""
+        query = normalize_name(query)
+        if not query or not self._items:
+            return None
+        if kind == MATCH_EXACT:
+            position = self._exact.get(query)
+        elif kind == MATCH_NAME_IN_QUERY:
+            position = self._matcher.first(query)
+        elif kind == MATCH_QUERY_IN_NAME:
+            offset = self._joined.find(query)
+            position = self._position_at(offset) if offset >= 0 else None
+        else:
+            raise ValueError(f"Unknown match kind: {kind}")
+        return None if position is None else self._items[position]
+
+    def best(self, query: str, ranking: Sequence[str]) -> Tuple[Optional[T], int]:
+        """Best item for query; score is len(ranking) for the first kind, down to 1, or 0 for none"""
+        for rank, kind in enumerate(ranking):
+            item = self.lookup(query, kind)
+            if item is not None:
+                return item, len(ranking) - rank
+        return None, 0
@@ -0,0 +1,126 @@
+"""
+Free-Space-Aware Placement
+Decides whether a download fits on its target volume before any I/O is spent:
+disk usage is read once per volume per TTL, space promised to downloads that
+are not in the library yet is subtracted, and when the target is too full the
+least-full library of the same category is suggested instead.
+"""
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+from copy_executor import volume_of
+
+_SIZE_RE = re.compile(r'([\d.,]+)\s*([KMGT]?)', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+
+
+def parse_size(text: str) -> int:
+    """Total bytes from a Tixati size column ("401 M of 2.06 G" -> 2.06 G); 0 if unreadable"""
+    if not text:
+        return 0
+    total = text.split(' of ')[-1]
+    match = _SIZE_RE.search(total)
+    if not match:
+        return 0
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return 0
+    return int(value * _SIZE_UNITS[match.group(2).upper()])
+
+
+class DiskUsage(NamedTuple):
+    total: int
+    free: int
+
+
+class DiskUsageCache:
+    """psutil.disk_usage per volume, re-read at most once per ttl seconds"""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Tuple[float, DiskUsage]] = {}
+
+    def get(self, path: str) -> DiskUsage:
+        volume = volume_of(path)
+        with self._lock:
+            cached = self._usage.get(volume)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                return cached[1]
+        usage = psutil.disk_usage(_existing_parent(path))
+        usage = DiskUsage(usage.total, usage.free)
+        with self._lock:
+            self._usage[volume] = (time.monotonic(), usage)
+        return usage
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._usage.pop(volume_of(path), None)
+
+
+def _existing_parent(path: str) -> str:
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+class PlacementCheck(NamedTuple):
+    fits: bool
+    needed: int
+    available: int  # free bytes on the target volume after reservations and headroom
+    suggestion: Optional[dict]  # least-full library in the category that fits, if any
+
+
+class PlacementService:
+    """Space checks for library targets
+
+    reservations() yields (key, path, bytes) for every download still headed
+    to a library (minus what is already copied), so space promised to earlier
+    downloads is not promised twice. headroom is kept free on every volume.
+    """
+
+    def __init__(self, usage: DiskUsageCache, reservations: Callable[[], Iterable[Tuple[str, str, int]]],
+                 headroom: int = 0):
+        self.usage = usage
+        self.reservations = reservations
+        self.headroom = headroom
+
+    def reserved(self, path: str, exclude_key: Optional[str] = None) -> int:
+        volume = volume_of(path)
+        return sum(size for key, target, size in self.reservations()
+                   if key != exclude_key and size > 0 and volume_of(target) == volume)
+
+    def available(self, path: str, exclude_key: Optional[str] = None) -> int:
+        return self.usage.get(path).free - self.reserved(path, exclude_key) - self.headroom
+
+    def suggest(self, libraries: List[dict], size: int, exclude_key: Optional[str] = None) -> Optional[dict]:
+        """Least-full library (by share of the volume used, reservations included) that fits size"""
+        best, best_used = None, None
+        for lib in libraries:
+            try:
+                usage = self.usage.get(lib['path'])
+                available = self.available(lib['path'], exclude_key)
+            except OSError:
+                continue
+            if available < size or not usage.total:
+                continue
+            used = 1 - available / usage.total
+            if best is None or used < best_used:
+                best, best_used = lib, used
+        return best
+
+    def check(self, path: str, size: int, libraries: List[dict], key: Optional[str] = None) -> PlacementCheck:
+        """Whether size bytes fit at path; otherwise the library to use instead"""
+        available = self.available(path, key)
+        if not size or available >= size:
+            return PlacementCheck(True, size, available, None)
+        return PlacementCheck(False, size, available, self.suggest(libraries, size, key))
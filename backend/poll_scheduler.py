@@ -0,0 +1,63 @@
+"""
+Adaptive Transfer Poll Scheduler
+Chooses how long to wait before the next Tixati scrape from the ETA and
+percent columns of the transfers that have pending intents: poll fast when
+one is about to finish, back off exponentially when nothing is close.
+"""
+from typing import Iterable, Optional
+
+from transfer_events import is_complete_row, parse_eta, parse_percent
+
+
+class AdaptivePollScheduler:
+    """Stateful poll delay: drops immediately, grows by ``backoff`` per poll"""
+
+    def __init__(self, min_interval: float = 1.0, base_interval: float = 5.0,
+                 active_max_interval: float = 30.0, max_interval: float = 120.0,
+                 backoff: float = 2.0, eta_fraction: float = 0.5, near_percent: float = 99.0):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.active_max_interval = active_max_interval  # cap while any intent is tracked
+        self.max_interval = max_interval  # cap with nothing tracked
+        self.backoff = backoff
+        self.eta_fraction = eta_fraction  # poll again after this share of the shortest ETA
+        self.near_percent = near_percent
+        self._current = base_interval
+
+    @property
+    def current(self) -> float:
+        return self._current
+
+    def target_interval(self, tracked_rows: Iterable) -> float:
+        """Delay the tracked transfers call for, before backoff smoothing"""
+        target = None
+        for row in tracked_rows:
+            if is_complete_row(row):
+                # Waiting on the seeding ratio: nothing time-critical
+                row_target = self.active_max_interval
+            elif parse_percent(row.percent) >= self.near_percent:
+                row_target = self.min_interval
+            else:
+                eta = parse_eta(row.eta)
+                if eta is None:
+                    row_target = self.active_max_interval
+                else:
+                    row_target = min(max(eta * self.eta_fraction, self.min_interval),
+                                     self.active_max_interval)
+            target = row_target if target is None else min(target, row_target)
+        return self.max_interval if target is None else target
+
+    def next_interval(self, tracked_rows: Iterable, ceiling: Optional[float] = None) -> float:
+        """Seconds until the next poll given the rows that back pending intents"""
+        target = self.target_interval(tracked_rows)
+        if target <= self._current:
+            self._current = target
+        else:
+            self._current = min(target, max(self._current, self.min_interval) * self.backoff)
+        if ceiling is not None:
+            return min(self._current, ceiling)
+        return self._current
+
+    def reset(self):
+        """Forget the backoff, e.g. after a new intent was added"""
+        self._current = min(self._current, self.base_interval)
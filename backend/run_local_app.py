@@ -16,19 +16,43 @@ Instructions:
 """
 
 import threading
+import queue
+from contextlib import contextmanager
+import atexit
 import os
 import psutil
-import requests
 from bs4 import BeautifulSoup
 import json
 import time
 import shutil
 import re
+import base64
+import binascii
+import hashlib
+from typing import Dict, NamedTuple
 from urllib.parse import parse_qs, urlparse
-from flask import Flask, render_template, send_from_directory, request, jsonify
+from flask import Flask, render_template, send_from_directory, request, jsonify, Response
 from emby_library import EmbyLibraryDb, find_appropriate_season_folder, extract_season_episode_numbers
 from torrent_parser import TorrentParser, parse_download_metadata
 from folder_manager import FolderManager
+from transfer_snapshot import TransferSnapshotService
+from poll_scheduler import AdaptivePollScheduler
+from fanout import SourceFanout
+from deletion_queue import DeletionQueue
+from state_store import StateStore
+from coalescing_writer import CoalescingWriter
+import mutation_journal
+from keyed_collection import KeyedCollection
+from config_snapshot import ConfigDraft
+from copy_executor import CopyCancelled, CopyJobQueue, CopyMoved, ACTIVE_STATES, JOB_DONE, JOB_FAILED, volume_of
+from io_throttle import CopyThrottle, parse_rate
+from placement import DiskUsageCache, PlacementService, parse_size
+from copy_engine import place_tree, same_volume, CopyJournal, CopyProgress, CopyVerificationError, VERIFY_MODES, VERIFY_SAMPLE
+from name_index import NameIndex, clean_torrent_name, normalize_name, MATCH_EXACT, MATCH_NAME_IN_QUERY, MATCH_QUERY_IN_NAME
+from transfer_parser import parse_transfer_rows, parse_eventlog_infohash, parse_file_rows
+from transfer_events import TransferDiffEngine, EVENT_ADDED, EVENT_REMOVED, EVENT_STATUS_CHANGED, row_key, status_word
+from event_stream import EventBroadcaster
+from tixati_client import TixatiClient
 
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -90,11 +114,37 @@ def browse_folder():
 # --- CONFIGURATION ---
 CONFIG_FILE = 'magnetnode_config.json'
 CONFIG_BACKUP = 'magnetnode_config.backup.json'
+STATE_DB = 'magnetnode_state.db'  # Intents, batch queue and library index when state_store is "sqlite"
+CONFIG_JOURNAL = 'magnetnode_config.journal'  # Mutation records since the last snapshot when state_store is "journal"
+STATE_STORES = ("sqlite", "json", "journal")
+JOURNAL_COMPACT_BYTES = 1024 * 1024  # Journal size that triggers rewriting the snapshot
+JOURNAL_COMPACT_INTERVAL = 600  # Longest time journal records wait to be folded into the snapshot (seconds)
+CONFIG_SAVE_DELAY = 0.5  # Changes within this window are saved together in one write (seconds)
 TIXATI_HOST = 'localhost'
 TIXATI_PORT = 8888
 TIXATI_BASE = f'http://{TIXATI_HOST}:{TIXATI_PORT}'
 TEMP_DOWNLOAD_DIR = r"K:\Temp Downloads"  # Temp location where Tixati writes by default
 WATCHER_POLL_INTERVAL = 10  # Check every 10 seconds instead of 30
+TRANSFER_POLL_INTERVAL = 5  # Background refresh of the shared transfer snapshot
+TRANSFER_POLL_MIN_INTERVAL = 1  # Poll delay when a tracked download is about to finish
+TRANSFER_POLL_ACTIVE_MAX = 30  # Longest poll delay while any intent has a transfer
+TRANSFER_POLL_IDLE_MAX = 120  # Longest poll delay with no intents to watch
+TRANSFER_MAX_AGE = 3  # Endpoints never serve transfer data older than this (seconds)
+STATS_PUSH_INTERVAL = 2  # Stat samples pushed to /api/stream subscribers (seconds)
+COPY_THROTTLE_INTERVAL = 3  # Tixati upload sampling while library copies run (seconds)
+HANDOFF_VERIFY_TIMEOUT = 600  # Longest wait for Tixati to re-check a repointed transfer (seconds)
+HANDOFF_POLL_INTERVAL = 3  # Files page polling while Tixati re-checks (seconds)
+HANDOFF_ASIDE_SUFFIX = '.handoff'  # Temp copy is renamed to this while the library copy is re-checked
+# Seeding handoff states kept on an intent (handed_off stays True only once it is done)
+HANDOFF_PENDING = 'pending'
+HANDOFF_VERIFYING = 'verifying'
+HANDOFF_DONE = 'done'
+HANDOFF_FAILED = 'failed'
+DISK_USAGE_TTL = 30  # Cached free space per volume for placement checks (seconds)
+PLACEMENT_POLICIES = ("redirect", "reject", "off")
+# Per-source deadlines for the stats endpoints; a late source is left out of the response
+STATS_SOURCE_DEADLINES = {"bandwidth": 2.0, "drives": 2.0, "libraries": 2.0, "cpu": 1.0, "ram": 1.0, "gpu": 2.5}
+BOOT_ID = f"{int(time.time()):x}"  # Keeps ETags from matching across restarts
 
 # Emby library database path (dynamic username)
 WINDOWS_USERNAME = os.getenv('USERNAME', 'fitb8')  # Fallback to fitb8 if USERNAME env var not set
@@ -112,14 +162,103 @@ DEFAULT_CONFIG = {
     },
     "batch": [],  # persisted ingest queue shared by web + mobile
     "emby_db_path": EMBY_DB_PATH,  # Path to Emby's library.db for auto-location lookup
-    "use_emby_lookup": True  # Enable automatic lookup from Emby database
+    "use_emby_lookup": True,  # Enable automatic lookup from Emby database
+    "transfer_max_age": TRANSFER_MAX_AGE,  # Freshness bound for the shared transfer snapshot
+    "copy_workers_per_volume": 1,  # Concurrent library copies per destination drive
+    "copy_volume_workers": {},  # Per-volume overrides, e.g. {"D:": 2}
+    "seed_after_copy": False,  # Keep seeding from temp after the library copy (hardlink on the same drive)
+    "seed_handoff": False,  # With seed_after_copy: repoint Tixati at the library copy and drop the temp one (Tixati's WebUI cannot yet)
+    "copy_chunk_mb": 8,  # Chunk size for streamed library copies (MB)
+    "copy_verify": "sample",  # Copy check before deleting temp: "size", "sample" (re-read blocks) or "full" (hash)
+    "copy_rate_limit_mb": 0,  # Global library copy cap (MB/s, 0 = unlimited)
+    "copy_volume_rate_limits_mb": {},  # Per-volume caps, e.g. {"K:": 80} or {"K:": {"read": 60, "write": 100}}
+    "copy_throttle_busy_kb": 1024,  # Tixati upload (KB/s) above which copies slow down (0 = never)
+    "copy_throttle_idle_kb": 128,  # Tixati upload (KB/s) below which copies ramp back up
+    "copy_busy_rate_mb": 20,  # Copy rate while Tixati is uploading hard (MB/s)
+    "copy_jobs": [],  # Persistent library copy queue (see /api/copy-jobs)
+    "placement_policy": "redirect",  # Target too full: "redirect" to the least-full library, "reject", or "off"
+    "placement_headroom_gb": 5,  # Space always left free on a library volume (GB)
+    "pending_deletions": [],  # Temp paths still being deleted in the background
+    "delete_ops_per_sec": 200,  # Unlink/rmdir budget for background temp deletion
+    "delete_batch_size": 64,  # Entries removed per batch between budget checks
+    "state_store": "sqlite"  # "sqlite" (collections as rows), "json" (this file) or "journal" (append-only log)
 }
 
+# Pooled keep-alive client shared by every Tixati call (timeouts + retries)
+tixati = TixatiClient(TIXATI_BASE)
+
+def intent_key(intent):
+    return intent.get('magnet') or intent.get('name_hint')
+
+
+# Secondary indexes of the in-memory collections (the primary key is the intent key or entry id)
+INTENT_INDEXES = {
+    "magnet": lambda intent: intent.get('magnet'),
+    "infohash": lambda intent: intent.get('infohash'),
+    "name_hint": lambda intent: intent.get('name_hint'),
+}
+BATCH_INDEXES = {"magnet": lambda item: item.get('magnet')}
+LIBRARY_INDEX_INDEXES = {"series_path": lambda entry: (entry.get('series'), entry.get('seriesPath'))}
+
+
+def entry_id(entry):
+    return entry.get('id')
+
+
+def deletion_path(item):
+    return item.get('path')
+
+
+def with_unique_ids(entries):
+    """Entries saved before ids had to be unique get id#2, id#3... on repeats (the store's row keys)"""
+    seen = {}
+    for entry in entries:
+        seen[entry.get('id')] = seen.get(entry.get('id'), 0) + 1
+        if seen[entry.get('id')] > 1:
+            entry['id'] = f"{entry.get('id')}#{seen[entry.get('id')]}"
+    return entries
+
+
 # --- SMART STORAGE ENGINE (with robust persistence) ---
 class SmartStorageManager:
+    # Kept in STATE_DB one row per entry when state_store is "sqlite"
+    STORE_COLLECTIONS = ('intents', 'batch', 'library_index', 'copy_jobs', 'pending_deletions')
+    # Saved as whole lists in CONFIG_FILE before they became collections; each is imported once (meta imported_<name>)
+    QUEUE_COLLECTIONS = ('copy_jobs', 'pending_deletions')
+    # Primary key of each unscoped collection's entries
+    COLLECTION_KEYS = {'intents': intent_key, 'batch': entry_id, 'copy_jobs': entry_id,
+                       'pending_deletions': deletion_path}
+
     def __init__(self):
-        self.config = self.load_config()
         self._save_lock = threading.Lock()
+        self._edit_lock = threading.Lock()  # One writer builds the next config version at a time
+        self.revision = 0  # Bumped on every save/reload; part of the config-backed ETags
+        self.store = None
+        self.journal = None
+        self._journaled = {}  # setting -> JSON last journaled or snapshotted (journal mode)
+        self._config_dirty = False  # CONFIG_FILE is behind self.config
+        self._writer = CoalescingWriter(self._write_pending, delay=CONFIG_SAVE_DELAY, name="Config")
+        self._config, save = self._open()
+        self._after_open(save)
+
+    @property
+    def config(self):
+        """The published config version: never changed in place, so it is read without locking"""
+        return self._config
+
+    def _open(self):
+        """Load CONFIG_FILE, its journal and the store into a new config version; (config, needs save)"""
+        config = self.load_config()
+        self._attach_journal(config)
+        save = self._attach_store(config)
+        self._index_collections(config)
+        return config, save
+
+    def _after_open(self, save):
+        if self.journal is not None:
+            self._compact()  # Start from a snapshot holding everything replayed (a torn tail is left behind)
+        if save:
+            self.save_config()
 
     def load_config(self):
         # Try loading from main config file first
@@ -167,8 +306,277 @@ class SmartStorageManager:
             data["emby_db_path"] = EMBY_DB_PATH
         if "use_emby_lookup" not in data:
             data["use_emby_lookup"] = True
+        if "transfer_max_age" not in data:
+            data["transfer_max_age"] = TRANSFER_MAX_AGE
+        if "copy_workers_per_volume" not in data:
+            data["copy_workers_per_volume"] = 1
+        if "copy_volume_workers" not in data:
+            data["copy_volume_workers"] = {}
+        if "seed_after_copy" not in data:
+            data["seed_after_copy"] = False
+        if "seed_handoff" not in data:
+            data["seed_handoff"] = False
+        if "copy_chunk_mb" not in data:
+            data["copy_chunk_mb"] = 8
+        if data.get("copy_verify") not in VERIFY_MODES:
+            data["copy_verify"] = VERIFY_SAMPLE
+        if "copy_rate_limit_mb" not in data:
+            data["copy_rate_limit_mb"] = 0
+        if "copy_volume_rate_limits_mb" not in data:
+            data["copy_volume_rate_limits_mb"] = {}
+        if "copy_throttle_busy_kb" not in data:
+            data["copy_throttle_busy_kb"] = 1024
+        if "copy_throttle_idle_kb" not in data:
+            data["copy_throttle_idle_kb"] = 128
+        if "copy_busy_rate_mb" not in data:
+            data["copy_busy_rate_mb"] = 20
+        if "copy_jobs" not in data:
+            data["copy_jobs"] = []
+        if data.get("placement_policy") not in PLACEMENT_POLICIES:
+            data["placement_policy"] = "redirect"
+        if "placement_headroom_gb" not in data:
+            data["placement_headroom_gb"] = 5
+        if "pending_deletions" not in data:
+            data["pending_deletions"] = []
+        if "delete_ops_per_sec" not in data:
+            data["delete_ops_per_sec"] = 200
+        if "delete_batch_size" not in data:
+            data["delete_batch_size"] = 64
+        if data.get("state_store") not in STATE_STORES:
+            data["state_store"] = "sqlite"
         return data
     
+    def _attach_store(self, config):
+        """Serve the collections from STATE_DB in sqlite mode (importing the JSON copy once);
+        in json mode, take back rows left in STATE_DB by an earlier sqlite run. True if the
+        config file needs saving."""
+        if config.get('state_store') != 'sqlite':
+            if self.store is None and os.path.exists(STATE_DB):
+                store = StateStore(STATE_DB)
+                try:
+                    if store.get_meta('imported_json'):
+                        self._load_collections(store, config, skip=[name for name in self.QUEUE_COLLECTIONS
+                                                                    if not store.get_meta(f'imported_{name}')])
+                        # The rows must be in CONFIG_FILE before STATE_DB stops being read
+                        self._write_snapshot(config)
+                        store.queue_meta('imported_json', '')
+                        for name in self.QUEUE_COLLECTIONS:
+                            store.queue_meta(f'imported_{name}', '')
+                        store.commit()
+                        print(f"[Config] Moved intents, batch and library index back from {STATE_DB}")
+                finally:
+                    store.close()
+            return False
+        if self.store is None:
+            self.store = StateStore(STATE_DB)
+        # Imported rows and the meta flags saying so are committed in one transaction
+        if not self.store.get_meta('imported_json'):
+            self._import_collections(config)
+            self.store.queue_meta('imported_json', str(int(time.time())))
+            for name in self.QUEUE_COLLECTIONS:
+                self.store.queue_meta(f'imported_{name}', '1')
+            self.store.queue_meta('unique_keys', '1')
+            self.store.commit()
+            print(f"[Config] Imported intents, batch and library index into {STATE_DB}")
+            self._load_collections(self.store, config)
+            return True  # CONFIG_FILE keeps only the settings from now on
+        save = False
+        for name in self.QUEUE_COLLECTIONS:
+            if not self.store.get_meta(f'imported_{name}'):
+                # A setting in CONFIG_FILE until it became rows
+                self._import_collections({name: config.get(name) or []})
+                self.store.queue_meta(f'imported_{name}', '1')
+                self.store.commit()
+                print(f"[Config] Imported {name} into {STATE_DB}")
+                save = True
+        self._load_collections(self.store, config)
+        if not self.store.get_meta('unique_keys'):
+            # Earlier versions stored repeated keys as key#2, key#3...; store them under the keys memory uses
+            self._import_collections(config)
+            self.store.queue_meta('unique_keys', '1')
+            self.store.commit()
+        return save
+
+    def _attach_journal(self, config):
+        """Replay journal records newer than the snapshot; in journal mode keep journaling
+        (from a snapshot compacted once the config is open), otherwise fold them into CONFIG_FILE"""
+        replayed = 0
+        if os.path.exists(CONFIG_JOURNAL):
+            replayed, last_seq = mutation_journal.replay(CONFIG_JOURNAL, config, self._entry_key,
+                                                         after_seq=config.get('journal_seq', 0))
+            config['journal_seq'] = last_seq
+            if replayed:
+                print(f"[Config] Replayed {replayed} journal records from {CONFIG_JOURNAL}")
+        if config.get('state_store') == 'journal':
+            self.journal = mutation_journal.MutationJournal(CONFIG_JOURNAL, seq=config.get('journal_seq', 0))
+        elif os.path.exists(CONFIG_JOURNAL):
+            if replayed:
+                self._write_snapshot(config)
+            os.remove(CONFIG_JOURNAL)
+
+    def _entry_key(self, collection, entry):
+        return self.COLLECTION_KEYS.get(collection, entry_id)(entry) or ''
+
+    def _encoded_settings(self, config):
+        """setting -> (value, its JSON) for everything but the collections"""
+        return {key: (value, json.dumps(value, sort_keys=True, ensure_ascii=False))
+                for key, value in config.items() if key not in self.STORE_COLLECTIONS}
+
+    def _settings_changes(self, config):
+        """Settings whose JSON differs from what was last journaled"""
+        return {key: (value, encoded) for key, (value, encoded) in self._encoded_settings(config).items()
+                if self._journaled.get(key) != encoded}
+
+    def _compact(self):
+        """Fold the journal into a new snapshot and empty it"""
+        with self._edit_lock:
+            # No edit is half-journaled here, so the version published with seq holds exactly its records
+            seq = self.journal.commit()
+            config = self._config = {**self._config, 'journal_seq': seq}
+        self._write_snapshot(config)
+        # Records appended since seq (by edits running meanwhile) are not in the snapshot and stay
+        self.journal.truncate(seq)
+        self._journaled = {key: encoded for key, (_, encoded) in self._encoded_settings(config).items()}
+        print(f"[Config] Journal compacted into {CONFIG_FILE} at seq {seq}")
+
+    def _index_collections(self, config):
+        """Back intents, batch, the copy and deletion queues and each library index category with
+        keyed collections"""
+        config['intents'] = KeyedCollection(intent_key, INTENT_INDEXES, config.get('intents') or [])
+        config['batch'] = KeyedCollection(entry_id, BATCH_INDEXES, with_unique_ids(config.get('batch') or []))
+        config['copy_jobs'] = KeyedCollection(entry_id, entries=config.get('copy_jobs') or [])
+        config['pending_deletions'] = KeyedCollection(deletion_path, entries=config.get('pending_deletions') or [])
+        config['library_index'] = {
+            category: KeyedCollection(entry_id, LIBRARY_INDEX_INDEXES, with_unique_ids(entries))
+            for category, entries in {"show": [], **(config.get('library_index') or {})}.items()
+        }
+
+    @staticmethod
+    def _new_library_index():
+        return KeyedCollection(entry_id, LIBRARY_INDEX_INDEXES)
+
+    def _library_index(self, category):
+        """One category of the published library index (empty if it has none)"""
+        index = (self._config.get('library_index') or {}).get(category)
+        return index if index is not None else self._new_library_index()
+
+    @contextmanager
+    def _edit(self):
+        """Build the next config version from a draft; it is published when the block ends
+
+        The records the block leaves on the draft are queued (store rows, journal
+        lines) as the version is published, so they land in publish order; a
+        block that raises publishes and queues nothing. The save is signalled
+        once the version is published, so the writer never snapshots an older one.
+        """
+        with self._edit_lock:
+            draft = ConfigDraft(self._config)
+            yield draft
+            if not (draft.settings_changed or draft.entries_changed):
+                return
+            self._persist_records(draft.records)
+            self._config = draft.data
+        if draft.settings_changed or (self.store is None and self.journal is None):
+            self.save_config()
+        else:
+            self._touch()
+
+    def _plain_config(self, collections=True, config=None):
+        """A config version (the published one by default) as plain JSON data (collections as lists,
+        or left out)"""
+        config = self._config if config is None else config
+        data = {key: value for key, value in config.items() if key not in self.STORE_COLLECTIONS}
+        if collections:
+            for name in self.COLLECTION_KEYS:
+                data[name] = list(config.get(name) or [])
+            data['library_index'] = {category: list(entries)
+                                     for category, entries in (config.get('library_index') or {}).items()}
+        return data
+
+    def _load_collections(self, store, config, skip=()):
+        for name in self.COLLECTION_KEYS:
+            if name not in skip:
+                config[name] = store.entries(name).get('', [])
+        config['library_index'] = {"show": [], **store.entries('library_index')}
+
+    def _import_collections(self, data):
+        """Write the collections found in a JSON config into the store, keyed as in memory
+        (repeated batch and library index ids renumbered, other repeated keys collapsed)"""
+        for collection in self.COLLECTION_KEYS:
+            if collection in data:
+                entries = list(data[collection])
+                if collection == 'batch':
+                    entries = with_unique_ids(entries)
+                self.store.replace(collection, entries, [self._entry_key(collection, e) for e in entries])
+        for category, entries in (data.get('library_index') or {}).items():
+            entries = with_unique_ids(list(entries))
+            self.store.replace('library_index', entries, [e.get('id') or '' for e in entries], scope=category)
+
+    def export_config(self):
+        """The full config, collections included, in the magnetnode_config.json format"""
+        return self._plain_config()
+
+    def import_config(self, data):
+        """Replace intents, batch and library index with those in an exported config"""
+        imported = {}
+        with self._edit() as draft:
+            for collection in ('intents', 'batch'):
+                if isinstance(data.get(collection), list):
+                    entries = draft.collection(collection)
+                    entries.replace(data[collection])
+                    imported[collection] = entries.to_list()
+            if isinstance(data.get('library_index'), dict):
+                imported['library_index'] = {}
+                for category, entries in data['library_index'].items():
+                    index = draft.collection('library_index', category, self._new_library_index)
+                    index.replace(entries)
+                    imported['library_index'][category] = index.to_list()
+            # Persist what the collections kept (a repeated key is collapsed, as in the store)
+            for collection in ('intents', 'batch'):
+                if collection in imported:
+                    self._save_collection(draft, collection, imported[collection])
+            for category, entries in imported.get('library_index', {}).items():
+                self._save_collection(draft, 'library_index', entries, scope=category)
+        return {name: (sum(len(v) for v in value.values()) if isinstance(value, dict) else len(value))
+                for name, value in imported.items()}
+
+    def _touch(self):
+        """Store rows changed: bump the revision and have the writer commit them"""
+        with self._save_lock:
+            self.revision += 1
+        self._writer.mark_dirty()
+
+    # The helpers below record a change on an edit's draft; it is persisted only if the edit is published
+    def _save_entry(self, draft, collection, key, entry, scope=''):
+        """Persist one added or changed entry"""
+        draft.records.append({"op": "put", "c": collection, "s": scope, "k": key, "v": entry})
+
+    def _delete_entries(self, draft, collection, keys, scope=''):
+        draft.records.append({"op": "del", "c": collection, "s": scope, "k": list(keys)})
+
+    def _save_collection(self, draft, collection, entries, scope=''):
+        """Persist a replaced collection (one scope of it for the library index)"""
+        draft.records.append({"op": "replace", "c": collection, "s": scope, "v": entries})
+
+    def _persist_records(self, records):
+        """Queue a published edit's records as store rows or journal lines (json mode saves the whole file)"""
+        for record in records:
+            if self.store is not None:
+                collection, scope = record['c'], record['s']
+                if record['op'] == 'put':
+                    self.store.put(collection, record['k'], record['v'], scope)
+                elif record['op'] == 'del':
+                    self.store.delete(collection, record['k'], scope)
+                else:
+                    self.store.replace(collection, record['v'],
+                                       [self._entry_key(collection, e) for e in record['v']], scope)
+            elif self.journal is not None:
+                self.journal.append(record)
+
+    def _persisted_config(self, config):
+        """What goes into CONFIG_FILE: everything but the collections the store holds"""
+        return self._plain_config(collections=self.store is None, config=config)
+
     def _write_config_file(self, filepath, data):
         """Safely write config to file with atomic write"""
         temp_file = filepath + '.tmp'
@@ -192,97 +600,247 @@ class SmartStorageManager:
             return False
 
     def save_config(self):
-        """Save config with backup and thread safety"""
+        """Mark the config changed; changes within CONFIG_SAVE_DELAY are saved in one write"""
         with self._save_lock:
-            # Create backup of current config before saving
-            if os.path.exists(CONFIG_FILE):
-                try:
-                    shutil.copy2(CONFIG_FILE, CONFIG_BACKUP)
-                except Exception as e:
-                    print(f"[Config] Backup failed: {e}")
-            
-            # Write new config
-            if self._write_config_file(CONFIG_FILE, self.config):
-                print(f"[Config] Saved to {CONFIG_FILE}")
-            else:
-                print("[Config] Save failed!")
-    
+            self.revision += 1
+            self._config_dirty = True
+        self._writer.mark_dirty()
+
+    def flush(self):
+        """Write every pending change now (shutdown, tests, before reloading)"""
+        return self._writer.flush()
+
+    def _write_pending(self):
+        """One group commit: queued store rows in one transaction (or journal records in one
+        append), then one backup + file write"""
+        if self.store is not None:
+            self.store.commit()
+        with self._save_lock:
+            dirty, self._config_dirty = self._config_dirty, False
+        if self.journal is not None:
+            self._commit_journal(dirty)
+        elif dirty:
+            self._write_snapshot(self._config)
+
+    def _commit_journal(self, settings_dirty):
+        try:
+            if settings_dirty:
+                for key, (value, encoded) in self._settings_changes(self._config).items():
+                    self.journal.append({"op": "set", "k": key, "v": value})
+                    self._journaled[key] = encoded
+            self.journal.commit()
+            if self.journal.size() >= JOURNAL_COMPACT_BYTES or (
+                    self.journal.size() and time.time() - self.journal.compacted_at >= JOURNAL_COMPACT_INTERVAL):
+                self._compact()
+        except Exception:
+            with self._save_lock:
+                self._config_dirty = self._config_dirty or settings_dirty
+            raise
+
+    def _write_snapshot(self, config):
+        """Write one config version (a stable snapshot, whatever is published meanwhile) to CONFIG_FILE"""
+        # Create backup of current config before saving
+        if os.path.exists(CONFIG_FILE):
+            try:
+                shutil.copy2(CONFIG_FILE, CONFIG_BACKUP)
+            except Exception as e:
+                print(f"[Config] Backup failed: {e}")
+
+        # Write new config
+        if self._write_config_file(CONFIG_FILE, self._persisted_config(config)):
+            print(f"[Config] Saved to {CONFIG_FILE}")
+        else:
+            with self._save_lock:
+                self._config_dirty = True
+            raise RuntimeError(f"Could not write {CONFIG_FILE}")
+
     def force_reload(self):
         """Force reload config from disk"""
-        self.config = self.load_config()
-        return self.config
+        self.flush()
+        with self._edit_lock:
+            self.journal = None
+            self._config, save = self._open()
+        self._after_open(save)
+        with self._save_lock:
+            self.revision += 1
+        return self._config
 
-    def add_intent(self, magnet, name_hint, target_path, category):
-        """Add a pending copy intent for a completed torrent"""
+    def add_intent(self, magnet, name_hint, target_path, category, size=0):
+        """Add a pending copy intent for a completed torrent (size in bytes, 0 if unknown)"""
         if not target_path:
             return
         entry = {
             "magnet": magnet,
+            "infohash": magnet_infohash(magnet),
             "name_hint": name_hint,
             "target_path": target_path,
             "category": category,
+            "size": size,
         }
-        self.config.setdefault('intents', [])
-        self.config['intents'] = [i for i in self.config['intents'] if i.get('magnet') != magnet]
-        self.config['intents'].append(entry)
-        self.save_config()
-
-    def pop_intent_by_name(self, name):
-        """Remove intent after successful copy"""
-        intents = self.config.get('intents', [])
-        for idx, intent in enumerate(intents):
-            if intent.get('name_hint') == name:
-                removed = self.config['intents'].pop(idx)
-                self.save_config()
-                return removed
-        return None
+        with self._edit() as draft:
+            intents = draft.collection('intents')
+            replaced = intents.find('magnet', magnet)
+            for old in replaced:
+                intents.remove(intent_key(old))
+            intents.append(entry)
+            if replaced:
+                # The new entry goes to the end, like the list
+                self._delete_entries(draft, 'intents', [intent_key(i) for i in replaced])
+            self._save_entry(draft, 'intents', intent_key(entry), entry)
+
+    def _update_intent(self, intent, fields, drop=()):
+        """Publish a copy of an intent with fields changed; returns the new entry (None if it is gone)
+
+        Published entries are never changed in place, so callers holding the
+        old one must carry on with the entry returned here.
+        """
+        key = intent_key(intent)
+        with self._edit() as draft:
+            current = draft.get('intents').get(key)
+            if current is None:
+                return None
+            updated = {name: value for name, value in current.items() if name not in drop}
+            updated.update(fields)
+            draft.collection('intents').put(updated)
+            self._save_entry(draft, 'intents', key, updated)
+        return updated
+
+    def get_intent(self, key):
+        return self._config['intents'].get(key)
+
+    def bind_intent_transfer(self, intent, transfer_id):
+        """Persist which Tixati transfer (checkbox id) an intent resolved to; returns the intent"""
+        if not transfer_id or intent.get('transfer_id') == transfer_id:
+            return intent
+        return self._update_intent(intent, {'transfer_id': transfer_id})
+
+    def set_intent_size(self, intent, size):
+        """Record the download size (reserved on the target volume until the copy lands)"""
+        if not size or intent.get('size') == size:
+            return intent
+        return self._update_intent(intent, {'size': size})
+
+    def set_intent_target(self, intent, target_path):
+        return self._update_intent(intent, {'target_path': target_path})
+
+    def _put_entry(self, collection, entry):
+        with self._edit() as draft:
+            draft.collection(collection).put(entry)
+            self._save_entry(draft, collection, self._entry_key(collection, entry), entry)
+
+    def _remove_entries(self, collection, keys):
+        with self._edit() as draft:
+            keys = [key for key in keys if key in draft.get(collection)]
+            if not keys:
+                return
+            entries = draft.collection(collection)
+            for key in keys:
+                entries.remove(key)
+            self._delete_entries(draft, collection, keys)
+
+    def save_copy_job(self, job):
+        """Persist one copy job (a row or journal record, not the whole queue)"""
+        self._put_entry('copy_jobs', job)
+
+    def remove_copy_jobs(self, job_ids):
+        self._remove_entries('copy_jobs', job_ids)
+
+    def save_pending_deletion(self, item):
+        """Persist one entry of the background temp deletion queue"""
+        self._put_entry('pending_deletions', item)
+
+    def remove_pending_deletions(self, paths):
+        self._remove_entries('pending_deletions', paths)
+
+    def set_intent_copy_dest(self, intent, dest):
+        """Pin the library destination so a restarted copy resumes into the same folder"""
+        if intent.get('copy_dest') == dest:
+            return intent
+        return self._update_intent(intent, {'copy_dest': dest})
+
+    def mark_intent_copied(self, intent, dest, strategy, verification=None, handoff=None):
+        """Record that an intent's data is in the library while Tixati still seeds from temp
+        (handoff is HANDOFF_PENDING when Tixati is to be moved over to the library copy)"""
+        return self._update_intent(intent, {
+            'copied_to': dest,
+            'copy_strategy': strategy,
+            'handoff': handoff,
+            'handed_off': False,
+            'copy_verify': verification,
+        }, drop=('copy_error',))
+
+    def set_intent_handoff(self, intent, state):
+        """Record how far the seeding handoff to the library copy got"""
+        return self._update_intent(intent, {'handoff': state, 'handed_off': state == HANDOFF_DONE})
+
+    def record_copy_failure(self, intent, error, verification=None):
+        """Keep the reason a copy job failed on its intent (the intent stays for a retry)"""
+        return self._update_intent(intent, {'copy_error': error, 'copy_verify': verification})
+
+    def pop_intent(self, key):
+        """Remove an intent by its key (after a successful copy or cleanup)"""
+        with self._edit() as draft:
+            if key not in draft.get('intents'):
+                return None
+            removed = draft.collection('intents').remove(key)
+            self._delete_entries(draft, 'intents', [key])
+        return removed
 
     # --- Batch persistence ---
     def get_batch(self):
-        self.config.setdefault('batch', [])
-        return self.config['batch']
+        """The batch queue as the list the API returns"""
+        return self._config['batch'].to_list()
 
     def set_batch(self, batch_items):
-        self.config['batch'] = batch_items
-        self.save_config()
+        with self._edit() as draft:
+            batch = draft.collection('batch')
+            batch.replace(batch_items)
+            self._save_collection(draft, 'batch', batch.to_list())
 
     def add_batch_item(self, magnet, category, download_location, metadata=None):
-        item = {
-            "id": str(int(time.time() * 1000)),
-            "magnet": magnet,
-            "category": category,
-            "downloadLocation": download_location,
-            "createdAt": int(time.time()),
-            "metadata": metadata or {}  # Store torrent metadata (series, season, etc)
-        }
-        batch = self.get_batch()
-        # Drop any existing item with same magnet to avoid duplicates
-        batch = [b for b in batch if b.get('magnet') != magnet]
-        batch.append(item)
-        self.set_batch(batch)
+        with self._edit() as draft:
+            batch = draft.collection('batch')
+            item_id = int(time.time() * 1000)
+            while str(item_id) in batch:
+                item_id += 1
+            item = {
+                "id": str(item_id),
+                "magnet": magnet,
+                "category": category,
+                "downloadLocation": download_location,
+                "createdAt": int(time.time()),
+                "metadata": metadata or {}  # Store torrent metadata (series, season, etc)
+            }
+            # Drop any existing item with same magnet to avoid duplicates
+            replaced = [b.get('id') for b in batch.find('magnet', magnet)]
+            for old_id in replaced:
+                batch.remove(old_id)
+            batch.append(item)
+            if replaced:
+                self._delete_entries(draft, 'batch', replaced)
+            self._save_entry(draft, 'batch', item['id'], item)
         return item
 
     def update_batch_item(self, item_id, updates):
-        batch = self.get_batch()
-        updated = None
-        for item in batch:
-            if item.get('id') == item_id:
-                for key in ['magnet', 'category', 'downloadLocation', 'metadata']:
-                    if key in updates and updates[key] is not None:
-                        item[key] = updates[key]
-                updated = item
-                break
-        if updated is not None:
-            self.set_batch(batch)
-        return updated
+        with self._edit() as draft:
+            item = draft.get('batch').get(item_id)
+            if item is None:
+                return None
+            item = dict(item)
+            for key in ['magnet', 'category', 'downloadLocation', 'metadata']:
+                if key in updates and updates[key] is not None:
+                    item[key] = updates[key]
+            draft.collection('batch').put(item)  # refiled under a changed magnet
+            self._save_entry(draft, 'batch', item_id, item)
+        return item
 
     def delete_batch_item(self, item_id):
-        batch = self.get_batch()
-        new_batch = [b for b in batch if b.get('id') != item_id]
-        changed = len(new_batch) != len(batch)
-        if changed:
-            self.set_batch(new_batch)
-        return changed
+        with self._edit() as draft:
+            if item_id not in draft.get('batch'):
+                return False
+            draft.collection('batch').remove(item_id)
+            self._delete_entries(draft, 'batch', [item_id])
+        return True
 
     def add_path(self, category, path, label=None):
         if not path:
@@ -296,18 +854,21 @@ class SmartStorageManager:
             except Exception as e:
                 return False, f"Could not create folder: {str(e)}"
         entry = { "id": str(int(time.time()*1000)), "path": os.path.abspath(path), "label": label }
-        self.config['libraries'][category].append(entry)
-        self.save_config()
+        with self._edit() as draft:
+            libraries = draft.get('libraries')
+            draft.set('libraries', {**libraries, category: libraries[category] + [entry]})
         return True, "Added successfully"
 
     def remove_path(self, category, lib_id):
-        self.config['libraries'][category] = [x for x in self.config['libraries'][category] if x['id'] != lib_id]
-        self.save_config()
+        with self._edit() as draft:
+            libraries = draft.get('libraries')
+            draft.set('libraries', {**libraries, category: [x for x in libraries[category] if x['id'] != lib_id]})
 
     def get_library_stats(self):
+        libraries = self._config['libraries']
         stats = {"movie": [], "show": []}
         for cat in ["movie", "show"]:
-            for lib in self.config['libraries'][cat]:
+            for lib in libraries[cat]:
                 entry = {
                     "id": lib['id'],
                     "label": lib['label'],
@@ -317,7 +878,7 @@ class SmartStorageManager:
                 }
                 try:
                     if os.path.exists(lib['path']) and os.access(lib['path'], os.R_OK):
-                        usage = psutil.disk_usage(lib['path'])
+                        usage = disk_usage_cache.get(lib['path'])
                         entry["availableSpace"] = round(usage.free / (1024**3), 2)
                         entry["totalSpace"] = round(usage.total / (1024**3), 2)
                 except Exception as e:
@@ -326,61 +887,71 @@ class SmartStorageManager:
         return stats
 
     def get_library_index(self, category="show"):
-        self.config.setdefault("library_index", {}).setdefault(category, [])
-        return self.config["library_index"].get(category, [])
+        """One category of the library index as the list the API returns"""
+        return self._library_index(category).to_list()
 
     def set_library_index(self, category, entries):
-        self.config.setdefault("library_index", {})[category] = entries
-        self.save_config()
+        with self._edit() as draft:
+            index = draft.collection('library_index', category, self._new_library_index)
+            index.replace(entries)
+            self._save_collection(draft, 'library_index', index.to_list(), scope=category)
 
     def add_library_index_entry(self, category, series, series_path, season_paths, library_id=None):
-        entry = {
-            "id": f"idx-{int(time.time()*1000)}",
-            "series": series,
-            "libraryId": library_id,
-            "seriesPath": series_path,
-            "seasonPaths": season_paths,
-            "lastSeen": int(time.time())
-        }
-        idx = self.get_library_index(category)
-        # Remove duplicates on the same series + path
-        idx = [e for e in idx if not (e.get("series") == series and e.get("seriesPath") == series_path)]
-        idx.append(entry)
-        self.set_library_index(category, idx)
+        with self._edit() as draft:
+            idx = draft.collection('library_index', category, self._new_library_index)
+            stamp = int(time.time() * 1000)
+            while f"idx-{stamp}" in idx:
+                stamp += 1
+            entry = {
+                "id": f"idx-{stamp}",
+                "series": series,
+                "libraryId": library_id,
+                "seriesPath": series_path,
+                "seasonPaths": season_paths,
+                "lastSeen": int(time.time())
+            }
+            # Remove duplicates on the same series + path
+            replaced = [e.get('id') for e in idx.find('series_path', (series, series_path))]
+            for old_id in replaced:
+                idx.remove(old_id)
+            idx.append(entry)
+            if replaced:
+                self._delete_entries(draft, 'library_index', replaced, scope=category)
+            self._save_entry(draft, 'library_index', entry['id'], entry, scope=category)
         return entry
 
     def update_library_index_entry(self, category, entry_id, updates):
-        idx = self.get_library_index(category)
-        changed = False
-        for item in idx:
-            if item.get('id') == entry_id:
-                for key in ["series", "seriesPath", "seasonPaths", "libraryId"]:
-                    if key in updates:
-                        item[key] = updates[key]
-                        changed = True
-                item["lastSeen"] = int(time.time())
-                break
-        if changed:
-            self.set_library_index(category, idx)
-        return changed
+        with self._edit() as draft:
+            item = self._library_index(category).get(entry_id)
+            changes = {key: updates[key] for key in ["series", "seriesPath", "seasonPaths", "libraryId"]
+                       if key in updates}
+            if item is None or not changes:
+                return False
+            item = {**item, **changes, "lastSeen": int(time.time())}
+            # put() refiles it under a changed series/path
+            draft.collection('library_index', category, self._new_library_index).put(item)
+            self._save_entry(draft, 'library_index', entry_id, item, scope=category)
+        return True
 
     def delete_library_index_entry(self, category, entry_id):
-        idx = self.get_library_index(category)
-        new_idx = [i for i in idx if i.get('id') != entry_id]
-        if len(new_idx) != len(idx):
-            self.set_library_index(category, new_idx)
-            return True
-        return False
+        with self._edit() as draft:
+            if entry_id not in self._library_index(category):
+                return False
+            draft.collection('library_index', category, self._new_library_index).remove(entry_id)
+            self._delete_entries(draft, 'library_index', [entry_id], scope=category)
+        return True
 
     def build_tv_index(self):
         index = []
-        for lib in self.config['libraries'].get('show', []):
+        for lib in self._config['libraries'].get('show', []):
             index.extend(scan_tv_library(lib))
-        self.set_library_index('show', index)
+        if index != self.get_library_index('show'):
+            self.set_library_index('show', index)
         return index
 
 
 storage_mgr = SmartStorageManager()
+atexit.register(storage_mgr.flush)  # Nothing changed in the last save window is lost on exit
 auto_init_libraries(storage_mgr)
 
 # Initialize Emby database connection
@@ -409,23 +980,6 @@ def normalize_category(raw):
     return 'tv' if cat in ['tv', 'show', 'series'] else 'movie'
 
 
-def clean_torrent_name(raw_name):
-    """Clean torrent name by removing common prefixes and normalizing whitespace"""
-    if not raw_name:
-        return raw_name
-    
-    # Remove common prefixes
-    name = raw_name.strip()
-    # Remove www.UIndex.org and similar prefixes with whitespace
-    name = re.sub(r'^\s*www\.uindex\.org\s*', '', name, flags=re.IGNORECASE)
-    # Remove other common tracker prefixes
-    name = re.sub(r'^\s*\[.*?\]\s*', '', name)  # Remove [tracker] tags
-    name = re.sub(r'^\s*\{.*?\}\s*', '', name)  # Remove {tracker} tags
-    # Normalize whitespace
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
-
-
 def match_torrent_name(name_hint, actual_name):
     """Check if actual torrent name matches name_hint with some tolerance
     
@@ -435,9 +989,9 @@ def match_torrent_name(name_hint, actual_name):
     - 1: actual is substring of name_hint (ignoring case)
     - 0: no match
     """
-    # Clean both names
-    clean_hint = clean_torrent_name(name_hint).lower()
-    clean_actual = clean_torrent_name(actual_name).lower()
+    # Clean both names (cached)
+    clean_hint = normalize_name(name_hint)
+    clean_actual = normalize_name(actual_name)
     
     if not clean_hint or not clean_actual:
         return 0, clean_actual
@@ -468,9 +1022,17 @@ def send_magnet_to_tixati(magnet, target_path, category):
     if not magnet or not magnet.startswith('magnet:'):
         return False, "Invalid magnet link"
     
+    # Make sure the download fits where it is going before Tixati fetches anything
+    size = magnet_size(magnet)
+    placement_note = ""
+    if target_path and size:
+        target_path, placement_note, error = place_target(target_path, size, category)
+        if error:
+            return False, error
+
     try:
         # Add magnet to Tixati - it will download to default/temp location
-        resp = requests.post(f"{TIXATI_BASE}/transfers/action", data={
+        resp = tixati.transfer_action({
             'addlink': 'Add',
             'addlinktext': magnet
         })
@@ -483,9 +1045,9 @@ def send_magnet_to_tixati(magnet, target_path, category):
         clean_name = clean_torrent_name(name_hint)
         
         if target_path and clean_name:
-            storage_mgr.add_intent(magnet, clean_name, target_path, category)
+            storage_mgr.add_intent(magnet, clean_name, target_path, category, size)
             print(f"[Magnet] Added: {clean_name} -> {target_path}")
-            return True, f"Magnet added, will copy to {target_path} when complete"
+            return True, f"Magnet added, will copy to {target_path} when complete{placement_note}"
         
         return True, "Magnet added to Tixati"
         
@@ -493,6 +1055,71 @@ def send_magnet_to_tixati(magnet, target_path, category):
         return False, f"Tixati error: {str(e)}"
 
 
+def magnet_size(magnet):
+    """Exact length in bytes from a magnet's xl parameter, 0 if absent"""
+    try:
+        return int(parse_qs(urlparse(magnet).query).get('xl', ['0'])[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def category_libraries(category):
+    return storage_mgr.config.get('libraries', {}).get('show' if category in ('tv', 'show') else 'movie', [])
+
+
+def redirect_target(target_path, library, category):
+    """target_path moved under another library root, keeping any series/season subfolders"""
+    for lib in category_libraries(category):
+        root = lib['path']
+        try:
+            inside = os.path.commonpath([os.path.abspath(target_path), root]) == root
+        except ValueError:
+            inside = False  # different drives
+        if inside:
+            return os.path.join(library['path'], os.path.relpath(target_path, root))
+    return library['path']
+
+
+def place_target(target_path, size, category, key=None):
+    """Check that size bytes fit on target_path's volume
+
+    Returns (target_path, note, error): the target to use (redirected to the
+    least-full library of the category if needed and allowed), a note for the
+    user when it was redirected, and an error message when it was rejected.
+    """
+    policy = storage_mgr.config.get('placement_policy', 'redirect')
+    if policy == 'off':
+        return target_path, "", None
+    try:
+        check = placement.check(target_path, size, category_libraries(category), key)
+    except OSError as e:
+        print(f"[Placement] Could not read free space for {target_path}: {e}")
+        return target_path, "", None
+    if check.fits:
+        return target_path, "", None
+    shortfall = (f"needs {check.needed / 1024**3:.2f} GB, "
+                 f"{max(check.available, 0) / 1024**3:.2f} GB available on {target_path}")
+    suggestion = check.suggestion
+    if policy == 'redirect' and suggestion:
+        redirected = redirect_target(target_path, suggestion, category)
+        print(f"[Placement] {shortfall}; redirecting to {redirected}")
+        return redirected, f" (redirected: {shortfall})", None
+    hint = f"; least-full {category} library with room: {suggestion['path']}" if suggestion else ""
+    return target_path, "", f"Not enough space: {shortfall}{hint}"
+
+
+def intent_reservations():
+    """(intent key, target, bytes still to land) for every intent not yet in its library"""
+    for intent in list(storage_mgr.config.get('intents', [])):
+        size = intent.get('size') or 0
+        if not size or intent.get('copied_to') or not intent.get('target_path'):
+            continue
+        progress = copy_progress.get(intent.get('transfer_id') or intent_key(intent))
+        if progress is not None and not progress.finished_at:
+            size -= progress.bytes_done  # already written, so already out of the free space
+        yield intent_key(intent), intent.get('copy_dest') or intent['target_path'], size
+
+
 def magnet_display_name(magnet):
     try:
         qs = parse_qs(urlparse(magnet).query)
@@ -504,6 +1131,22 @@ def magnet_display_name(magnet):
     return None
 
 
+def magnet_infohash(magnet):
+    """Lower-case hex BitTorrent info-hash from a magnet's xt=urn:btih: field, or None"""
+    try:
+        for xt in parse_qs(urlparse(magnet).query).get('xt', []):
+            if not xt.lower().startswith('urn:btih:'):
+                continue
+            value = xt[9:].strip()
+            if len(value) == 40 and re.fullmatch(r'[0-9a-fA-F]{40}', value):
+                return value.lower()
+            if len(value) == 32:
+                return base64.b32decode(value.upper()).hex()
+    except (ValueError, binascii.Error):
+        return None
+    return None
+
+
 def normalize_series_name(raw_name: str) -> str:
     name = raw_name.replace('.', ' ').replace('_', ' ')
     name = re.sub(r'\s+', ' ', name).strip()
@@ -525,6 +1168,7 @@ def parse_season_number(name: str):
 
 def scan_tv_library(lib_entry):
     results = []
+    seen_ids = {}
     lib_path = lib_entry.get('path')
     if not lib_path or not os.path.exists(lib_path):
         return results
@@ -555,8 +1199,13 @@ def scan_tv_library(lib_entry):
                     series_name = normalize_series_name(cleaned)
                     season_paths.append({"season": season_num, "path": entry.path})
 
+            index_id = f"{series_name.lower()}::{lib_entry.get('id', 'unknown')}"
+            seen_ids[index_id] = seen_ids.get(index_id, 0) + 1
+            if seen_ids[index_id] > 1:
+                # Index entries are keyed by id; a second folder with the same series name gets its own
+                index_id = f"{index_id}#{seen_ids[index_id]}"
             result = {
-                "id": f"{series_name.lower()}::{lib_entry.get('id', 'unknown')}",
+                "id": index_id,
                 "series": series_name,
                 "libraryId": lib_entry.get('id'),
                 "seriesPath": entry.path,
@@ -570,26 +1219,13 @@ def scan_tv_library(lib_entry):
 
 
 def update_torrent_save_path(torrent_name, new_save_path, checkbox_name=None):
-    """Update the save path (seeding location) for a torrent in Tixati"""
-    try:
-        # Construct the POST data to update save path
-        # This will try to navigate to the transfer details page and update the save path
-        post_data = {
-            'save_path': new_save_path,
-        }
-        if checkbox_name:
-            post_data[checkbox_name] = 'on'
-        
-        resp = requests.post(f"{TIXATI_BASE}/transfers/action", data=post_data, timeout=5)
-        if resp.status_code == 200:
-            print(f"[UpdateSavePath] Updated save path for {torrent_name} to {new_save_path}")
-            return True
-        else:
-            print(f"[UpdateSavePath] Failed to update (HTTP {resp.status_code}): {torrent_name}")
-            return False
-    except Exception as e:
-        print(f"[UpdateSavePath] Error updating save path for {torrent_name}: {e}")
-        return False
+    """Point a torrent in Tixati at a new save path (seeding location)
+
+    Tixati's WebUI has no action for this: a transfer's form only offers start,
+    stop and checkfiles, so nothing is posted and this always returns False.
+    """
+    print(f"[UpdateSavePath] Tixati's WebUI cannot move {torrent_name} to {new_save_path}")
+    return False
 
 
 def check_path_writable(path):
@@ -606,178 +1242,775 @@ def check_path_writable(path):
         return False, str(e)
 
 
-def copy_worker():
-    """Monitor temp folder for completed torrents and copy them to final location
-    
+def fetch_transfer_rows():
+    """Fetch and parse the Tixati transfers page"""
+    resp = tixati.transfers_page()
+    return parse_transfer_rows(resp.text)
+
+
+# Background poll delay follows the ETA of transfers that have pending intents
+poll_scheduler = AdaptivePollScheduler(
+    min_interval=TRANSFER_POLL_MIN_INTERVAL,
+    base_interval=TRANSFER_POLL_INTERVAL,
+    active_max_interval=TRANSFER_POLL_ACTIVE_MAX,
+    max_interval=TRANSFER_POLL_IDLE_MAX
+)
+
+
+def next_transfer_poll(snapshot):
+    """Delay before the next background scrape (endpoints still refresh on demand)"""
+    # Stream clients only see changes the poller finds, so keep it at the base rate for them
+    ceiling = TRANSFER_POLL_INTERVAL if broadcaster.subscriber_count else None
+    if snapshot.error:
+        # Keep the current delay; the tracked rows are unknown until Tixati answers again
+        interval = poll_scheduler.current
+        return min(interval, ceiling) if ceiling else interval
+    tracked = [row for row in snapshot.rows if find_intent_for_row(row)]
+    return poll_scheduler.next_interval(tracked, ceiling)
+
+
+# Shared transfer list: one Tixati scrape per poll, read by every endpoint and the worker
+transfer_snapshots = TransferSnapshotService(
+    fetch_transfer_rows,
+    interval=TRANSFER_POLL_INTERVAL,
+    max_age=storage_mgr.config.get('transfer_max_age', TRANSFER_MAX_AGE),
+    diff_engine=TransferDiffEngine(),
+    next_interval=next_transfer_poll
+)
+
+# Library copies: persistent jobs, one worker queue per destination volume
+copy_jobs = CopyJobQueue(
+    run=lambda job: run_copy_job(job),
+    load=lambda: [dict(job) for job in storage_mgr.config.get('copy_jobs', [])],
+    save=storage_mgr.save_copy_job,
+    remove=storage_mgr.remove_copy_jobs,
+    concurrency=storage_mgr.config.get('copy_workers_per_volume', 1),
+    per_volume=storage_mgr.config.get('copy_volume_workers', {})
+)
+
+def mb_rate(value):
+    """Config MB/s (number or {"read", "write"} dict) in bytes/s"""
+    if isinstance(value, dict):
+        return {direction: mb_rate(rate) for direction, rate in value.items()}
+    return (value or 0) * 1024 * 1024
+
+
+# Free space per library volume, minus space promised to downloads still on their way
+disk_usage_cache = DiskUsageCache(ttl=DISK_USAGE_TTL)
+placement = PlacementService(
+    disk_usage_cache,
+    intent_reservations,
+    headroom=int(storage_mgr.config.get('placement_headroom_gb', 5) * 1024**3)
+)
+
+# Temp deletes run on their own thread, batched and rate-limited, retrying files Tixati still holds
+temp_deleter = DeletionQueue(
+    load=lambda: storage_mgr.config.get('pending_deletions', []),
+    save=storage_mgr.save_pending_deletion,
+    remove=storage_mgr.remove_pending_deletions,
+    root=TEMP_DOWNLOAD_DIR,
+    ops_per_sec=storage_mgr.config.get('delete_ops_per_sec', 200),
+    batch_size=storage_mgr.config.get('delete_batch_size', 64),
+    on_freed=disk_usage_cache.invalidate
+)
+temp_deleter.start()
+
+# Token buckets for library copies; the global rate follows Tixati's upload rate
+copy_throttle = CopyThrottle(
+    global_rate=mb_rate(storage_mgr.config.get('copy_rate_limit_mb', 0)),
+    per_volume={volume: mb_rate(limit)
+                for volume, limit in storage_mgr.config.get('copy_volume_rate_limits_mb', {}).items()},
+    busy_outrate=storage_mgr.config.get('copy_throttle_busy_kb', 1024) * 1024,
+    idle_outrate=storage_mgr.config.get('copy_throttle_idle_kb', 128) * 1024,
+    busy_rate=mb_rate(storage_mgr.config.get('copy_busy_rate_mb', 20))
+)
+
+# Live progress of recent library copies, keyed by Tixati transfer id (or intent key)
+COPY_PROGRESS_KEEP = 50
+COPY_JOURNAL_DIR = 'copy_journals'  # Per-job lists of files already placed, for resuming after a restart
+MOVE_NOW_PRIORITY = 100  # /api/move-now jobs run before automatically queued ones
+MOVE_NOW_WAIT = 2  # Seconds /api/move-now waits for a quick job to finish before answering
+copy_progress: Dict[str, CopyProgress] = {}
+copy_progress_lock = threading.Lock()
+
+
+def track_copy(intent, job_id=None):
+    """Register a progress record for an intent's copy; forgets the oldest finished ones"""
+    on_state = (lambda state: copy_jobs.set_state(job_id, state)) if job_id else None
+    progress = CopyProgress(intent.get('name_hint') or intent_key(intent), on_state=on_state)
+    with copy_progress_lock:
+        key = intent.get('transfer_id') or intent_key(intent)
+        copy_progress.pop(key, None)
+        copy_progress[key] = progress
+        finished = [k for k, p in copy_progress.items() if p.finished_at]
+        for k in finished[:max(0, len(copy_progress) - COPY_PROGRESS_KEEP)]:
+            copy_progress.pop(k, None)
+    return progress
+
+
+def copy_progress_for(row, intent=None):
+    progress = copy_progress.get(row.checkbox_id) if row.checkbox_id else None
+    if progress is None and intent:
+        progress = copy_progress.get(intent_key(intent))
+    return progress.as_dict() if progress else None
+
+
+def copy_progress_token():
+    """Changes whenever any tracked copy advances (part of the /api/completed ETag)"""
+    with copy_progress_lock:
+        records = list(copy_progress.values())
+    return f"{len(records)}.{sum(p.bytes_done for p in records)}.{sum(1 for p in records if p.finished_at)}"
+
+
+# Change events from each new snapshot, consumed by copy_worker
+transfer_event_queue = queue.Queue()
+transfer_snapshots.subscribe(lambda snapshot, events: transfer_event_queue.put(events) if events else None)
+
+
+# Same scores as match_torrent_name: exact, then hint inside the transfer name, then the reverse
+INTENT_MATCH_RANKING = (MATCH_EXACT, MATCH_NAME_IN_QUERY, MATCH_QUERY_IN_NAME)
+TRANSFER_MATCH_RANKING = (MATCH_EXACT, MATCH_QUERY_IN_NAME, MATCH_NAME_IN_QUERY)
+
+
+class IntentLookup(NamedTuple):
+    """Pending intents indexed for one config revision"""
+    by_transfer: Dict[str, dict]  # bound Tixati checkbox id -> intent
+    by_infohash: Dict[str, dict]  # info-hash of intents not yet bound -> intent
+    by_name: NameIndex  # name hints of intents not yet bound (fuzzy fallback)
+
+
+class TransferLookup(NamedTuple):
+    """Transfers of one snapshot version indexed by checkbox id and name"""
+    by_id: Dict[str, object]
+    by_name: NameIndex
+
+
+_intent_lookup = (None, None)  # (config revision, IntentLookup)
+_transfer_lookup = (None, None)  # (snapshot version, TransferLookup)
+_transfer_infohashes = {}  # checkbox id -> info-hash read from the transfer's event log
+
+
+def intent_infohash(intent):
+    # Intents saved before info-hashes were recorded carry only the magnet
+    return intent.get('infohash') or magnet_infohash(intent.get('magnet') or '')
+
+
+def intent_lookup():
+    """Intent indexes, rebuilt only after the config changes"""
+    global _intent_lookup
+    revision, lookup = _intent_lookup
+    if lookup is None or revision != storage_mgr.revision:
+        revision = storage_mgr.revision
+        intents = storage_mgr.config.get('intents', [])
+        unbound = [intent for intent in intents if not intent.get('transfer_id')]
+        lookup = IntentLookup(
+            {intent['transfer_id']: intent for intent in intents if intent.get('transfer_id')},
+            {intent_infohash(intent): intent for intent in unbound if intent_infohash(intent)},
+            NameIndex(unbound, lambda intent: intent.get('name_hint'))
+        )
+        _intent_lookup = (revision, lookup)
+    return lookup
+
+
+def transfer_lookup(snapshot):
+    """Transfer indexes, built once per snapshot version"""
+    global _transfer_lookup
+    version, lookup = _transfer_lookup
+    if lookup is None or version != snapshot.version:
+        lookup = TransferLookup(
+            {row.checkbox_id: row for row in snapshot.rows if row.checkbox_id},
+            NameIndex(snapshot.rows, lambda row: row.name)
+        )
+        _transfer_lookup = (snapshot.version, lookup)
+    return lookup
+
+
+def find_intent_for_name(name):
+    """Find the not-yet-bound intent that best matches a Tixati transfer name"""
+    intent, _ = intent_lookup().by_name.best(name, INTENT_MATCH_RANKING)
+    return intent
+
+
+def find_intent_for_row(row):
+    """Intent for a transfer row: its persisted binding, else a fuzzy name match (read-only)"""
+    intent = intent_lookup().by_transfer.get(row.checkbox_id)
+    return intent if intent is not None else find_intent_for_name(row.name)
+
+
+def transfer_infohash(transfer_id):
+    """Info-hash of a Tixati transfer from its event log; cached, None if unavailable"""
+    infohash = _transfer_infohashes.get(transfer_id)
+    if infohash is None:
+        try:
+            infohash = parse_eventlog_infohash(tixati.transfer_page(transfer_id, 'eventlog').text)
+        except Exception as e:
+            print(f"[Binding] Could not read info-hash for {transfer_id}: {e}")
+            return None
+        if infohash:
+            _transfer_infohashes[transfer_id] = infohash
+    return infohash
+
+
+def bind_intent_for_row(row):
+    """Resolve and persist the intent for a transfer row (copy worker only; may query Tixati)
+
+    Bound transfers resolve by checkbox id. Otherwise the transfer's info-hash
+    is matched against the intents' magnets; fuzzy name matching is only a
+    fallback, and a candidate whose magnet hash disagrees is rejected.
+    """
+    lookup = intent_lookup()
+    intent = lookup.by_transfer.get(row.checkbox_id)
+    if intent is not None or not row.checkbox_id:
+        return intent
+
+    if not lookup.by_infohash and not len(lookup.by_name):
+        return None  # every intent is bound already
+
+    infohash = transfer_infohash(row.checkbox_id)
+    intent = lookup.by_infohash.get(infohash) if infohash else None
+    if intent is None:
+        intent = find_intent_for_name(row.name)
+        if intent is None:
+            return None
+        if intent_infohash(intent) and intent_infohash(intent) != infohash:
+            # Different torrent with a similar name, or the hash could not be read yet
+            return None
+
+    intent = storage_mgr.bind_intent_transfer(intent, row.checkbox_id)
+    if intent is not None:
+        print(f"[Binding] {intent.get('name_hint')} -> transfer {row.checkbox_id}")
+    return intent
+
+
+def download_entry(row):
+    """/api/downloads entry for a transfer row, or None if it is not an active download"""
+    # Include torrents that are actively downloading or queued (not seeding)
+    # Exclude: seeding, standby, ratio exceeded, stopped, etc.
+    status_lower = row.status.lower().strip()
+    excluded_keywords = ['seeding', 'standby', 'ratio exceeded', 'stopped', 'complete']
+    if any(keyword in status_lower for keyword in excluded_keywords):
+        return None
+
+    intent = find_intent_for_row(row)
+    return {
+        "name": row.name,
+        "size": row.size,
+        "progress": row.percent,
+        "state": row.status,
+        "dlspeed": row.dlspeed,
+        "upspeed": row.upspeed,
+        "priority": row.priority,
+        "eta": row.eta,
+        "target_path": intent.get('target_path') if intent else ""
+    }
+
+
+def completed_entry(row):
+    """/api/completed entry for a transfer row, or None if it is still downloading"""
+    # Include all non-downloading statuses (seeding, standby, ratio exceeded, etc)
+    status_lower = row.status.lower().strip()
+    if status_lower == 'downloading':
+        return None
+
+    # Categorize by seed status based on current status
+    seed_status = 'completed'  # default for ratio exceeded, etc
+    if 'seeding' in status_lower:
+        # Check if actively seeding (has upload speed) or on standby
+        if row.upspeed != '0 B/s':
+            seed_status = 'active'
+        else:
+            seed_status = 'standby'
+    elif 'standby' in status_lower:
+        seed_status = 'standby'
+    # For 'ratio exceeded', 'complete', and other finished states: seed_status = 'completed'
+
+    intent = find_intent_for_row(row)
+    return {
+        "name": row.name,
+        "size": row.size,
+        "progress": row.percent,
+        "state": row.status,
+        "dlspeed": row.dlspeed,
+        "upspeed": row.upspeed,
+        "priority": row.priority,
+        "eta": row.eta,
+        "seed_status": seed_status,
+        "target_path": intent.get('target_path') if intent else "",
+        "copy": copy_progress_for(row, intent)
+    }
+
+
+def find_transfer_for_intent(intent, snapshot):
+    """Find the transfer row for an intent: its bound transfer, else the best name match"""
+    lookup = transfer_lookup(snapshot)
+    if intent.get('transfer_id'):
+        return lookup.by_id.get(intent['transfer_id'])
+    row, _ = lookup.by_name.best(intent.get('name_hint') or '', TRANSFER_MATCH_RANKING)
+    return row
+
+
+def bind_transfer_for_intent(intent, snapshot):
+    """Transfer row for an intent, binding it on first sight (copy worker only)
+
+    The best name match is checked first; if its info-hash disagrees, every
+    other transfer's hash is checked (each is read from Tixati once).
+    """
+    if intent.get('transfer_id'):
+        return transfer_lookup(snapshot).by_id.get(intent['transfer_id'])
+    candidate = find_transfer_for_intent(intent, snapshot)
+    rows = [candidate] if candidate is not None else []
+    if intent_infohash(intent):
+        rows.extend(row for row in snapshot.rows if row is not candidate)
+    for row in rows:
+        bound = bind_intent_for_row(row)
+        if bound is not None and intent_key(bound) == intent_key(intent):
+            return row
+    return None
+
+
+def handle_intent_transfer(intent, row, previous_status):
+    """Act on the current status of the transfer matched to an intent
+
     Triggers copy when status changes from Downloading -> Seeding
     Triggers cleanup when status changes to Seeding Ratio Exceeded
+    Returns False when the action failed and should be retried on a later cycle.
     """
-    torrent_status_cache = {}  # Track previous status to detect transitions
-    
+    name_hint = intent.get('name_hint')
+    target_path = intent.get('target_path')
+    current_status = status_word(row.status)
+    checkbox_name = row.checkbox_id
+
+    # Without a magnet xl, the size column is the first reliable size (reserved for placement)
+    if not intent.get('size'):
+        intent = storage_mgr.set_intent_size(intent, parse_size(row.size)) or intent
+
+    # Skip if still downloading
+    if current_status in ('downloading', 'checking', 'connecting'):
+        return True
+
+    # Handle seeding ratio exceeded: delete from temp and Tixati
+    if 'seeding ratio exceeded' in current_status:
+        if copy_jobs.is_active(copy_job_id(intent)) or \
+                intent.get('handoff') in (HANDOFF_PENDING, HANDOFF_VERIFYING):
+            # The temp data is still being copied or handed off; clean up on a later cycle
+            return False
+        try:
+            print(f"[CopyWorker] Ratio exceeded for {name_hint}, cleaning up")
+
+            # Remove from Tixati
+            if checkbox_name:
+                post_data = {'remove': 'Remove', checkbox_name: 'on'}
+                tixati.transfer_action(post_data)
+
+            # Delete from temp folder in the background
+            remove_temp(os.path.join(TEMP_DOWNLOAD_DIR, name_hint), 'ratio exceeded', intent.get('size', 0))
+
+            # Remove intent
+            storage_mgr.pop_intent(intent_key(intent))
+            print(f"[CopyWorker] Cleaned up intent for {name_hint}")
+        except Exception as clean_err:
+            print(f"[CopyWorker] Cleanup failed for {name_hint}: {clean_err}")
+            return False
+        return True
+
+    # Trigger copy when status changes to "Seeding" (download complete)
+    # Only copy once per torrent (when transitioning from downloading -> seeding)
+    if current_status == 'seeding' and previous_status != 'seeding' and not intent.get('copied_to'):
+        # Hand off to the persistent copy queue so polling and cleanup keep running
+        enqueue_copy(intent)
+    return True
+
+
+def copy_job_id(intent):
+    """Stable id of an intent's copy job (also names its copy journal)"""
+    return hashlib.sha1(intent_key(intent).encode('utf-8')).hexdigest()[:16]
+
+
+def open_copy_journal(intent):
+    """Journal of files already placed for this intent's copy job"""
+    return CopyJournal(os.path.join(COPY_JOURNAL_DIR, f"{copy_job_id(intent)}.jsonl"))
+
+
+def find_intent_by_key(key):
+    return storage_mgr.get_intent(key)
+
+
+def tree_size(path):
+    """Bytes in a file or folder tree"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def copy_destination(intent):
+    """Library path an intent's download goes to
+
+    A started job (copy_dest pinned, or files in its resume journal) keeps the
+    folder it began. A fresh one never merges into an existing folder: it gets
+    a _<timestamp> suffix instead.
+    """
+    if intent.get('copy_dest'):
+        return intent['copy_dest']
+    name_hint = intent.get('name_hint')
+    target_path = intent.get('target_path')
+    final_path = target_path
+    # Smart folder detection for TV shows
+    if intent.get('category', 'movie').lower() in ['tv', 'show']:
+        season_num, _ = extract_season_episode_numbers(name_hint)
+        appropriate_folder = find_appropriate_season_folder(target_path, season_num)
+        if appropriate_folder and appropriate_folder != target_path:
+            final_path = appropriate_folder
+            print(f"[CopyWorker] Using season folder: {final_path}")
+    dest = os.path.join(final_path, name_hint)
+    if os.path.lexists(dest) and not len(open_copy_journal(intent)):
+        dest = f"{dest}_{int(time.time())}"
+    return dest
+
+
+def placed_destination(intent, src):
+    """(intent, dest) for copying src, the target redirected when its volume lacks the space
+
+    Raises RuntimeError if the copy cannot be placed.
+    """
+    dest = copy_destination(intent)
+    if not same_volume(src, dest):
+        target_path = intent.get('target_path')
+        needed = max(0, tree_size(src) - (tree_size(dest) if os.path.exists(dest) else 0))
+        new_target, _, error = place_target(target_path, needed, intent.get('category', 'movie'),
+                                            intent_key(intent))
+        if error:
+            raise RuntimeError(error)
+        if new_target != target_path:
+            if intent.get('copy_dest'):
+                raise RuntimeError(f"Not enough space to finish the copy into {dest}")
+            intent = storage_mgr.set_intent_target(intent, new_target) or intent
+            dest = copy_destination(intent)
+    return intent, dest
+
+
+def enqueue_copy(intent, priority=0, force=False):
+    """Queue the library copy for an intent's finished download; returns the job"""
+    dest = TEMP_DOWNLOAD_DIR
+    if intent.get('target_path'):
+        dest = copy_destination(intent)
+        src = os.path.join(TEMP_DOWNLOAD_DIR, intent.get('name_hint') or '')
+        if intent.get('name_hint') and os.path.exists(src):
+            # Placement may send the copy to another disk: queue it with that disk's workers
+            try:
+                intent, dest = placed_destination(intent, src)
+            except RuntimeError:
+                pass  # the job fails with the reason when it runs
+    return copy_jobs.enqueue(copy_job_id(intent), intent_key(intent), intent.get('name_hint'), dest,
+                             priority=priority, force=force)
+
+
+def run_copy_job(job):
+    """CopyJobQueue runner: copy the job's intent, raising if it did not complete"""
+    intent = find_intent_by_key(job['key'])
+    if intent is None:
+        raise RuntimeError("Intent no longer exists")
+    dest = copy_completed_download(intent, job['id'], job['volume'])
+    return {"dest": dest, "transfer_id": intent.get('transfer_id')}
+
+
+def remove_temp(src, reason='copied', size=0):
+    """Queue a temp download for background deletion; the caller carries on at once"""
+    if os.path.lexists(src):
+        temp_deleter.enqueue(src, reason, size)
+
+
+def tixati_recheck_complete(transfer_id, timeout=HANDOFF_VERIFY_TIMEOUT):
+    """Have Tixati re-check a transfer's files and wait until it reports every file complete
+
+    The files page must show all files complete on two polls in a row with the
+    transfer no longer checking, so a page read before the re-check started
+    does not count.
+    """
+    tixati.transfer_page_action(transfer_id, 'details', {'checkfiles': 'Check Files'})
+    deadline = time.time() + timeout
+    confirmations = 0
+    while time.time() < deadline:
+        time.sleep(HANDOFF_POLL_INTERVAL)
+        try:
+            files = parse_file_rows(tixati.transfer_page(transfer_id, 'files').text)
+            row = transfer_lookup(transfer_snapshots.refresh()).by_id.get(transfer_id)
+        except Exception as e:
+            print(f"[Handoff] Could not read transfer {transfer_id}: {e}")
+            continue
+        checking = row is not None and 'checking' in row.status.lower()
+        if files and all(f.complete for f in files) and not checking:
+            confirmations += 1
+            if confirmations >= 2:
+                return True
+        else:
+            confirmations = 0
+    return False
+
+
+def set_transfer_running(transfer_id, running):
+    """Start or stop a transfer from its details form"""
+    action = {'start': 'Start'} if running else {'stop': 'Stop'}
+    tixati.transfer_page_action(transfer_id, 'details', action)
+
+
+def restore_temp(src):
+    """Put a temp copy set aside for a handoff check back where Tixati expects it
+
+    Raises RuntimeError if both exist, rather than leave the set-aside copy behind.
+    """
+    aside = src + HANDOFF_ASIDE_SUFFIX
+    if not os.path.lexists(aside):
+        return
+    if os.path.lexists(src):
+        raise RuntimeError(f"Both {src} and the set-aside {aside} exist; keep one and remove the other")
+    os.rename(aside, src)
+
+
+def hand_off_seeding(intent):
+    """Move Tixati's seeding over to the library copy, proving it before temp is deleted
+
+    The transfer is repointed at the library folder and stopped, and the temp
+    copy is renamed aside before Check Files runs, so the check can only pass on
+    the library copy (a hardlink or the untouched temp folder cannot satisfy it).
+    On success the set-aside copy is queued for deletion; otherwise it is put
+    back, Tixati is pointed at temp again and seeding carries on from there.
+    If Tixati cannot be repointed (see update_torrent_save_path) nothing is
+    stopped or moved. Returns True once Tixati seeds from the library copy.
+    """
+    transfer_id = intent.get('transfer_id')
+    name_hint = intent.get('name_hint')
+    dest = intent.get('copied_to')
+    src = os.path.join(TEMP_DOWNLOAD_DIR, name_hint)
+    aside = src + HANDOFF_ASIDE_SUFFIX
+    try:
+        restore_temp(src)  # a check interrupted by a restart
+    except RuntimeError as e:
+        print(f"[Handoff] {e}")
+        storage_mgr.set_intent_handoff(intent, HANDOFF_FAILED)
+        return False
+    if not transfer_id or not dest or not os.path.lexists(src):
+        storage_mgr.set_intent_handoff(intent, HANDOFF_FAILED)
+        return False
+    if not update_torrent_save_path(name_hint, os.path.dirname(dest), transfer_id):
+        print(f"[Handoff] Could not repoint {name_hint}; it keeps seeding from temp")
+        storage_mgr.set_intent_handoff(intent, HANDOFF_FAILED)
+        return False
+
+    intent = storage_mgr.set_intent_handoff(intent, HANDOFF_VERIFYING) or intent
+    handed_off = False
+    try:
+        set_transfer_running(transfer_id, False)
+        os.rename(src, aside)
+        handed_off = tixati_recheck_complete(transfer_id)
+    except Exception as e:
+        print(f"[Handoff] Failed for {name_hint}: {e}")
+
+    if handed_off:
+        set_transfer_running(transfer_id, True)
+        remove_temp(aside, 'handed off', intent.get('size', 0))
+        storage_mgr.set_intent_handoff(intent, HANDOFF_DONE)
+        print(f"[Handoff] Tixati now seeds {name_hint} from {dest}")
+        return True
+
+    print(f"[Handoff] Tixati does not see {name_hint} complete at {dest}; keeping temp")
+    try:
+        restore_temp(src)
+        update_torrent_save_path(name_hint, TEMP_DOWNLOAD_DIR, transfer_id)
+        tixati.transfer_page_action(transfer_id, 'details', {'checkfiles': 'Check Files'})
+        set_transfer_running(transfer_id, True)
+    except Exception as e:
+        print(f"[Handoff] Could not point {name_hint} back at temp: {e}")
+    storage_mgr.set_intent_handoff(intent, HANDOFF_FAILED)
+    return False
+
+
+handoff_queue = queue.Queue()  # intent keys whose seeding handoff is due
+
+
+def handoff_worker():
+    """Run seeding handoffs one at a time, off the copy workers
+
+    The re-check can take minutes (HANDOFF_VERIFY_TIMEOUT); waiting here keeps
+    the per-volume copy workers free for the next job. Handoffs left pending or
+    mid-check by a restart are picked up again.
+    """
+    for intent in storage_mgr.config.get('intents', []):
+        if intent.get('handoff') in (HANDOFF_PENDING, HANDOFF_VERIFYING):
+            handoff_queue.put(intent_key(intent))
     while True:
+        key = handoff_queue.get()
+        intent = storage_mgr.get_intent(key)
+        if intent is None or intent.get('handoff') not in (HANDOFF_PENDING, HANDOFF_VERIFYING):
+            continue
         try:
-            intents = list(storage_mgr.config.get('intents', []))
-            if intents:
-                # Get transfer list from Tixati
-                resp = requests.get(f"{TIXATI_BASE}/transfers")
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                table = soup.find('table', class_='xferslist')
-                torrent_info = {}  # Map name to (status, checkbox_name)
-                
-                if table:
-                    rows = table.find_all('tr')[1:]
-                    for row in rows:
-                        cols = row.find_all('td')
-                        if len(cols) < 5:
-                            continue
-                        checkbox = cols[0].find('input', {'type': 'checkbox'})
-                        name = cols[1].get_text(strip=True)
-                        status = cols[4].get_text(strip=True).lower()  # Get full status text
-                        checkbox_name = checkbox['name'] if checkbox and 'name' in checkbox.attrs else None
-                        torrent_info[name] = (status, checkbox_name)
-                        print(f"[CopyWorker] {name}: {status}")
-
-                for intent in intents:
-                    name_hint = intent.get('name_hint')
-                    target_path = intent.get('target_path')
-                    category = intent.get('category', 'movie')
-                    if not name_hint:
-                        continue
-                    
-                    # Find best matching torrent by name (with fuzzy matching)
-                    best_match = None
-                    best_score = 0
-                    best_status = None
-                    best_checkbox = None
-                    
-                    for actual_name, (status, checkbox_name) in torrent_info.items():
-                        score, _ = match_torrent_name(name_hint, actual_name)
-                        if score > best_score:
-                            best_score = score
-                            best_match = actual_name
-                            best_status = status
-                            best_checkbox = checkbox_name
-                    
-                    if best_score == 0:
-                        # No match found for this intent
-                        print(f"[CopyWorker] No matching torrent for {name_hint}")
-                        continue
-                    
-                    print(f"[CopyWorker] Matched {name_hint} -> {best_match} (score: {best_score}) | Status: {best_status}")
-                    
-                    current_status = best_status
-                    checkbox_name = best_checkbox
-                    previous_status = torrent_status_cache.get(name_hint)
-                    
-                    # Update status cache
-                    if current_status:
-                        torrent_status_cache[name_hint] = current_status
-                    
-                    # Skip if still downloading
-                    if current_status and current_status in ('downloading', 'checking', 'connecting'):
-                        continue
-                    
-                    # Handle seeding ratio exceeded: delete from temp and Tixati
-                    if current_status and 'seeding ratio exceeded' in current_status:
-                        try:
-                            print(f"[CopyWorker] Ratio exceeded for {name_hint}, cleaning up")
-                            
-                            # Remove from Tixati
-                            if checkbox_name:
-                                post_data = {'remove': 'Remove', checkbox_name: 'on'}
-                                requests.post(f"{TIXATI_BASE}/transfers/action", data=post_data, timeout=5)
-                            
-                            # Delete from temp folder
-                            src = os.path.join(TEMP_DOWNLOAD_DIR, name_hint)
-                            if os.path.exists(src):
-                                if os.path.isdir(src):
-                                    shutil.rmtree(src)
-                                else:
-                                    os.remove(src)
-                                print(f"[CopyWorker] Deleted temp: {src}")
-                            
-                            # Remove intent and status cache
-                            storage_mgr.pop_intent_by_name(name_hint)
-                            torrent_status_cache.pop(name_hint, None)
-                            print(f"[CopyWorker] Cleaned up intent for {name_hint}")
-                        except Exception as clean_err:
-                            print(f"[CopyWorker] Cleanup failed for {name_hint}: {clean_err}")
+            hand_off_seeding(intent)
+        except Exception as e:
+            print(f"[Handoff] Error: {e}")
+
+
+def copy_completed_download(intent, job_id=None, volume=None):
+    """Copy a finished download to its library folder, then remove the temp copy and intent
+
+    Returns the destination; raises if the copy cannot be made or verified, in
+    which case the temp source and the intent are kept for a retry. A job run
+    by volume's workers raises CopyMoved if placement sends it to another disk.
+    """
+    name_hint = intent.get('name_hint')
+    target_path = intent.get('target_path')
+    src = os.path.join(TEMP_DOWNLOAD_DIR, name_hint)
+
+    print(f"[CopyWorker] Download complete for {name_hint}, starting copy")
+
+    if not os.path.exists(src):
+        # File already deleted or moved
+        open_copy_journal(intent).discard()
+        storage_mgr.pop_intent(intent_key(intent))
+        raise RuntimeError(f"Source no longer exists: {src}")
+    if not target_path:
+        raise RuntimeError("No target path set")
+
+    # Check write permissions
+    writable, err = check_path_writable(target_path)
+    if not writable:
+        raise RuntimeError(f"Target not writable: {target_path} ({err})")
+
+    # Cross-volume copies need the space; redirect (or fail) before writing anything
+    intent, dest = placed_destination(intent, src)
+    if volume and volume_of(dest) != volume:
+        raise CopyMoved(dest)
+
+    # Prepare destination path; an interrupted job resumes into the folder it started
+    intent = storage_mgr.set_intent_copy_dest(intent, dest) or intent
+    journal = open_copy_journal(intent)
+    if len(journal):
+        print(f"[CopyWorker] Resuming {name_hint}: {len(journal)} files already copied")
+
+    keep_source = storage_mgr.config.get('seed_after_copy', False)
+    print(f"[CopyWorker] Placing {src} at {dest}")
+
+    # Rename/hardlink on the same volume, kernel-assisted copy across volumes
+    progress = track_copy(intent, job_id)
+    chunk_size = int(storage_mgr.config.get('copy_chunk_mb', 8) * 1024 * 1024)
+    verify = storage_mgr.config.get('copy_verify', VERIFY_SAMPLE)
+
+    def check_cancelled():
+        if job_id and copy_jobs.is_cancelled(job_id):
+            raise CopyCancelled()
+
+    throttle = copy_throttle.for_job(src, dest, interrupt=check_cancelled)
+
+    def pace(count):
+        # Called after every chunk: stop here if the job was cancelled
+        check_cancelled()
+        throttle(count)
+
+    try:
+        strategy = place_tree(src, dest, keep_source=keep_source, chunk_size=chunk_size,
+                              progress=progress, journal=journal, verify=verify, throttle=pace)
+    except CopyVerificationError as verify_err:
+        # Never delete the temp source behind a bad copy
+        print(f"[CopyWorker] {verify_err}; keeping source {src}")
+        storage_mgr.record_copy_failure(intent, str(verify_err), progress.as_dict()['verify'])
+        raise
+    finally:
+        journal.close()
+    verification = progress.as_dict()['verify']
+
+    print(f"[CopyWorker] Placed via {strategy}: {dest} "
+          f"({progress.bytes_done / 1024**3:.2f} GB in {progress.elapsed:.1f}s, "
+          f"{progress.throughput / 1024**2:.1f} MB/s, "
+          f"verified {verification['filesVerified']} files ({verification['mode'] or 'not needed'}))")
+
+    # Verify copy succeeded before cleanup
+    disk_usage_cache.invalidate(dest)
+    if not os.path.exists(dest):
+        raise RuntimeError(f"Copy verification failed for {name_hint}")
+    journal.discard()
+    if keep_source:
+        # Tixati keeps seeding from temp; ratio cleanup removes it later, unless the
+        # handoff worker proves Tixati seeds from the library copy first
+        handoff = HANDOFF_PENDING if storage_mgr.config.get('seed_handoff', False) and intent.get('transfer_id') else None
+        storage_mgr.mark_intent_copied(intent, dest, strategy, verification, handoff=handoff)
+        if handoff:
+            handoff_queue.put(intent_key(intent))
+        return dest
+
+    # Delete source from temp (a rename leaves nothing behind)
+    remove_temp(src, 'copied', progress.bytes_total)
+
+    # Remove intent
+    storage_mgr.pop_intent(intent_key(intent))
+    print(f"[CopyWorker] Intent removed for {name_hint}")
+    return dest
+
+
+def copy_worker():
+    """Copy completed torrents to their final location, driven by transfer change events
+
+    Only transfers reported as added or status-changed by the diff engine are
+    examined, so work per cycle scales with the number of changes. Intents seen
+    for the first time (and failed cleanups) are matched once against the
+    current snapshot, since their transfer may already be present.
+    """
+    torrent_status_cache = {}  # intent key -> last handled status
+    known_intents = set()
+    recheck = set()  # intent keys to match against the full snapshot
+
+    def process(intent, row):
+        key = intent_key(intent)
+        current_status = status_word(row.status)
+        previous_status = torrent_status_cache.get(key)
+        if current_status == previous_status:
+            return
+        print(f"[CopyWorker] {intent.get('name_hint')} -> {row.name} | Status: {current_status}")
+        torrent_status_cache[key] = current_status
+        if not handle_intent_transfer(intent, row, previous_status):
+            torrent_status_cache.pop(key, None)
+            recheck.add(key)
+
+    while True:
+        try:
+            try:
+                events = transfer_event_queue.get(timeout=WATCHER_POLL_INTERVAL)
+            except queue.Empty:
+                events = []
+
+            intents = {intent_key(i): i for i in storage_mgr.config.get('intents', []) if i.get('name_hint')}
+            new_keys = [key for key in intents if key not in known_intents]
+            if new_keys:
+                # The poller may be backed off; watch the new transfer right away
+                recheck.update(new_keys)
+                poll_scheduler.reset()
+                transfer_snapshots.wake()
+            known_intents = set(intents)
+            for key in list(torrent_status_cache):
+                if key not in intents:
+                    torrent_status_cache.pop(key, None)
+
+            pending = [intents[key] for key in recheck if key in intents]
+            if pending:
+                snapshot = transfer_snapshots.get(max_age=WATCHER_POLL_INTERVAL)
+                if snapshot.error:
+                    raise RuntimeError(snapshot.error)
+                recheck.clear()
+                for intent in pending:
+                    row = bind_transfer_for_intent(intent, snapshot)
+                    if row is None:
+                        print(f"[CopyWorker] No matching torrent for {intent.get('name_hint')}")
                         continue
+                    # Binding published a new version of the intent
+                    process(storage_mgr.get_intent(intent_key(intent)) or intent, row)
 
-                    # Trigger copy when status changes to "Seeding" (download complete)
-                    # Only copy once per torrent (when transitioning from downloading -> seeding)
-                    if current_status == 'seeding' and previous_status != 'seeding':
-                        src = os.path.join(TEMP_DOWNLOAD_DIR, name_hint)
-                        
-                        print(f"[CopyWorker] Download complete for {name_hint}, starting copy")
-                        
-                        if os.path.exists(src):
-                            # File complete, copy to final location
-                            if target_path:
-                                try:
-                                    # Check write permissions
-                                    writable, err = check_path_writable(target_path)
-                                    if not writable:
-                                        print(f"[CopyWorker] Target not writable: {target_path} ({err})")
-                                        continue
-                                    
-                                    # Smart folder detection for TV shows
-                                    final_path = target_path
-                                    if category.lower() in ['tv', 'show']:
-                                        season_num, _ = extract_season_episode_numbers(name_hint)
-                                        appropriate_folder = find_appropriate_season_folder(target_path, season_num)
-                                        if appropriate_folder and appropriate_folder != target_path:
-                                            final_path = appropriate_folder
-                                            print(f"[CopyWorker] Using season folder: {final_path}")
-                                    
-                                    # Prepare destination path
-                                    dest = os.path.join(final_path, name_hint)
-                                    if os.path.exists(dest):
-                                        dest = f"{dest}_{int(time.time())}"
-                                    
-                                    print(f"[CopyWorker] Copying {src} to {dest}")
-                                    
-                                    # Copy instead of move
-                                    if os.path.isdir(src):
-                                        shutil.copytree(src, dest, dirs_exist_ok=True)
-                                    else:
-                                        shutil.copy2(src, dest)
-                                    
-                                    print(f"[CopyWorker] Copy complete: {dest}")
-                                    
-                                    # Verify copy succeeded before cleanup
-                                    if os.path.exists(dest):
-                                        # Delete source from temp
-                                        try:
-                                            if os.path.isdir(src):
-                                                shutil.rmtree(src)
-                                            else:
-                                                os.remove(src)
-                                            print(f"[CopyWorker] Cleaned up temp: {src}")
-                                        except Exception as cleanup_err:
-                                            print(f"[CopyWorker] Could not cleanup temp {src}: {cleanup_err}")
-                                        
-                                        # Remove intent and status cache
-                                        storage_mgr.pop_intent_by_name(name_hint)
-                                        torrent_status_cache.pop(name_hint, None)
-                                        print(f"[CopyWorker] Intent removed for {name_hint}")
-                                    else:
-                                        print(f"[CopyWorker] Copy verification failed for {name_hint}")
-                                        
-                                except Exception as copy_err:
-                                    print(f"[CopyWorker] Copy failed for {name_hint}: {copy_err}")
-                                    # Keep intent for retry
-                        else:
-                            # File already deleted or moved
-                            storage_mgr.pop_intent_by_name(name_hint)
-                            torrent_status_cache.pop(name_hint, None)
-                            print(f"[CopyWorker] Source no longer exists: {src}")
+            for event in events:
+                if event.kind not in (EVENT_ADDED, EVENT_STATUS_CHANGED):
+                    continue
+                intent = bind_intent_for_row(event.row)
+                if intent:
+                    process(intent, event.row)
 
         except Exception as e:
             print(f"[CopyWorker] Error: {e}")
 
-        time.sleep(WATCHER_POLL_INTERVAL)
-
 
 # Ensure temp download directory exists
 try:
@@ -786,30 +2019,28 @@ except Exception as e:
     print(f"[Init] Could not ensure temp dir {TEMP_DOWNLOAD_DIR}: {e}")
 
 
-# Start copy worker daemon thread
+# Start transfer snapshot poller and copy worker daemon threads
+transfer_snapshots.start()
 threading.Thread(target=copy_worker, daemon=True).start()
+threading.Thread(target=handoff_worker, name="Handoff", daemon=True).start()
+copy_jobs.start()
 
-@app.route('/')
-def index():
-    return render_template('main.html')
-
-@app.route('/api/stats')
-def get_stats():
-    # Get bandwidth from Tixati
+def read_bandwidth():
+    """Scrape current in/out rates from Tixati's bandwidth page"""
     bandwidth = {"inrate": "0 B/s", "outrate": "0 B/s"}
-    try:
-        resp = requests.get(f"{TIXATI_BASE}/bandwidth", timeout=5)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        inrate = soup.find('td', id='inrate')
-        outrate = soup.find('td', id='outrate')
-        if inrate:
-            bandwidth["inrate"] = inrate.get_text(strip=True)
-        if outrate:
-            bandwidth["outrate"] = outrate.get_text(strip=True)
-    except Exception as e:
-        print(f"[Bandwidth Error] {str(e)}")
-    
-    # Get local drive status
+    resp = tixati.bandwidth_page()
+    soup = BeautifulSoup(resp.text, 'html.parser')
+    inrate = soup.find('td', id='inrate')
+    outrate = soup.find('td', id='outrate')
+    if inrate:
+        bandwidth["inrate"] = inrate.get_text(strip=True)
+    if outrate:
+        bandwidth["outrate"] = outrate.get_text(strip=True)
+    return bandwidth
+
+
+def collect_drive_usage():
+    """Disk usage for every local drive letter (Windows) or /mnt, /media mount (Linux/Mac)"""
     drives = []
     if os.name == 'nt':
         import string
@@ -844,91 +2075,221 @@ def get_stats():
                         })
                     except Exception as e:
                         drives.append({"drive": path, "error": str(e)})
-    return jsonify({
-        "drives": drives,
-        "libraries": storage_mgr.get_library_stats(),
-        "recents": storage_mgr.config.get("recent_tv_folders", []),
-        "bandwidth": bandwidth
-    })
+    return drives
 
-@app.route('/api/system-usage')
-def get_system_usage():
-    """Get comprehensive system usage stats: CPU, RAM, GPU, and bandwidth"""
-    stats = {}
-    
-    # CPU Usage
-    try:
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        cpu_count = psutil.cpu_count(logical=False)
-        cpu_count_logical = psutil.cpu_count(logical=True)
-        cpu_freq = psutil.cpu_freq()
-        stats['cpu'] = {
-            'percent': round(cpu_percent, 1),
-            'cores': cpu_count,
-            'threads': cpu_count_logical,
-            'frequency': round(cpu_freq.current, 0) if cpu_freq else 0
-        }
-    except Exception as e:
-        stats['cpu'] = {'error': str(e)}
-    
-    # RAM Usage
-    try:
-        mem = psutil.virtual_memory()
-        stats['ram'] = {
-            'total_gb': round(mem.total / (1024**3), 2),
-            'used_gb': round(mem.used / (1024**3), 2),
-            'available_gb': round(mem.available / (1024**3), 2),
-            'percent': round(mem.percent, 1)
-        }
-    except Exception as e:
-        stats['ram'] = {'error': str(e)}
-    
-    # GPU Usage (Windows only via nvidia-smi or basic detection)
+
+def read_cpu_usage():
+    cpu_freq = psutil.cpu_freq()
+    return {
+        'percent': round(psutil.cpu_percent(interval=0.1), 1),
+        'cores': psutil.cpu_count(logical=False),
+        'threads': psutil.cpu_count(logical=True),
+        'frequency': round(cpu_freq.current, 0) if cpu_freq else 0
+    }
+
+
+def read_ram_usage():
+    mem = psutil.virtual_memory()
+    return {
+        'total_gb': round(mem.total / (1024**3), 2),
+        'used_gb': round(mem.used / (1024**3), 2),
+        'available_gb': round(mem.available / (1024**3), 2),
+        'percent': round(mem.percent, 1)
+    }
+
+
+def read_gpu_usage():
+    """GPU usage (Windows only via nvidia-smi)"""
     try:
         import subprocess
-        if os.name == 'nt':
-            # Try nvidia-smi for NVIDIA GPUs
-            result = subprocess.run(['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,temperature.gpu', 
-                                   '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\\n')
-                gpus = []
-                for line in lines:
-                    parts = line.split(',')
-                    if len(parts) >= 4:
-                        gpus.append({
-                            'utilization': int(parts[0].strip()),
-                            'memory_used_mb': int(parts[1].strip()),
-                            'memory_total_mb': int(parts[2].strip()),
-                            'temperature': int(parts[3].strip())
-                        })
-                stats['gpu'] = gpus if gpus else [{'info': 'NVIDIA GPU detected but no data'}]
-            else:
-                stats['gpu'] = [{'info': 'No NVIDIA GPU or nvidia-smi not available'}]
-        else:
-            stats['gpu'] = [{'info': 'GPU monitoring not supported on this platform'}]
+        if os.name != 'nt':
+            return [{'info': 'GPU monitoring not supported on this platform'}]
+        # Try nvidia-smi for NVIDIA GPUs
+        result = subprocess.run(['nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,temperature.gpu',
+                                 '--format=csv,noheader,nounits'],
+                                capture_output=True, text=True, timeout=2)
+        if result.returncode != 0:
+            return [{'info': 'No NVIDIA GPU or nvidia-smi not available'}]
+        gpus = []
+        for line in result.stdout.strip().splitlines():
+            parts = line.split(',')
+            if len(parts) >= 4:
+                gpus.append({
+                    'utilization': int(parts[0].strip()),
+                    'memory_used_mb': int(parts[1].strip()),
+                    'memory_total_mb': int(parts[2].strip()),
+                    'temperature': int(parts[3].strip())
+                })
+        return gpus if gpus else [{'info': 'NVIDIA GPU detected but no data'}]
     except FileNotFoundError:
-        stats['gpu'] = [{'info': 'nvidia-smi not found'}]
+        return [{'info': 'nvidia-smi not found'}]
     except Exception as e:
-        stats['gpu'] = [{'error': str(e)}]
-    
-    # Bandwidth from Tixati
-    bandwidth = {"inrate": "0 B/s", "outrate": "0 B/s"}
+        return [{'error': str(e)}]
+
+
+# Independent stat sources, run concurrently by the stats endpoints
+stats_fanout = SourceFanout()
+STATS_SOURCES = {
+    "bandwidth": read_bandwidth,
+    "drives": collect_drive_usage,
+    "libraries": lambda: storage_mgr.get_library_stats(),
+    "cpu": read_cpu_usage,
+    "ram": read_ram_usage,
+    "gpu": read_gpu_usage,
+}
+
+
+def gather_sources(names):
+    """Run the named stat sources in parallel; returns (results, errors) keyed by source"""
+    return stats_fanout.gather({name: (STATS_SOURCES[name], STATS_SOURCE_DEADLINES[name]) for name in names})
+
+
+# --- Server push: one producer fans out to every /api/stream client ---
+broadcaster = EventBroadcaster()
+latest_stats = {}
+
+
+def transfer_stream_entry(row):
+    return {
+        "key": row_key(row),
+        "download": download_entry(row),
+        "completed": completed_entry(row),
+    }
+
+
+def full_transfer_state(snapshot):
+    return {
+        "version": snapshot.version,
+        "full": True,
+        "upsert": [transfer_stream_entry(row) for row in snapshot.rows],
+        "remove": [],
+        "error": snapshot.error,
+    }
+
+
+def publish_transfer_changes(snapshot, events):
+    """Push only the rows that changed in the new snapshot"""
+    if not broadcaster.subscriber_count:
+        return
+    changed = {}
+    removed = []
+    for event in events:
+        if event.kind == EVENT_REMOVED:
+            removed.append(event.key)
+        else:
+            changed[event.key] = event.row
+    if changed or removed:
+        broadcaster.publish('transfers', {
+            "version": snapshot.version,
+            "full": False,
+            "upsert": [transfer_stream_entry(row) for row in changed.values()],
+            "remove": removed,
+        })
+
+
+def sample_stats():
+    """Lightweight stats sample for stream clients"""
+    results, errors = gather_sources(["bandwidth", "drives"])
+    sample = {"bandwidth": results.get("bandwidth", {"inrate": "0 B/s", "outrate": "0 B/s"})}
+    if "bandwidth" in errors:
+        sample["bandwidth_error"] = errors["bandwidth"]
     try:
-        resp = requests.get(f"{TIXATI_BASE}/bandwidth", timeout=5)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        inrate = soup.find('td', id='inrate')
-        outrate = soup.find('td', id='outrate')
-        if inrate:
-            bandwidth["inrate"] = inrate.get_text(strip=True)
-        if outrate:
-            bandwidth["outrate"] = outrate.get_text(strip=True)
+        sample["cpu"] = {"percent": round(psutil.cpu_percent(interval=None), 1)}
+        sample["ram"] = {"percent": round(psutil.virtual_memory().percent, 1)}
     except Exception as e:
-        print(f"[Bandwidth Error] {str(e)}")
-    
-    stats['bandwidth'] = bandwidth
-    
+        sample["system_error"] = str(e)
+    sample["drives"] = results.get("drives", [])
+    return sample
+
+
+def stats_pusher():
+    """Sample stats once per interval while stream clients are connected"""
+    global latest_stats
+    while True:
+        try:
+            if broadcaster.subscriber_count:
+                sample = sample_stats()
+                if sample != latest_stats:
+                    latest_stats = sample
+                    broadcaster.publish('stats', sample)
+        except Exception as e:
+            print(f"[StatsPusher] Error: {e}")
+        time.sleep(STATS_PUSH_INTERVAL)
+
+
+transfer_snapshots.subscribe(publish_transfer_changes)
+threading.Thread(target=stats_pusher, daemon=True).start()
+
+
+def copy_throttle_tuner():
+    """Feed Tixati's upload rate to the copy throttle while library copies are running"""
+    while True:
+        time.sleep(COPY_THROTTLE_INTERVAL)
+        if not copy_throttle.adaptive:
+            continue
+        if not any(volume["running"] for volume in copy_jobs.status().values()):
+            continue
+        results, errors = gather_sources(["bandwidth"])
+        if "bandwidth" in results:
+            copy_throttle.adapt(parse_rate(results["bandwidth"].get("outrate")))
+
+
+threading.Thread(target=copy_throttle_tuner, daemon=True).start()
+
+
+def conditional_json(etag, build):
+    """jsonify(build()) tagged with etag, or 304 without building if the client already has it"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def transfer_etag(kind, snapshot):
+    # Rows come from the snapshot, intent matching from the config
+    return f"{kind}-{BOOT_ID}-{snapshot.version}-{storage_mgr.revision}"
+
+
+def config_etag(kind):
+    return f"{kind}-{BOOT_ID}-{storage_mgr.revision}"
+
+
+@app.route('/')
+def index():
+    return render_template('main.html')
+
+@app.route('/api/stats')
+def get_stats():
+    results, errors = gather_sources(["bandwidth", "drives", "libraries"])
+    if "bandwidth" in errors:
+        print(f"[Bandwidth Error] {errors['bandwidth']}")
+    payload = {
+        "drives": results.get("drives", []),
+        "libraries": results.get("libraries", {"movie": [], "show": []}),
+        "recents": storage_mgr.config.get("recent_tv_folders", []),
+        "bandwidth": results.get("bandwidth", {"inrate": "0 B/s", "outrate": "0 B/s"})
+    }
+    if errors:
+        payload["partial"] = errors
+    return jsonify(payload)
+
+@app.route('/api/system-usage')
+def get_system_usage():
+    """Get comprehensive system usage stats: CPU, RAM, GPU, and bandwidth"""
+    results, errors = gather_sources(["cpu", "ram", "gpu", "bandwidth"])
+    stats = {
+        'cpu': results.get('cpu') or {'error': errors.get('cpu')},
+        'ram': results.get('ram') or {'error': errors.get('ram')},
+        'gpu': results.get('gpu') or [{'error': errors.get('gpu')}],
+        'bandwidth': results.get('bandwidth', {"inrate": "0 B/s", "outrate": "0 B/s"})
+    }
+    if "bandwidth" in errors:
+        print(f"[Bandwidth Error] {errors['bandwidth']}")
+    if errors:
+        stats['partial'] = errors
     return jsonify(stats)
 
 @app.route('/api/tv-folders', methods=['GET'])
@@ -939,9 +2300,8 @@ def get_tv_folders():
         if not cached_index:
             cached_index = storage_mgr.build_tv_index()
 
-        series_names = sorted({entry.get('series', '') for entry in cached_index if entry.get('series')})
-        return jsonify({
-            "folders": series_names,
+        return conditional_json(config_etag('tv-folders'), lambda: {
+            "folders": sorted({entry.get('series', '') for entry in cached_index if entry.get('series')}),
             "recent": storage_mgr.config.get('recent_tv_folders', []),
             "fromCache": True
         })
@@ -955,7 +2315,7 @@ def library_index():
         index = storage_mgr.get_library_index('show')
         if not index:
             index = storage_mgr.build_tv_index()
-        return jsonify({"show": index})
+        return conditional_json(config_etag('library-index'), lambda: {"show": index})
 
     data = request.json or {}
     series = (data.get('series') or '').strip()
@@ -989,11 +2349,28 @@ def refresh_library_index():
     return jsonify({"show": index, "count": len(index)})
 
 
+@app.route('/api/state/export', methods=['GET'])
+def export_state():
+    """Full config with intents, batch and library index, in the magnetnode_config.json format"""
+    response = jsonify(storage_mgr.export_config())
+    response.headers['Content-Disposition'] = f'attachment; filename="{CONFIG_FILE}"'
+    return response
+
+
+@app.route('/api/state/import', methods=['POST'])
+def import_state():
+    """Replace intents, batch and library index with those in an exported config"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "msg": "Expected a config JSON object"}), 400
+    return jsonify({"success": True, "imported": storage_mgr.import_config(data)})
+
+
 # --- Persistent batch queue (shared mobile + web) ---
 @app.route('/api/batch', methods=['GET', 'POST'])
 def batch_collection():
     if request.method == 'GET':
-        return jsonify({"batch": storage_mgr.get_batch()})
+        return conditional_json(config_etag('batch'), lambda: {"batch": storage_mgr.get_batch()})
 
     data = request.json or {}
     magnet = (data.get('magnet') or '').strip()
@@ -1297,45 +2674,12 @@ def add_magnet():
 def list_downloads():
     """Get list of active downloads (all non-seeding/non-completed statuses) from Tixati WebUI"""
     try:
-        resp = requests.get(f"{TIXATI_BASE}/transfers")
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        table = soup.find('table', class_='xferslist')
-        downloads = []
-        if table:
-            rows = table.find_all('tr')[1:]  # skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 9:
-                    continue
-                name = cols[1].get_text(strip=True)
-                size = cols[2].get_text(strip=True)
-                percent = cols[3].get_text(strip=True)
-                status = cols[4].get_text(strip=True)
-                dlspeed = cols[5].get_text(strip=True)
-                upspeed = cols[6].get_text(strip=True)
-                priority = cols[7].get_text(strip=True)
-                eta = cols[8].get_text(strip=True)
-                
-                # Include torrents that are actively downloading or queued (not seeding)
-                # Exclude: seeding, standby, ratio exceeded, stopped, etc.
-                status_lower = status.lower().strip()
-                excluded_keywords = ['seeding', 'standby', 'ratio exceeded', 'stopped', 'complete']
-                is_excluded = any(keyword in status_lower for keyword in excluded_keywords)
-                
-                if not is_excluded:
-                    intent = find_intent_for_name(name)
-                    downloads.append({
-                        "name": name,
-                        "size": size,
-                        "progress": percent,
-                        "state": status,
-                        "dlspeed": dlspeed,
-                        "upspeed": upspeed,
-                        "priority": priority,
-                        "eta": eta,
-                        "target_path": intent.get('target_path') if intent else ""
-                    })
-        return jsonify({"downloads": downloads})
+        snapshot = transfer_snapshots.get()
+        if snapshot.error:
+            raise RuntimeError(snapshot.error)
+        return conditional_json(transfer_etag('downloads', snapshot), lambda: {
+            "downloads": [entry for entry in map(download_entry, snapshot.rows) if entry]
+        })
     except Exception as e:
         return jsonify({"downloads": [], "error": f"Tixati error: {str(e)}"}), 200
 
@@ -1343,75 +2687,114 @@ def list_downloads():
 def list_completed():
     """Get list of completed torrents (seeding, standby, ratio exceeded) organized by seed status"""
     try:
-        resp = requests.get(f"{TIXATI_BASE}/transfers")
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        table = soup.find('table', class_='xferslist')
-        completed = []
-        if table:
-            rows = table.find_all('tr')[1:]  # skip header
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 9:
-                    continue
-                name = cols[1].get_text(strip=True)
-                size = cols[2].get_text(strip=True)
-                percent = cols[3].get_text(strip=True)
-                status = cols[4].get_text(strip=True)
-                dlspeed = cols[5].get_text(strip=True)
-                upspeed = cols[6].get_text(strip=True)
-                priority = cols[7].get_text(strip=True)
-                eta = cols[8].get_text(strip=True)
-                
-                # Include all non-downloading statuses (seeding, standby, ratio exceeded, etc)
-                status_lower = status.lower().strip()
-                if status_lower != 'downloading':
-                    # Categorize by seed status based on current status
-                    seed_status = 'completed'  # default for ratio exceeded, etc
-                    
-                    if 'seeding' in status_lower:
-                        # Check if actively seeding (has upload speed) or on standby
-                        if upspeed != '0 B/s':
-                            seed_status = 'active'
-                        else:
-                            seed_status = 'standby'
-                    elif 'standby' in status_lower:
-                        seed_status = 'standby'
-                    # For 'ratio exceeded', 'complete', and other finished states: seed_status = 'completed'
-                    
-                    intent = find_intent_for_name(name)
-                    completed.append({
-                        "name": name,
-                        "size": size,
-                        "progress": percent,
-                        "state": status,
-                        "dlspeed": dlspeed,
-                        "upspeed": upspeed,
-                        "priority": priority,
-                        "eta": eta,
-                        "seed_status": seed_status,
-                        "target_path": intent.get('target_path') if intent else ""
-                    })
-        return jsonify({"completed": completed})
+        snapshot = transfer_snapshots.get()
+        if snapshot.error:
+            raise RuntimeError(snapshot.error)
+        etag = f"{transfer_etag('completed', snapshot)}-{copy_progress_token()}"
+        return conditional_json(etag, lambda: {
+            "completed": [entry for entry in map(completed_entry, snapshot.rows) if entry]
+        })
     except Exception as e:
         return jsonify({"completed": [], "error": f"Tixati error: {str(e)}"}), 200
 
+@app.route('/api/copy-progress', methods=['GET'])
+def list_copy_progress():
+    """Bytes, files and throughput of running and recently finished library copies"""
+    with copy_progress_lock:
+        records = [{"key": key, **progress.as_dict()} for key, progress in copy_progress.items()]
+    return jsonify({"copies": records, "throttle": copy_throttle.status()})
+
+
+def copy_job_entry(job):
+    """/api/copy-jobs entry: the persisted job plus live progress while it has any"""
+    intent = find_intent_by_key(job['key'])
+    progress_key = (intent.get('transfer_id') if intent else None) or job.get('transfer_id') or job['key']
+    progress = copy_progress.get(progress_key)
+    return {**job, "progress": progress.as_dict() if progress else None}
+
+
+@app.route('/api/copy-jobs', methods=['GET'])
+def list_copy_jobs():
+    """Library copy jobs: active ones in run order, then recently finished"""
+    return jsonify({"jobs": [copy_job_entry(job) for job in copy_jobs.list()], "volumes": copy_jobs.status()})
+
+
+@app.route('/api/copy-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_copy_job(job_id):
+    if not copy_jobs.cancel(job_id):
+        return jsonify({"success": False, "msg": "No active job with that id"}), 404
+    return jsonify({"success": True, "job": copy_job_entry(copy_jobs.get(job_id))})
+
+
+@app.route('/api/copy-jobs/<job_id>/retry', methods=['POST'])
+def retry_copy_job(job_id):
+    job = copy_jobs.retry(job_id)
+    if job is None:
+        return jsonify({"success": False, "msg": "No failed or cancelled job with that id"}), 404
+    return jsonify({"success": True, "job": copy_job_entry(job)})
+
+
+@app.route('/api/copy-jobs/<job_id>/priority', methods=['POST'])
+def reprioritize_copy_job(job_id):
+    """Body: {"priority": int}; higher runs first among a volume's queued jobs"""
+    try:
+        priority = int((request.get_json(silent=True) or {}).get('priority'))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "msg": "priority must be an integer"}), 400
+    job = copy_jobs.reprioritize(job_id, priority)
+    if job is None:
+        return jsonify({"success": False, "msg": "Job not found"}), 404
+    return jsonify({"success": True, "job": copy_job_entry(job)})
+
+
+@app.route('/api/deletions', methods=['GET'])
+def list_deletions():
+    """Temp paths queued for background deletion and the bytes they will free"""
+    return jsonify(temp_deleter.status())
+
+
+@app.route('/api/move-now/<torrent_name>', methods=['POST'])
+def move_now(torrent_name):
+    """Queue a completed download's library copy ahead of everything else on its volume"""
+    try:
+        snapshot = transfer_snapshots.get()
+        row = next((r for r in snapshot.rows if r.name == torrent_name), None)
+        intent = bind_intent_for_row(row) if row else find_intent_for_name(torrent_name)
+        if not intent:
+            return jsonify({"success": False, "msg": "No intent tracked for this download"}), 404
+        if not intent.get('target_path'):
+            return jsonify({"success": False, "msg": "No target path set for this download"}), 400
+        job = enqueue_copy(intent, priority=MOVE_NOW_PRIORITY, force=True)
+        # Same-volume moves are a rename; give quick jobs a moment to report the final state
+        deadline = time.time() + MOVE_NOW_WAIT
+        while job['state'] in ACTIVE_STATES and time.time() < deadline:
+            time.sleep(0.1)
+            job = copy_jobs.get(job['id']) or job
+        if job['state'] == JOB_FAILED:
+            return jsonify({"success": False, "msg": job['error'], "job": copy_job_entry(job)}), 500
+        done = job['state'] == JOB_DONE
+        return jsonify({
+            "success": True,
+            "moved_to": job['dest'],
+            "msg": f"{'Moved' if done else 'Queued move'} to {job['dest']}",
+            "job": copy_job_entry(job)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "msg": str(e)}), 500
+
 @app.route('/api/downloads/auto-manage', methods=['POST'])
 def auto_manage_downloads():
     """Automatically stop and remove torrents that reach 2.0 ratio or upload 2x the download size via Tixati"""
     try:
-        # Fetch transfers from Tixati
-        resp = requests.get(f"{TIXATI_BASE}/transfers")
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        table = soup.find('table', class_='xferslist')
+        # Read transfers from the shared snapshot
+        snapshot = transfer_snapshots.get()
+        if snapshot.error:
+            raise RuntimeError(snapshot.error)
         removed = []
-        if table:
-            rows = table.find_all('tr')[1:]
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 9:
-                    continue
-                # Parse columns (this is simplified - actual removal via Tixati UI would require more complex logic)
-                # For now, just return success to avoid errors
+        for row in snapshot.rows:
+            # Parse columns (this is simplified - actual removal via Tixati UI would require more complex logic)
+            # For now, just return success to avoid errors
+            pass
         return jsonify({"success": True, "removed": removed, "count": len(removed)})
     except Exception as e:
         print(f"[Auto-Manage Error] Failed to connect to Tixati. {str(e)}")
@@ -1422,29 +2805,20 @@ def auto_manage_downloads():
 def remove_download(torrent_name):
     """Remove a torrent from Tixati by name (backend maps to hash/checkbox name)"""
     try:
-        # Fetch the transfers page and map names to checkbox hashes
-        resp = requests.get(f"{TIXATI_BASE}/transfers")
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        table = soup.find('table', class_='xferslist')
-        hash_to_name = {}
-        if table:
-            rows = table.find_all('tr')[1:]
-            for row in rows:
-                cols = row.find_all('td')
-                if len(cols) < 2:
-                    continue
-                checkbox = cols[0].find('input', {'type': 'checkbox'})
-                name = cols[1].get_text(strip=True)
-                if checkbox and 'name' in checkbox.attrs:
-                    hash_to_name[name] = checkbox['name']
+        # Map names to checkbox hashes from the shared snapshot
+        snapshot = transfer_snapshots.get()
+        if snapshot.error:
+            raise RuntimeError(snapshot.error)
+        hash_to_name = {row.name: row.checkbox_id for row in snapshot.rows if row.checkbox_id}
         # Find the hash for the given name
         hash_val = hash_to_name.get(torrent_name)
         if not hash_val:
             return jsonify({"success": False, "msg": "Torrent not found"}), 404
         # Send the remove POST
         post_data = {'remove': 'Remove', hash_val: 'on'}
-        resp2 = requests.post(f"{TIXATI_BASE}/transfers/action", data=post_data)
+        resp2 = tixati.transfer_action(post_data)
         if resp2.status_code == 200:
+            transfer_snapshots.refresh()
             return jsonify({"success": True})
         else:
             return jsonify({"success": False, "msg": resp2.text}), 500
@@ -1452,6 +2826,25 @@ def remove_download(torrent_name):
         return jsonify({"success": False, "msg": str(e)}), 500
 
 
+@app.route('/api/stream')
+def event_stream():
+    """Server-Sent Events: changed transfer rows ('transfers') and stat samples ('stats')
+
+    Clients get the full transfer state on connect, then deltas. A delta whose
+    version is not newer than the full state can be ignored.
+    """
+    q = broadcaster.subscribe()
+    transfer_snapshots.wake()  # drop out of idle backoff now that someone is watching
+    initial = [('transfers', full_transfer_state(transfer_snapshots.get()))]
+    if latest_stats:
+        initial.append(('stats', latest_stats))
+    return Response(
+        broadcaster.stream(q, initial),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/library', methods=['POST', 'DELETE'])
 def manage_library():
     if request.method == 'POST':
@@ -1469,13 +2862,12 @@ if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5050, debug=True)
 
 
-from flask import Response
 
 @app.route('/bandwidth')
 def bandwidth_html():
     # Scrape bandwidth from Tixati WebUI
     try:
-        resp = requests.get(f"{TIXATI_BASE}/bandwidth")
+        resp = tixati.bandwidth_page()
         return Response(resp.text, mimetype='text/html')
     except Exception as e:
         return Response(f'<table><tr><td id="inrate">0 B/s</td><td id="outrate">0 B/s</td></tr></table>', mimetype='text/html')
@@ -1484,7 +2876,7 @@ def bandwidth_html():
 def transfers_html():
     # Proxy Tixati's transfers HTML
     try:
-        resp = requests.get(f"{TIXATI_BASE}/transfers")
+        resp = tixati.transfers_page()
         return Response(resp.text, mimetype='text/html')
     except Exception as e:
         return Response('<div>Error loading transfers</div>', mimetype='text/html')
@@ -1494,7 +2886,7 @@ def transfer_details_html(torrent_hash, subpage):
     # subpage: files, trackers, peers, eventlog
     # Proxy to Tixati's transfer details pages
     try:
-        resp = requests.get(f"{TIXATI_BASE}/transfers/{torrent_hash}/{subpage}")
+        resp = tixati.transfer_page(torrent_hash, subpage)
         if resp.status_code == 200:
             return Response(resp.text, mimetype='text/html')
         else:
@@ -1507,7 +2899,7 @@ def transfer_details_html(torrent_hash, subpage):
 def transfers_action():
     # Proxy POST actions to Tixati WebUI
     try:
-        resp = requests.post(f"{TIXATI_BASE}/transfers/action", data=request.form)
+        resp = tixati.transfer_action(request.form)
         if resp.status_code == 200:
             return Response(resp.text, mimetype='text/html')
         else:
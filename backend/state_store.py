@@ -0,0 +1,199 @@
+"""
+SQLite State Store
+Intents, the batch queue, the TV library index and the copy and temp
+deletion queues are kept one row per entry in a SQLite database in WAL mode,
+so adding, editing or removing an entry writes that row instead of rewriting
+the whole config file. The JSON config keeps the settings and stays the
+import/export format for these collections. Row changes are grouped: they
+queue up until commit() writes them all in one transaction.
+"""
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# collection -> (table, {indexed column: entry field})
+COLLECTIONS = {
+    "intents": ("intents", {"magnet": "magnet", "infohash": "infohash", "name_hint": "name_hint"}),
+    "batch": ("batch_items", {"magnet": "magnet"}),
+    "library_index": ("library_index", {"series": "series", "series_path": "seriesPath"}),
+    "copy_jobs": ("copy_jobs", {"state": "state"}),
+    "pending_deletions": ("pending_deletions", {}),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS intents (
+    scope TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    magnet TEXT,
+    infohash TEXT,
+    name_hint TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS intents_infohash ON intents (infohash);
+CREATE INDEX IF NOT EXISTS intents_name_hint ON intents (name_hint);
+
+CREATE TABLE IF NOT EXISTS batch_items (
+    scope TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    magnet TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS batch_items_magnet ON batch_items (magnet);
+
+CREATE TABLE IF NOT EXISTS library_index (
+    scope TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    series TEXT,
+    series_path TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE INDEX IF NOT EXISTS library_index_series ON library_index (scope, series, series_path);
+
+CREATE TABLE IF NOT EXISTS copy_jobs (
+    scope TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    state TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+
+CREATE TABLE IF NOT EXISTS pending_deletions (
+    scope TEXT NOT NULL DEFAULT '',
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class StateStore:
+    """Row-per-entry storage for the config collections
+
+    Every collection is a table of JSON rows ordered by insertion (rowid);
+    updating a row keeps its place. scope splits a collection, e.g. the
+    library index per category. put/delete/replace queue their statements
+    until commit() (reads commit first). One connection is shared behind a
+    lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []  # (sql, params) waiting for commit()
+        self._commit_lock = threading.Lock()  # keeps concurrent commits in queue order
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.commit()
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def commit(self):
+        """Write every queued change in one transaction (group commit)"""
+        with self._commit_lock:
+            with self._lock:
+                statements, self._pending = self._pending, []
+            if statements:
+                try:
+                    self._write(statements)
+                except Exception:
+                    with self._lock:
+                        self._pending[:0] = statements  # keep them for the next commit
+                    raise
+
+    def _queue(self, statements: Iterable):
+        with self._lock:
+            self._pending.extend(statements)
+
+    @staticmethod
+    def _columns(collection: str, key: str, entry: dict, scope: str):
+        _, indexed = COLLECTIONS[collection]
+        return [scope, key] + [entry.get(field) for field in indexed.values()] + [
+            json.dumps(entry, ensure_ascii=False)]
+
+    @staticmethod
+    def _upsert_sql(collection: str) -> str:
+        table, indexed = COLLECTIONS[collection]
+        columns = ["scope", "key"] + list(indexed) + ["data"]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[2:])
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (scope, key) DO UPDATE SET {updates}")
+
+    def _write(self, statements: Iterable):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, collection: str, key: str, entry: dict, scope: str = ''):
+        """Insert or update one entry (an update keeps its position)"""
+        self._queue([(self._upsert_sql(collection), self._columns(collection, key, entry, scope))])
+
+    def delete(self, collection: str, keys: Iterable[str], scope: str = ''):
+        """Remove entries by key"""
+        table = COLLECTIONS[collection][0]
+        self._queue((f"DELETE FROM {table} WHERE scope = ? AND key = ?", (scope, key)) for key in keys)
+
+    def replace(self, collection: str, entries: List[dict], keys: List[str], scope: str = ''):
+        """Swap a whole collection (or one scope of it) in one transaction
+
+        A repeated key keeps its first position and its last entry, the same
+        rule as KeyedCollection.replace(), so the rows match what memory holds.
+        """
+        table = COLLECTIONS[collection][0]
+        sql = self._upsert_sql(collection)
+        rows: Dict[str, dict] = {}
+        for key, entry in zip(keys, entries):
+            rows[key] = entry
+        self._queue([(f"DELETE FROM {table} WHERE scope = ?", (scope,))] +
+                    [(sql, self._columns(collection, key, entry, scope)) for key, entry in rows.items()])
+
+    def entries(self, collection: str, scope: Optional[str] = None) -> Dict[str, List[dict]]:
+        """Entries per scope in insertion order (only the given scope if set)"""
+        self.commit()
+        table = COLLECTIONS[collection][0]
+        sql, params = f"SELECT scope, data FROM {table}", ()
+        if scope is not None:
+            sql, params = sql + " WHERE scope = ?", (scope,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY rowid", params).fetchall()
+        result: Dict[str, List[dict]] = {}
+        for row_scope, data in rows:
+            result.setdefault(row_scope, []).append(json.loads(data))
+        return result
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def queue_meta(self, key: str, value: str):
+        """Set a meta value with the next commit(), in the same transaction as the queued rows"""
+        self._queue([("INSERT INTO meta (key, value) VALUES (?, ?) "
+                      "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value))])
+
+    def set_meta(self, key: str, value: str):
+        """Set a meta value now (committing anything queued before it)"""
+        self.queue_meta(key, value)
+        self.commit()
@@ -0,0 +1,25 @@
+"""
+Shared test setup: the backend modules are flat files next to run_local_app.py,
+so their folder goes on sys.path. Run the suite from backend/ with
+``python -m pytest -q``.
+"""
+import os
+import re
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+DUMP_FILE = os.path.join(BACKEND_DIR, 'tixati_webui_dump.html')
+
+
+@pytest.fixture(scope='session')
+def webui_pages():
+    """The captured Tixati WebUI pages, keyed by path ("/transfers", "/transfers/<id>/files", ...)"""
+    with open(DUMP_FILE, 'r', encoding='utf-8') as f:
+        dump = f.read()
+    parts = re.split(r'<!-- http://[^/]+(/\S*) -->', dump)
+    return dict(zip(parts[1::2], parts[2::2]))
@@ -0,0 +1,109 @@
+"""Coalescing writer: one write per burst, flush() as the barrier, retry after a failed write"""
+import threading
+import time
+
+from coalescing_writer import CoalescingWriter
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_a_burst_of_changes_is_one_write():
+    state = {'value': 0}
+    written = []
+    writer = CoalescingWriter(lambda: written.append(state['value']), delay=0.1)
+
+    for value in range(1, 51):
+        state['value'] = value
+        writer.mark_dirty()
+
+    assert wait_for(lambda: writer.writes == 1)
+    time.sleep(0.2)
+    assert written == [50]
+    assert not writer.dirty
+
+
+def test_flush_writes_at_once_and_only_when_dirty():
+    written = []
+    writer = CoalescingWriter(lambda: written.append(len(written)), delay=60)  # the window never ends here
+
+    assert writer.flush() is True
+    assert written == []
+
+    writer.mark_dirty()
+    assert writer.flush() is True  # e.g. at shutdown, without waiting out the window
+    assert written == [0]
+    assert writer.flush() is True
+    assert written == [0]
+
+
+def test_failed_write_stays_dirty_and_is_retried(capsys):
+    failures = [RuntimeError('disk full')]
+    written = []
+
+    def write():
+        if failures:
+            raise failures.pop()
+        written.append(True)
+    writer = CoalescingWriter(write, delay=60, name='Cfg')
+
+    writer.mark_dirty()
+    assert writer.flush() is False  # the error is reported to the caller as unsaved state
+    assert writer.dirty
+    assert '[Cfg] Write failed' in capsys.readouterr().out
+    assert writer.writes == 0
+
+    assert writer.flush() is True
+    assert written == [True] and writer.writes == 1
+
+
+def test_background_retry_after_failure():
+    attempts = []
+
+    def write():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise OSError('locked')
+    writer = CoalescingWriter(write, delay=0.05)
+
+    writer.mark_dirty()
+
+    assert wait_for(lambda: writer.writes == 1)
+    assert len(attempts) == 2 and not writer.dirty
+
+
+def test_flush_waits_for_a_running_write_and_then_writes_later_changes():
+    state = {'value': 1}
+    written = []
+    started, release = threading.Event(), threading.Event()
+
+    def write():
+        value = state['value']
+        if not written:
+            started.set()
+            release.wait(5)
+        written.append(value)
+    writer = CoalescingWriter(write, delay=0.01)
+
+    writer.mark_dirty()
+    assert started.wait(5)  # the background write has read value 1 and is still running
+    state['value'] = 2
+    writer.mark_dirty()
+
+    flushed = []
+    flusher = threading.Thread(target=lambda: flushed.append(writer.flush()))
+    flusher.start()
+    time.sleep(0.1)
+    assert flushed == []  # a flush never overtakes the write in progress
+
+    release.set()
+    flusher.join(5)
+    # Once flush() returns, the change made during the first write is on disk too
+    assert flushed == [True]
+    assert written == [1, 2]
@@ -0,0 +1,107 @@
+"""Copy-on-write config versions: drafts never change the published version"""
+import random
+
+from config_snapshot import ConfigDraft
+from keyed_collection import KeyedCollection
+
+
+def by_id(*entries):
+    return KeyedCollection(lambda e: e['id'], {'magnet': lambda e: e.get('magnet')}, entries)
+
+
+def published():
+    return {'rate': 1,
+            'batch': by_id({'id': 'a', 'magnet': 'm'}),
+            'intents': by_id({'id': 'i'}),
+            'library_index': {'show': by_id({'id': 's'}), 'movie': by_id({'id': 'f'})}}
+
+
+def test_set_leaves_the_published_version_alone():
+    base = published()
+    draft = ConfigDraft(base)
+
+    draft.set('rate', 5)
+
+    assert draft.get('rate') == 5 and base['rate'] == 1
+    assert draft.settings_changed and not draft.entries_changed
+    assert draft.data['batch'] is base['batch']  # untouched collections are shared
+
+
+def test_collection_is_copied_once_per_draft():
+    base = published()
+    draft = ConfigDraft(base)
+
+    batch = draft.collection('batch')
+    batch.put({'id': 'b', 'magnet': 'm'})
+    batch.remove('a')
+
+    assert draft.collection('batch') is batch
+    assert draft.entries_changed and not draft.settings_changed
+    assert [e['id'] for e in base['batch']] == ['a'] and base['batch'].first('magnet', 'm')['id'] == 'a'
+    assert [e['id'] for e in draft.data['batch']] == ['b']
+    assert draft.data['intents'] is base['intents']
+
+
+def test_scoped_collection_copies_only_its_scope():
+    base = published()
+    draft = ConfigDraft(base)
+
+    draft.collection('library_index', 'show').put({'id': 's2'})
+    draft.collection('library_index', 'anime', lambda: by_id()).put({'id': 'x'})
+
+    assert sorted(draft.data['library_index']) == ['anime', 'movie', 'show']
+    assert draft.data['library_index']['movie'] is base['library_index']['movie']
+    assert len(draft.data['library_index']['show']) == 2 and len(base['library_index']['show']) == 1
+    assert 'anime' not in base['library_index']
+
+
+def test_an_edit_shares_the_shards_it_does_not_write():
+    base = published()
+    base['batch'] = by_id(*({'id': n, 'magnet': f'm{n}'} for n in range(5000)))
+    draft = ConfigDraft(base)
+
+    draft.collection('batch').put({'id': 42, 'magnet': 'changed'})
+
+    old, new = base['batch'], draft.data['batch']
+    unshared = sum(a is not b for a, b in zip(old._entries._shards, new._entries._shards))
+    assert unshared == 1
+    assert sum(a is not b for a, b in zip(old._pages, new._pages)) == 1
+    assert old.get(42)['magnet'] == 'm42' and new.get(42)['magnet'] == 'changed'
+    assert old.first('magnet', 'changed') is None and new.first('magnet', 'm42') is None
+
+
+def test_versions_never_change_after_publishing():
+    rng = random.Random(7)
+    config = {'batch': by_id()}
+    versions = []
+    for step in range(300):
+        draft = ConfigDraft(config)
+        batch = draft.collection('batch')
+        for _ in range(rng.randrange(1, 20)):
+            key, roll = rng.randrange(400), rng.random()
+            if roll < 0.5:
+                batch.put({'id': key, 'magnet': f'm{rng.randrange(30)}', 'step': step})
+            elif roll < 0.7:
+                batch.append({'id': key, 'step': step})
+            else:
+                batch.remove(key)
+        versions.append((config, config['batch'].to_list(),
+                         {m: config['batch'].find('magnet', m) for m in ('m0', 'm1', 'm2')}))
+        config = draft.data
+
+    for version, entries, found in versions:
+        assert version['batch'].to_list() == entries
+        assert len(version['batch']) == len(entries)
+        assert {m: version['batch'].find('magnet', m) for m in found} == found
+        assert all(version['batch'].get(e['id']) is e for e in entries)
+
+
+def test_copies_are_independent_both_ways():
+    original = by_id({'id': 'a', 'magnet': 'm'})
+    clone = original.copy()
+
+    original.put({'id': 'b', 'magnet': 'm'})
+    clone.put({'id': 'c', 'magnet': 'm'})
+
+    assert [e['id'] for e in original.find('magnet', 'm')] == ['a', 'b']
+    assert [e['id'] for e in clone.find('magnet', 'm')] == ['a', 'c']
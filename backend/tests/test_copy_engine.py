@@ -0,0 +1,275 @@
+"""Library placement: strategies and their fallbacks, resume, verification"""
+import os
+
+import pytest
+
+import copy_engine
+from copy_engine import (STRATEGY_COPY, STRATEGY_HARDLINK, STRATEGY_RENAME, STRATEGY_RESUMED, VERIFY_FULL,
+                         VERIFY_SAMPLE, VERIFY_SIZE, CopyJournal, CopyProgress, CopyVerificationError, place_tree)
+
+
+def make_tree(root, files):
+    for rel, data in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return str(root)
+
+
+def read_tree(root):
+    tree = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            with open(path, 'rb') as f:
+                tree[os.path.relpath(path, root).replace(os.sep, '/')] = f.read()
+    return tree
+
+
+FILES = {'a.mkv': b'a' * 5000, 'sub/b.srt': b'b' * 300, 'sub/c.nfo': b'c' * 10}
+
+
+@pytest.fixture
+def cross_volume(monkeypatch):
+    """Treat source and destination as different disks"""
+    monkeypatch.setattr(copy_engine, 'same_volume', lambda src, dest: False)
+
+
+def test_same_volume_renames(tmp_path):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    progress = CopyProgress('Show')
+
+    assert place_tree(src, dest, progress=progress) == STRATEGY_RENAME
+    assert read_tree(dest) == FILES and not os.path.exists(src)
+    assert progress.files_done == progress.files_total == 3
+
+
+def test_seeding_source_is_hardlinked(tmp_path):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+
+    assert place_tree(src, dest, keep_source=True) == STRATEGY_HARDLINK
+    assert read_tree(dest) == read_tree(src) == FILES
+    assert os.path.samefile(os.path.join(src, 'a.mkv'), os.path.join(dest, 'a.mkv'))
+
+
+def test_hardlink_failure_falls_back_to_copy(tmp_path, monkeypatch):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+
+    def refuse(*args):
+        raise OSError('links not supported')
+    monkeypatch.setattr(os, 'link', refuse)
+
+    assert place_tree(src, dest, keep_source=True) != STRATEGY_HARDLINK
+    assert read_tree(dest) == read_tree(src) == FILES
+    assert not os.path.samefile(os.path.join(src, 'a.mkv'), os.path.join(dest, 'a.mkv'))
+
+
+def test_cross_volume_copies_with_metadata(tmp_path, cross_volume):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    os.utime(os.path.join(src, 'a.mkv'), ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    progress = CopyProgress('Show')
+
+    strategy = place_tree(src, dest, progress=progress)
+
+    assert set(strategy.split('+')) <= {STRATEGY_COPY, 'copy_file_range', 'sendfile', 'reflink'}
+    assert read_tree(dest) == FILES and read_tree(src) == FILES
+    assert os.stat(os.path.join(dest, 'a.mkv')).st_mtime_ns == 1_600_000_000_000_000_000
+    assert progress.bytes_done == progress.bytes_total == sum(len(d) for d in FILES.values())
+    assert progress.state == 'done' and progress.files_verified == 3
+
+
+def test_single_file_source(tmp_path, cross_volume):
+    src = make_tree(tmp_path / 'temp', {'movie.mkv': b'm' * 2048})
+    dest = str(tmp_path / 'lib' / 'movie.mkv')
+
+    place_tree(os.path.join(src, 'movie.mkv'), dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == b'm' * 2048
+
+
+def test_resume_skips_journaled_files(tmp_path, cross_volume):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = make_tree(tmp_path / 'lib' / 'Show', {'a.mkv': b'x' * 5000})  # same size, different data and mtime
+    journal_path = str(tmp_path / 'jobs' / 'show.journal')
+    journal = CopyJournal(journal_path)
+    journal.record('a.mkv', os.stat(os.path.join(src, 'a.mkv')))
+    journal.close()
+    progress = CopyProgress('Show')
+
+    place_tree(src, dest, progress=progress, journal=CopyJournal(journal_path))
+
+    placed = read_tree(dest)
+    assert placed['a.mkv'] == b'x' * 5000  # journaled as done, so not copied again
+    assert placed['sub/b.srt'] == FILES['sub/b.srt'] and placed['sub/c.nfo'] == FILES['sub/c.nfo']
+    assert progress.files_done == 3 and progress.bytes_done == progress.bytes_total
+    assert len(CopyJournal(journal_path)) == 3
+
+
+def test_resume_without_journal_matches_size_and_mtime(tmp_path, cross_volume):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = make_tree(tmp_path / 'lib' / 'Show', {'a.mkv': b'x' * 5000, 'sub/b.srt': b'y' * 300})
+    src_stat = os.stat(os.path.join(src, 'a.mkv'))
+    os.utime(os.path.join(dest, 'a.mkv'), ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+
+    place_tree(src, dest)
+
+    placed = read_tree(dest)
+    assert placed['a.mkv'] == b'x' * 5000  # looks like a finished copy (copystat gave it the mtime)
+    assert placed['sub/b.srt'] == FILES['sub/b.srt']  # same size, other mtime: copied again
+
+
+def test_everything_in_place_is_resumed(tmp_path, cross_volume):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    journal_path = str(tmp_path / 'show.journal')
+    place_tree(src, dest, journal=CopyJournal(journal_path))
+
+    assert place_tree(src, dest, journal=CopyJournal(journal_path)) == STRATEGY_RESUMED
+
+
+def test_journal_ignores_a_torn_tail_and_keeps_appending(tmp_path):
+    path = str(tmp_path / 'job.journal')
+    journal = CopyJournal(path)
+    stat = os.stat(make_tree(tmp_path, {'f': b'data'}) + '/f')
+    journal.record('one', stat)
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"file": "two", "si')  # crash mid-append
+
+    journal = CopyJournal(path)
+    assert len(journal) == 1
+    journal.record('three', stat)
+    journal.close()
+
+    reloaded = CopyJournal(path)
+    assert len(reloaded) == 2 and reloaded.is_done('three', stat)
+    reloaded.discard()
+    assert not os.path.exists(path)
+
+
+def test_partial_rename_is_rolled_back_before_copying(tmp_path, monkeypatch):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    os.makedirs(dest)  # exists, so the files are moved one by one
+    real_replace, calls = os.replace, []
+
+    def flaky_replace(a, b):
+        calls.append((a, b))
+        if len(calls) == 2:
+            raise PermissionError('file in use')
+        real_replace(a, b)
+    monkeypatch.setattr(os, 'replace', flaky_replace)
+
+    strategy = place_tree(src, dest)
+
+    assert strategy != STRATEGY_RENAME
+    assert calls[2] == (calls[0][1], calls[0][0])  # the first file was moved back
+    assert read_tree(src) == FILES and read_tree(dest) == FILES
+
+
+def test_failed_rollback_stops_the_placement(tmp_path, monkeypatch):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    os.makedirs(dest)
+    real_replace, calls = os.replace, []
+
+    def flaky_replace(a, b):
+        calls.append((a, b))
+        if len(calls) >= 2:
+            raise PermissionError('file in use')
+        real_replace(a, b)
+    monkeypatch.setattr(os, 'replace', flaky_replace)
+
+    with pytest.raises(RuntimeError, match='could not be moved back'):
+        place_tree(src, dest)
+    assert len(read_tree(src)) + len(read_tree(dest)) == len(FILES)  # nothing copied over the split tree
+
+
+@pytest.fixture
+def corrupt_copies(monkeypatch, cross_volume):
+    """Damage each copied file after it is written; set corrupt_copies['damage'] to a function of the dest file"""
+    state = {'damage': None}
+    monkeypatch.setattr(copy_engine, '_try_reflink', lambda fsrc, fdst: False)  # reflinks skip verification
+    for name in ('_kernel_copy', '_buffered_copy'):
+        def damaged(*args, _real=getattr(copy_engine, name), **kwargs):
+            result = _real(*args, **kwargs)
+            if state['damage']:
+                args[1].flush()
+                state['damage'](args[1])
+            return result
+        monkeypatch.setattr(copy_engine, name, damaged)
+    # Compare only the first and last 16 bytes in sample mode
+    monkeypatch.setattr(copy_engine, 'VERIFY_SAMPLES', 2)
+    monkeypatch.setattr(copy_engine, 'VERIFY_SAMPLE_SIZE', 16)
+    return state
+
+
+def flip_byte(offset):
+    def damage(fdst):
+        fdst.seek(offset)
+        fdst.write(b'Z')
+        fdst.flush()
+    return damage
+
+
+def truncate(fdst):
+    fdst.truncate(fdst.tell() - 1)
+
+
+@pytest.mark.parametrize('verify', [VERIFY_SIZE, VERIFY_SAMPLE, VERIFY_FULL])
+def test_good_copies_pass_every_mode(tmp_path, corrupt_copies, verify):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    progress = CopyProgress('Show')
+
+    place_tree(src, dest, progress=progress, verify=verify)
+
+    assert read_tree(dest) == FILES
+    assert progress.verify_mode == verify and progress.files_verified == 3 and not progress.verify_failures
+
+
+@pytest.mark.parametrize('verify, damage, caught', [
+    (VERIFY_SIZE, truncate, True),
+    (VERIFY_SIZE, flip_byte(0), False),
+    (VERIFY_SAMPLE, flip_byte(0), True),
+    (VERIFY_SAMPLE, flip_byte(2500), False),  # between the sampled blocks
+    (VERIFY_FULL, flip_byte(2500), True),
+])
+def test_damaged_copies(tmp_path, corrupt_copies, verify, damage, caught):
+    src = make_tree(tmp_path / 'temp', {'movie.mkv': bytes(range(256)) * 20})
+    dest = str(tmp_path / 'lib' / 'movie.mkv')
+    corrupt_copies['damage'] = damage
+    progress = CopyProgress('movie')
+
+    if not caught:
+        place_tree(os.path.join(src, 'movie.mkv'), dest, progress=progress, verify=verify)
+        assert progress.state == 'done'
+        with open(dest, 'rb') as f:
+            assert f.read() != bytes(range(256)) * 20  # the damage got through unseen
+        return
+    with pytest.raises(CopyVerificationError):
+        place_tree(os.path.join(src, 'movie.mkv'), dest, progress=progress, verify=verify)
+    assert not os.path.exists(dest)  # a retry must not take the bad copy for a finished one
+    assert progress.state == 'failed' and len(progress.verify_failures) == 1
+    assert os.path.exists(os.path.join(src, 'movie.mkv'))
+
+
+def test_verify_failure_is_not_journaled(tmp_path, corrupt_copies):
+    src = make_tree(tmp_path / 'temp' / 'Show', FILES)
+    dest = str(tmp_path / 'lib' / 'Show')
+    journal_path = str(tmp_path / 'show.journal')
+    corrupt_copies['damage'] = truncate
+
+    with pytest.raises(CopyVerificationError):
+        place_tree(src, dest, journal=CopyJournal(journal_path), verify=VERIFY_SAMPLE)
+    assert len(CopyJournal(journal_path)) == 0
+
+    corrupt_copies['damage'] = None
+    place_tree(src, dest, journal=CopyJournal(journal_path), verify=VERIFY_SAMPLE)
+    assert read_tree(dest) == FILES
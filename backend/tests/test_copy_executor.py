@@ -0,0 +1,165 @@
+"""Persistent per-volume copy job queue"""
+import threading
+import time
+
+import pytest
+
+import copy_executor
+from copy_executor import (JOB_CANCELLED, JOB_COPYING, JOB_DONE, JOB_FAILED, JOB_QUEUED, CopyJobQueue, CopyMoved)
+
+
+class Store:
+    """Keyed job rows, like the manager's copy_jobs collection"""
+
+    def __init__(self, jobs=()):
+        self.jobs = {job['id']: dict(job) for job in jobs}
+        self.saves = 0
+
+    def save(self, job):
+        self.jobs[job['id']] = job
+        self.saves += 1
+
+    def remove(self, job_ids):
+        for job_id in job_ids:
+            self.jobs.pop(job_id, None)
+
+    def load(self):
+        return [dict(job) for job in self.jobs.values()]
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def make_queue(store, run, **kwargs):
+    return CopyJobQueue(run=run, load=store.load, save=store.save, remove=store.remove, **kwargs)
+
+
+def test_jobs_run_in_priority_order_and_persist_each_change(tmp_path):
+    store = Store()
+    gate, order = threading.Event(), []
+
+    def run(job):
+        if job['id'] == 'blocker':
+            gate.wait(5)
+        order.append(job['id'])
+        return {'dest': job['dest'] + '/placed'}
+
+    queue = make_queue(store, run)
+    queue.enqueue('blocker', 'k0', 'Blocker', str(tmp_path))
+    assert wait_for(lambda: queue.get('blocker')['state'] == JOB_COPYING)
+    queue.enqueue('low', 'k1', 'Low', str(tmp_path), priority=1)
+    queue.enqueue('high', 'k2', 'High', str(tmp_path), priority=5)
+    gate.set()
+
+    assert wait_for(lambda: all(j['state'] == JOB_DONE for j in queue.list()))
+    assert order == ['blocker', 'high', 'low']
+    assert store.jobs['high']['state'] == JOB_DONE
+    assert store.jobs['high']['dest'] == str(tmp_path) + '/placed'
+    assert store.jobs['high']['attempts'] == 1
+
+
+def test_failed_job_records_the_error_and_can_be_retried(tmp_path):
+    store = Store()
+    attempts = []
+
+    def run(job):
+        attempts.append(job['id'])
+        if len(attempts) == 1:
+            raise OSError('disk full')
+
+    queue = make_queue(store, run)
+    queue.enqueue('j', 'k', 'Job', str(tmp_path))
+    assert wait_for(lambda: queue.get('j')['state'] == JOB_FAILED)
+    assert store.jobs['j']['error'] == 'disk full'
+
+    queue.retry('j')
+    assert wait_for(lambda: queue.get('j')['state'] == JOB_DONE)
+    assert store.jobs['j']['attempts'] == 2 and store.jobs['j']['error'] is None
+
+
+def test_restart_requeues_interrupted_jobs(tmp_path):
+    store = Store([{'id': 'j', 'key': 'k', 'name': 'Job', 'dest': str(tmp_path), 'volume': 'v',
+                    'state': JOB_COPYING, 'priority': 0, 'seq': 7, 'attempts': 1, 'error': None,
+                    'created_at': 1, 'updated_at': 1}])
+
+    queue = make_queue(store, lambda job: None)
+
+    assert queue.get('j')['state'] == JOB_QUEUED
+    queue.enqueue('next', 'k2', 'Next', str(tmp_path))
+    assert queue.get('next')['seq'] == 8
+
+
+def test_cancel_queued_job_and_enqueue_keeps_it_cancelled(tmp_path):
+    store = Store()
+    gate = threading.Event()
+    queue = make_queue(store, lambda job: gate.wait(5) and None)
+    queue.enqueue('busy', 'k0', 'Busy', str(tmp_path))
+    queue.enqueue('j', 'k', 'Job', str(tmp_path))
+
+    assert queue.cancel('j')
+    assert store.jobs['j']['state'] == JOB_CANCELLED
+    assert queue.enqueue('j', 'k', 'Job', str(tmp_path))['state'] == JOB_CANCELLED
+    assert queue.enqueue('j', 'k', 'Job', str(tmp_path), force=True)['state'] == JOB_QUEUED
+    assert not queue.cancel('missing')
+    gate.set()
+
+
+def test_finished_jobs_are_pruned_from_the_store(tmp_path):
+    store = Store()
+    queue = make_queue(store, lambda job: None, keep_finished=2)
+    for n in range(4):
+        queue.enqueue(f'j{n}', 'k', f'Job {n}', str(tmp_path))
+        assert wait_for(lambda: queue.get(f'j{n}') and queue.get(f'j{n}')['state'] == JOB_DONE)
+
+    assert sorted(store.jobs) == ['j2', 'j3']
+    assert [job['id'] for job in queue.list()] == ['j3', 'j2']
+
+
+def test_active_job_only_raises_priority(tmp_path):
+    store = Store()
+    gate = threading.Event()
+    queue = make_queue(store, lambda job: gate.wait(5) and None)
+    queue.enqueue('busy', 'k0', 'Busy', str(tmp_path))
+    queue.enqueue('j', 'k', 'Job', str(tmp_path), priority=3)
+
+    assert queue.enqueue('j', 'k', 'Job', str(tmp_path), priority=1)['priority'] == 3
+    assert queue.enqueue('j', 'k', 'Job', str(tmp_path), priority=9)['priority'] == 9
+    assert queue.reprioritize('j', 2)['priority'] == 2
+    assert store.jobs['j']['priority'] == 2
+    assert queue.reprioritize('missing', 1) is None
+    gate.set()
+
+
+@pytest.mark.parametrize('configured, expected', [({}, 1), ({'DEV:1': 3}, 3)])
+def test_workers_per_volume(configured, expected):
+    queue = CopyJobQueue(run=lambda job: None, load=list, save=lambda job: None, remove=lambda ids: None,
+                         per_volume=configured)
+
+    assert queue.workers_for('dev:1') == expected
+
+
+def test_moved_job_runs_on_its_new_volume(monkeypatch):
+    monkeypatch.setattr(copy_executor, 'volume_of', lambda path: path.split('/')[1])
+    store, runs = Store(), []
+
+    def run(job):
+        runs.append((job['volume'], threading.current_thread().name))
+        if job['volume'] == 'full':
+            raise CopyMoved('/spare/Movie')
+        return {'dest': job['dest']}
+
+    queue = make_queue(store, run)
+    queue.enqueue('j1', 'k1', 'Movie', '/full/Movie')
+
+    assert wait_for(lambda: queue.get('j1')['state'] == JOB_DONE)
+    job = queue.get('j1')
+    assert (job['volume'], job['dest'], job['error']) == ('spare', '/spare/Movie', None)
+    assert [volume for volume, _ in runs] == ['full', 'spare']
+    assert runs[1][1].startswith('Copy-spare-')
+    assert store.jobs['j1']['volume'] == 'spare'
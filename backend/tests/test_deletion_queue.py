@@ -0,0 +1,71 @@
+"""Background temp deletion queue and its per-item persistence"""
+import os
+import time
+
+from deletion_queue import DELETE_FAILED, DeletionQueue
+
+
+class Store:
+    """Keyed deletion rows, like the manager's pending_deletions collection"""
+
+    def __init__(self, items=()):
+        self.items = {item['path']: dict(item) for item in items}
+
+    def save(self, item):
+        self.items[item['path']] = item
+
+    def remove(self, paths):
+        for path in paths:
+            self.items.pop(path, None)
+
+    def load(self):
+        return list(self.items.values())
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_deleted_paths_leave_the_store(tmp_path):
+    folder = tmp_path / 'Show'
+    (folder / 'sub').mkdir(parents=True)
+    for n in range(5):
+        (folder / 'sub' / f'e{n}.mkv').write_bytes(b'x' * 100)
+    store, freed = Store(), []
+    queue = DeletionQueue(store.load, store.save, store.remove, root=str(tmp_path), on_freed=freed.append)
+
+    assert queue.enqueue(str(folder), 'copied', 500)
+    assert store.items[str(folder)]['reason'] == 'copied'
+    assert not queue.enqueue(str(folder))  # already queued
+    queue.start()
+
+    assert wait_for(lambda: not os.path.exists(folder) and not store.items)
+    assert wait_for(lambda: freed == [str(folder)])
+    assert queue.freed_bytes == 500 and queue.status()['pendingItems'] == 0
+
+
+def test_paths_outside_root_are_refused(tmp_path):
+    store = Store()
+    queue = DeletionQueue(store.load, store.save, store.remove, root=str(tmp_path / 'temp'))
+
+    assert not queue.enqueue(str(tmp_path / 'library' / 'Show'))
+    assert not queue.enqueue(str(tmp_path / 'temp'))
+    assert store.items == {}
+
+
+def test_saved_items_resume_and_failed_ones_wait_for_a_new_enqueue(tmp_path):
+    failed = str(tmp_path / 'Locked')
+    store = Store([{'path': failed, 'reason': 'r', 'state': DELETE_FAILED, 'size': 9, 'attempts': 12,
+                    'error': 'locked', 'queued_at': 1}])
+    queue = DeletionQueue(store.load, store.save, store.remove, root=str(tmp_path))
+
+    assert queue.status()['items'][0]['state'] == DELETE_FAILED
+    assert queue.pending_bytes() == 0
+
+    assert queue.enqueue(failed)
+    assert store.items[failed]['attempts'] == 0 and store.items[failed]['state'] != DELETE_FAILED
@@ -0,0 +1,75 @@
+"""SSE fan-out: every subscriber gets each event once; disconnected or lagging clients are dropped"""
+import json
+
+from event_stream import EventBroadcaster, format_sse
+
+
+def messages(chunks):
+    """(event, data) of each SSE message among the generator's chunks"""
+    result = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            result.append((fields['event'], json.loads(fields['data'])))
+    return result
+
+
+def test_format_sse():
+    assert format_sse('stats', {'cpu': 5}) == 'event: stats\ndata: {"cpu":5}\n\n'
+    assert format_sse('transfers', [], event_id=7) == 'id: 7\nevent: transfers\ndata: []\n\n'
+
+
+def test_each_subscriber_gets_every_event():
+    broadcaster = EventBroadcaster()
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    assert broadcaster.subscriber_count == 2
+
+    broadcaster.publish('stats', {'cpu': 1})
+    broadcaster.publish('transfers', {'version': 2})
+
+    for q in (first, second):
+        assert [q.get_nowait(), q.get_nowait()] == [('stats', {'cpu': 1}), ('transfers', {'version': 2})]
+        assert q.empty()
+
+
+def test_stream_sends_retry_initial_state_then_events():
+    broadcaster = EventBroadcaster()
+    q = broadcaster.subscribe()
+    stream = broadcaster.stream(q, initial=[('transfers', {'full': True})], heartbeat=0.01)
+
+    assert next(stream) == 'retry: 3000\n\n'
+    assert messages([next(stream)]) == [('transfers', {'full': True})]
+    assert next(stream) == ': keep-alive\n\n'  # nothing published within the heartbeat
+    broadcaster.publish('stats', {'ram': 40})
+    assert messages([next(stream)]) == [('stats', {'ram': 40})]
+
+
+def test_disconnect_unsubscribes():
+    broadcaster = EventBroadcaster()
+    q = broadcaster.subscribe()
+    stream = broadcaster.stream(q)
+    next(stream)
+
+    stream.close()  # what the server does when the client goes away
+
+    assert broadcaster.subscriber_count == 0
+    broadcaster.publish('stats', {})
+    assert q.empty()
+
+
+def test_lagging_client_is_closed_and_others_keep_receiving():
+    broadcaster = EventBroadcaster(max_queue=3)
+    slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+    fast_stream = broadcaster.stream(fast, heartbeat=0.01)
+    next(fast_stream)
+
+    received = []
+    for version in range(5):
+        broadcaster.publish('transfers', {'version': version})
+        received.extend(messages([next(fast_stream)]))
+
+    assert [data['version'] for _, data in received] == [0, 1, 2, 3, 4]
+    assert broadcaster.subscriber_count == 1
+    # The slow client's backlog is dropped; its stream ends so it reconnects for a full state
+    slow_stream = broadcaster.stream(slow)
+    assert list(slow_stream) == ['retry: 3000\n\n']
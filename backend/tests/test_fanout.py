@@ -0,0 +1,90 @@
+"""Concurrent source fan-out: per-source deadlines and no pile-up behind a hung source"""
+import threading
+import time
+
+from fanout import SourceFanout
+
+
+def test_sources_run_in_parallel():
+    fanout = SourceFanout()
+
+    def slow(value):
+        def fn():
+            time.sleep(0.2)
+            return value
+        return fn
+
+    started = time.monotonic()
+    results, errors = fanout.gather({name: (slow(name), 2.0) for name in ('a', 'b', 'c')})
+
+    assert results == {'a': 'a', 'b': 'b', 'c': 'c'} and errors == {}
+    assert time.monotonic() - started < 0.5  # the slowest source, not the sum
+
+
+def test_a_late_source_is_left_out_after_its_own_deadline():
+    fanout = SourceFanout()
+    release = threading.Event()
+
+    started = time.monotonic()
+    results, errors = fanout.gather({
+        'fast': (lambda: 1, 1.0),
+        'hung': (lambda: release.wait(5), 0.1),
+    })
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert results == {'fast': 1}
+    assert errors == {'hung': 'timed out after 0.1s'}
+    assert elapsed < 0.5
+
+
+def test_deadlines_count_from_the_start_of_the_gather():
+    fanout = SourceFanout()
+    release = threading.Event()
+
+    started = time.monotonic()
+    results, errors = fanout.gather({
+        'first': (lambda: release.wait(5), 0.2),
+        'second': (lambda: release.wait(5), 0.3),  # waited for after 'first', not 0.3 s more
+    })
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert set(errors) == {'first', 'second'} and not results
+    assert elapsed < 0.45
+
+
+def test_errors_are_reported_per_source():
+    fanout = SourceFanout()
+
+    def broken():
+        raise OSError('nvidia-smi not found')
+
+    results, errors = fanout.gather({'gpu': (broken, 1.0), 'cpu': (lambda: 12.5, 1.0)})
+
+    assert results == {'cpu': 12.5}
+    assert errors == {'gpu': 'nvidia-smi not found'}
+
+
+def test_callers_share_an_inflight_run_instead_of_piling_up():
+    fanout = SourceFanout()
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(True)
+        release.wait(5)
+        return 'late'
+
+    fanout.gather({'tixati': (hung, 0.05)})
+    fanout.gather({'tixati': (hung, 0.05)})
+    assert len(calls) == 1  # the second gather waited on the first run
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while fanout._inflight['tixati'].running() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    results, _ = fanout.gather({'tixati': (hung, 1.0)})
+    assert len(calls) == 2  # once the hung run is done, the next gather starts a new one
+    assert results == {'tixati': 'late'}
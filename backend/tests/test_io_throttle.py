@@ -0,0 +1,136 @@
+"""Library copy throttle: token buckets on a fake clock, and adapting to Tixati's upload rate"""
+import pytest
+
+import io_throttle
+from io_throttle import CopyThrottle, TokenBucket, parse_rate
+
+MB = 1024**2
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances monotonic() at once"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(io_throttle, 'time', clock)
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate('1.5 MB/s') == 1.5 * MB
+    assert parse_rate('512 KB/s') == 512 * 1024
+    assert parse_rate('1,024 B/s') == 1024
+    assert parse_rate('2 MiB/s') == 2 * MB
+    assert parse_rate('') == parse_rate('n/a') == 0
+
+
+def test_bucket_allows_a_burst_then_charges_the_debt(clock):
+    bucket = TokenBucket(10 * MB)
+
+    assert bucket.reserve(10 * MB) == 0  # one second of burst
+    assert bucket.reserve(5 * MB) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.reserve(5 * MB) == pytest.approx(0.5)  # the debt is paid off, this chunk waits
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(MB, burst_seconds=2)
+    bucket.reserve(2 * MB)
+
+    clock.now += 60  # idle for a minute: only two seconds' worth comes back
+
+    assert bucket.reserve(2 * MB) == 0
+    assert bucket.reserve(MB) == pytest.approx(1)
+
+
+def test_unlimited_bucket_never_waits(clock):
+    bucket = TokenBucket(None)
+    assert bucket.reserve(10**12) == 0
+
+    bucket.set_rate(MB)
+    assert bucket.reserve(MB) == pytest.approx(1)  # an unlimited bucket had no saved-up burst
+
+
+def test_job_throttle_sleeps_in_slices_and_can_be_interrupted(clock, tmp_path):
+    throttle = CopyThrottle(global_rate=MB)
+    checks = []
+
+    class Stop(Exception):
+        pass
+
+    def interrupt():
+        checks.append(clock.now)
+        if len(checks) == 3:
+            raise Stop()
+
+    pace = throttle.for_job(str(tmp_path / 'src'), str(tmp_path / 'dest'), interrupt=interrupt)
+    pace(MB)
+    assert clock.sleeps == []
+    pace(MB // 2)
+    assert clock.sleeps == [0.5]
+
+    with pytest.raises(Stop):
+        pace(2 * MB)  # two seconds of debt, checked before each half-second slice
+    assert len(checks) == 3
+
+
+def test_busiest_volume_bucket_sets_the_wait(clock, monkeypatch, tmp_path):
+    monkeypatch.setattr(io_throttle, 'volume_of', lambda path: 'K:' if 'temp' in path else 'D:')
+    throttle = CopyThrottle(per_volume={'k:': {'read': 4 * MB}, 'D:': 2 * MB})
+    pace = throttle.for_job('temp/x', 'lib/x')
+
+    pace(4 * MB)  # within the read bucket's burst; the 2 MB/s write bucket owes a second
+    assert clock.sleeps == [0.5, 0.5]
+    assert throttle.status()['volumes'] == {'K:': {'read': 4.0, 'write': None}, 'D:': {'read': 2.0, 'write': 2.0}}
+
+
+def test_adapt_drops_to_busy_rate_and_ramps_back_when_idle(clock):
+    throttle = CopyThrottle(global_rate=64 * MB, busy_outrate=MB, idle_outrate=256 * 1024, busy_rate=8 * MB)
+    assert throttle.adaptive
+
+    throttle.adapt(parse_rate('3 MB/s'))
+    assert throttle.status()['globalMBps'] == 8.0
+    assert throttle.status()['swarmOutMBps'] == 3.0
+
+    throttle.adapt(512 * 1024)  # between idle and busy: hold
+    assert throttle.status()['globalMBps'] == 8.0
+
+    rates = []
+    for _ in range(4):
+        throttle.adapt(0)
+        rates.append(throttle.status()['globalMBps'])
+    assert rates == [16.0, 32.0, 64.0, 64.0]  # doubles back to the configured cap, no further
+
+
+def test_adapt_without_a_cap_ramps_to_unlimited(clock):
+    throttle = CopyThrottle(busy_outrate=MB, busy_rate=MB)
+    throttle.adapt(2 * MB)
+    assert throttle.status()['globalMBps'] == 1.0
+
+    rates = []
+    for _ in range(5):
+        throttle.adapt(0)
+        rates.append(throttle.status()['globalMBps'])
+    assert rates == [2.0, 4.0, 8.0, None, None]  # past UNCAPPED_RAMP_FACTOR x busy_rate: unlimited
+
+
+def test_adapt_is_off_without_busy_settings(clock):
+    throttle = CopyThrottle(global_rate=10 * MB)
+    throttle.adapt(100 * MB)
+
+    assert not throttle.adaptive
+    assert throttle.status()['globalMBps'] == 10.0
+    assert throttle.swarm_outrate == 100 * MB
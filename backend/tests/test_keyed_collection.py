@@ -0,0 +1,93 @@
+"""Keyed collections: order, keys and secondary indexes"""
+from keyed_collection import KeyedCollection
+
+INDEXES = {'magnet': lambda e: e.get('magnet'), 'pair': lambda e: (e.get('series'), e.get('path'))}
+
+
+def collection(*entries):
+    return KeyedCollection(lambda e: e['id'], INDEXES, entries)
+
+
+def ids(entries):
+    return [e['id'] for e in entries]
+
+
+def test_put_adds_at_the_end_or_replaces_in_place():
+    items = collection({'id': 'a'}, {'id': 'b'})
+
+    items.put({'id': 'c'})
+    items.put({'id': 'a', 'n': 2})
+
+    assert ids(items) == ['a', 'b', 'c']
+    assert items.get('a') == {'id': 'a', 'n': 2}
+    assert len(items) == 3 and 'c' in items and 'z' not in items and items.get('z') is None
+
+
+def test_append_moves_an_existing_key_to_the_end():
+    items = collection({'id': 'a'}, {'id': 'b'})
+
+    items.append({'id': 'a', 'n': 2})
+
+    assert items.to_list() == [{'id': 'b'}, {'id': 'a', 'n': 2}]
+
+
+def test_remove():
+    items = collection({'id': 'a', 'magnet': 'm'}, {'id': 'b'})
+
+    assert items.remove('a') == {'id': 'a', 'magnet': 'm'}
+    assert items.remove('a') is None
+    assert ids(items) == ['b'] and items.find('magnet', 'm') == []
+
+
+def test_indexes_follow_changes_in_filing_order():
+    items = collection({'id': 'a', 'magnet': 'm1'}, {'id': 'b', 'magnet': 'm1'}, {'id': 'c', 'magnet': 'm2'})
+
+    assert ids(items.find('magnet', 'm1')) == ['a', 'b']
+    items.put({'id': 'a', 'magnet': 'm2'})  # refiled: last under m2
+    assert ids(items.find('magnet', 'm1')) == ['b']
+    assert ids(items.find('magnet', 'm2')) == ['c', 'a']
+    assert items.first('magnet', 'm2')['id'] == 'c'
+    assert items.first('magnet', 'none') is None
+
+
+def test_none_values_are_not_indexed():
+    items = KeyedCollection(lambda e: e['id'], {'magnet': lambda e: e.get('magnet')}, [{'id': 'a'}])
+
+    assert items.find('magnet', None) == []
+
+
+def test_tuple_index_values():
+    items = collection({'id': 'a', 'series': 'S', 'path': '/s'}, {'id': 'b', 'series': 'S', 'path': '/t'})
+
+    assert ids(items.find('pair', ('S', '/t'))) == ['b']
+    assert ids(items.find('pair', (None, None))) == []
+
+
+def test_replace_keeps_first_position_and_last_entry():
+    items = collection({'id': 'z'})
+
+    items.replace([{'id': 'a', 'n': 1}, {'id': 'b'}, {'id': 'a', 'n': 3}])
+
+    assert items.to_list() == [{'id': 'a', 'n': 3}, {'id': 'b'}]
+    assert items.find('magnet', None) == [] and 'z' not in items
+
+
+def test_compares_equal_to_its_list():
+    items = collection({'id': 'a'}, {'id': 'b'})
+
+    assert items == [{'id': 'a'}, {'id': 'b'}]
+    assert items == collection({'id': 'a'}, {'id': 'b'})
+    assert items != collection({'id': 'b'}, {'id': 'a'})
+    assert items.key_of({'id': 'q'}) == 'q'
+
+
+def test_order_survives_many_pages_of_changes():
+    items = collection(*({'id': n} for n in range(1000)))
+    for n in range(0, 1000, 3):
+        items.remove(n)
+    for n in range(0, 1000, 7):
+        items.put({'id': n, 'again': True})
+
+    expected = [n for n in range(1000) if n % 3] + [n for n in range(0, 1000, 7) if n % 3 == 0]
+    assert ids(items) == expected
+    assert len(items) == len(expected)
@@ -0,0 +1,120 @@
+"""Config mutation journal: records, replay, compaction"""
+import json
+import os
+
+import pytest
+
+from mutation_journal import MutationJournal, apply_record, replay
+
+
+def key_of(collection, entry):
+    return entry.get('id')
+
+
+def write_lines(path, *lines):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+
+def record(seq, **fields):
+    return json.dumps({"seq": seq, **fields}) + '\n'
+
+
+def test_apply_record_ops():
+    config = {'batch': [{'id': 'a', 'n': 1}, {'id': 'b'}]}
+
+    apply_record(config, {'op': 'put', 'c': 'batch', 'k': 'a', 'v': {'id': 'a', 'n': 2}}, key_of)
+    apply_record(config, {'op': 'put', 'c': 'batch', 'k': 'c', 'v': {'id': 'c'}}, key_of)
+    apply_record(config, {'op': 'del', 'c': 'batch', 'k': ['b', 'missing']}, key_of)
+    apply_record(config, {'op': 'replace', 'c': 'library_index', 's': 'show', 'v': [{'id': 's'}]}, key_of)
+    apply_record(config, {'op': 'set', 'k': 'copy_rate_limit_mb', 'v': 42}, key_of)
+
+    assert config == {'batch': [{'id': 'a', 'n': 2}, {'id': 'c'}],
+                      'library_index': {'show': [{'id': 's'}]},
+                      'copy_rate_limit_mb': 42}
+
+
+def test_replay_applies_only_records_newer_than_the_snapshot(tmp_path):
+    path = str(tmp_path / 'config.journal')
+    write_lines(path,
+                record(1, op='put', c='batch', s='', k='old', v={'id': 'old'}),
+                record(2, op='put', c='batch', s='', k='a', v={'id': 'a'}),
+                record(2, op='put', c='batch', s='', k='dup', v={'id': 'dup'}),  # a retried append
+                record(3, op='set', k='x', v=1))
+    config = {'batch': []}
+
+    assert replay(path, config, key_of, after_seq=1) == (2, 3)
+    assert config == {'batch': [{'id': 'a'}], 'x': 1}
+
+
+def test_replay_stops_at_a_torn_tail(tmp_path):
+    path = str(tmp_path / 'config.journal')
+    write_lines(path,
+                record(1, op='put', c='batch', s='', k='a', v={'id': 'a'}),
+                record(2, op='put', c='batch', s='', k='b', v={'id': 'b'}),
+                '{"seq": 3, "op": "put", "c": "batch", "k": "c", "v": {"id"')  # crash mid-append
+    config = {}
+
+    assert replay(path, config, key_of) == (2, 2)
+    assert config == {'batch': [{'id': 'a'}, {'id': 'b'}]}
+
+
+def test_appends_wait_for_commit_and_are_serialized_when_queued(tmp_path):
+    path = str(tmp_path / 'config.journal')
+    journal = MutationJournal(path, seq=10)
+    entry = {'id': 'a', 'n': 1}
+
+    journal.append({'op': 'put', 'c': 'batch', 's': '', 'k': 'a', 'v': entry})
+    entry['n'] = 2  # too late: the record was serialized on append
+    journal.append({'op': 'set', 'k': 'x', 'v': 1})
+    assert journal.pending == 2 and not os.path.exists(path)
+
+    assert journal.commit() == 12
+    assert journal.committed_seq == 12 and journal.pending == 0
+    config = {}
+    assert replay(path, config, key_of, after_seq=10) == (2, 12)
+    assert config == {'batch': [{'id': 'a', 'n': 1}], 'x': 1}
+
+
+def test_failed_commit_keeps_records_in_order(tmp_path):
+    path = str(tmp_path / 'missing' / 'config.journal')
+    journal = MutationJournal(path)
+    journal.append({'op': 'set', 'k': 'x', 'v': 1})
+
+    with pytest.raises(OSError):
+        journal.commit()
+    assert journal.pending == 1 and journal.committed_seq == 0
+
+    journal.append({'op': 'set', 'k': 'x', 'v': 2})
+    os.makedirs(os.path.dirname(path))
+    journal.commit()
+    config = {}
+    replay(path, config, key_of)
+    assert config == {'x': 2}
+
+
+def test_truncate_keeps_later_records_and_drops_a_torn_tail(tmp_path):
+    path = str(tmp_path / 'config.journal')
+    journal = MutationJournal(path)
+    for n in range(1, 5):
+        journal.append({'op': 'set', 'k': f'k{n}', 'v': n})
+    journal.commit()
+    write_lines(path, '{"seq": 5, "op": "se')
+
+    journal.truncate(2)
+
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['seq'] for line in f] == [3, 4]
+    # Appends after compaction start on a clean line, so a restart replays them
+    journal.append({'op': 'set', 'k': 'k5', 'v': 5})
+    journal.commit()
+    config = {}
+    assert replay(path, config, key_of, after_seq=2) == (3, 5)
+    assert config == {'k3': 3, 'k4': 4, 'k5': 5}
+
+
+def test_truncate_without_a_file_creates_an_empty_journal(tmp_path):
+    path = str(tmp_path / 'config.journal')
+    MutationJournal(path).truncate(0)
+
+    assert os.path.getsize(path) == 0
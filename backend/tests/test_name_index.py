@@ -0,0 +1,67 @@
+"""Name index: exact, name-in-query and query-in-name matches"""
+import pytest
+
+from name_index import MATCH_EXACT, MATCH_NAME_IN_QUERY, MATCH_QUERY_IN_NAME, NameIndex, normalize_name
+
+RANKING = (MATCH_EXACT, MATCH_NAME_IN_QUERY, MATCH_QUERY_IN_NAME)
+
+
+def index(*names):
+    return NameIndex([{'name': name} for name in names], lambda item: item['name'])
+
+
+def test_normalize_name_drops_tracker_prefixes():
+    assert normalize_name('www.UIndex.org    -    Show.S01E02  1080p') == '- show.s01e02 1080p'
+    assert normalize_name('[tracker] Movie (2020)') == 'movie (2020)'
+    assert normalize_name('{tag}  Some   Name ') == 'some name'
+    assert normalize_name('') == ''
+
+
+def test_exact_match_is_case_and_prefix_insensitive():
+    idx = index('Show.S01E01', 'Movie.2020')
+
+    assert idx.lookup('[x] movie.2020', MATCH_EXACT) == {'name': 'Movie.2020'}
+    assert idx.lookup('Movie', MATCH_EXACT) is None
+
+
+def test_indexed_name_inside_query():
+    idx = index('Show.S01', 'Other')
+
+    assert idx.lookup('Show.S01.1080p.WEB', MATCH_NAME_IN_QUERY) == {'name': 'Show.S01'}
+    assert idx.lookup('Nothing here', MATCH_NAME_IN_QUERY) is None
+
+
+def test_query_inside_indexed_name():
+    idx = index('Alpha.Show.S01', 'Beta.Show.S02', 'Gamma')
+
+    assert idx.lookup('beta.show', MATCH_QUERY_IN_NAME) == {'name': 'Beta.Show.S02'}
+    assert idx.lookup('gamma', MATCH_QUERY_IN_NAME) == {'name': 'Gamma'}
+    # A query never matches across the boundary between two joined names
+    assert idx.lookup('s01beta', MATCH_QUERY_IN_NAME) is None
+
+
+def test_earlier_items_win_ties():
+    idx = index('Show', 'Show', 'Show.S01')
+
+    assert idx.lookup('show', MATCH_EXACT) is idx._items[0]
+    assert idx.lookup('Show.S01.x', MATCH_NAME_IN_QUERY) is idx._items[0]
+    assert idx.lookup('sho', MATCH_QUERY_IN_NAME) is idx._items[0]
+
+
+def test_best_scores_by_ranking():
+    idx = index('Show.S01', 'Movie')
+
+    assert idx.best('show.s01', RANKING) == ({'name': 'Show.S01'}, 3)
+    assert idx.best('Show.S01.720p', RANKING) == ({'name': 'Show.S01'}, 2)
+    assert idx.best('mov', RANKING) == ({'name': 'Movie'}, 1)
+    assert idx.best('unrelated', RANKING) == (None, 0)
+
+
+def test_empty_names_and_queries():
+    idx = index('', None, 'Kept')
+
+    assert len(idx) == 1
+    assert idx.lookup('', MATCH_EXACT) is None
+    assert index().lookup('x', MATCH_QUERY_IN_NAME) is None
+    with pytest.raises(ValueError):
+        idx.lookup('kept', 'fuzzy')
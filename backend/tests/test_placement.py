@@ -0,0 +1,109 @@
+"""Free-space-aware placement: reservations, headroom and redirecting to a library with room"""
+from types import SimpleNamespace
+
+import pytest
+
+import placement
+from placement import DiskUsageCache, PlacementService, parse_size
+
+GB = 1024**3
+
+
+class FakeDisks:
+    """psutil stand-in: volume name (first path part) -> (total, free) bytes"""
+
+    def __init__(self, **volumes):
+        self.volumes = {name: [total * GB, free * GB] for name, (total, free) in volumes.items()}
+        self.reads = 0
+
+    def disk_usage(self, path):
+        self.reads += 1
+        total, free = self.volumes[path.strip('/').split('/')[0]]
+        return SimpleNamespace(total=total, free=free)
+
+
+@pytest.fixture
+def disks(monkeypatch):
+    disks = FakeDisks(lib1=(100, 50), lib2=(100, 80), lib3=(1000, 300))
+    monkeypatch.setattr(placement, 'psutil', disks)
+    monkeypatch.setattr(placement, 'volume_of', lambda path: path.strip('/').split('/')[0])
+    monkeypatch.setattr(placement, '_existing_parent', lambda path: path)
+    return disks
+
+
+def service(reservations=(), headroom=0):
+    reservations = list(reservations)
+    return PlacementService(DiskUsageCache(ttl=30), lambda: iter(reservations), headroom=headroom), reservations
+
+
+LIBRARIES = [{'path': '/lib1/Movies'}, {'path': '/lib2/Movies'}, {'path': '/lib3/Movies'}]
+
+
+def test_parse_size():
+    assert parse_size('401 M of 2.06 G') == int(2.06 * GB)
+    assert parse_size('700 K') == 700 * 1024
+    assert parse_size('1,200 M') == 1200 * 1024**2
+    assert parse_size('') == parse_size('?') == 0
+
+
+def test_fits_in_free_space_less_headroom(disks):
+    places, _ = service(headroom=5 * GB)
+
+    check = places.check('/lib1/Movies', 40 * GB, LIBRARIES)
+    assert check.fits and check.available == 45 * GB and check.suggestion is None
+
+    assert not places.check('/lib1/Movies', 46 * GB, LIBRARIES).fits
+
+
+def test_reservations_count_until_released(disks):
+    places, reservations = service([('a', '/lib1/Movies/A', 30 * GB), ('b', '/lib2/Movies/B', 70 * GB)])
+
+    assert places.available('/lib1/Movies') == 20 * GB
+    assert places.available('/lib1/Movies', exclude_key='a') == 50 * GB  # its own reservation does not count
+    assert not places.check('/lib1/Movies', 25 * GB, LIBRARIES).fits
+
+    reservations.remove(('a', '/lib1/Movies/A', 30 * GB))  # copied into the library: space released
+    assert places.check('/lib1/Movies', 25 * GB, LIBRARIES).fits
+
+
+def test_full_target_suggests_the_least_full_library_that_fits(disks):
+    places, _ = service([('b', '/lib2/Movies/B', 10 * GB)])
+
+    check = places.check('/lib1/Movies', 60 * GB, LIBRARIES)
+
+    # lib2 has 70 GB left of 100 (30% used), lib3 300 of 1000 (70% used)
+    assert not check.fits
+    assert check.suggestion == {'path': '/lib2/Movies'}
+    assert places.check('/lib1/Movies', 200 * GB, LIBRARIES).suggestion == {'path': '/lib3/Movies'}
+    assert places.check('/lib1/Movies', 400 * GB, LIBRARIES).suggestion is None
+
+
+def test_unreadable_library_is_skipped(disks):
+    places, _ = service()
+    libraries = [{'path': '/gone/Movies'}] + LIBRARIES
+
+    def disk_usage(path):
+        if path.startswith('/gone'):
+            raise OSError('not mounted')
+        return FakeDisks.disk_usage(disks, path)
+    disks.disk_usage = disk_usage
+
+    assert places.check('/lib1/Movies', 60 * GB, libraries).suggestion == {'path': '/lib2/Movies'}
+
+
+def test_usage_is_cached_per_volume_until_invalidated(disks, monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(placement, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    cache = DiskUsageCache(ttl=30)
+
+    cache.get('/lib1/Movies/A')
+    cache.get('/lib1/Shows')
+    assert disks.reads == 1
+
+    disks.volumes['lib1'][1] = 10 * GB
+    assert cache.get('/lib1/Movies').free == 50 * GB  # still cached
+    cache.invalidate('/lib1/Movies/A')
+    assert cache.get('/lib1/Movies').free == 10 * GB
+    clock.now += 31
+    cache.get('/lib1/Movies')
+    assert disks.reads == 3
@@ -0,0 +1,60 @@
+"""Adaptive transfer poll delay: fast near a finish, exponential backoff when idle"""
+from poll_scheduler import AdaptivePollScheduler
+from transfer_parser import TransferRow
+
+
+def row(percent='40', status='Downloading', eta='1h'):
+    return TransferRow('a1', 'Show.S01', '1 G', percent, status, '1 M', '', 'Normal', eta)
+
+
+def test_nothing_tracked_backs_off_to_max_interval():
+    scheduler = AdaptivePollScheduler(base_interval=5, max_interval=120, backoff=2)
+
+    delays = [scheduler.next_interval([]) for _ in range(6)]
+
+    assert delays == [10, 20, 40, 80, 120, 120]
+
+
+def test_activity_drops_the_delay_at_once():
+    scheduler = AdaptivePollScheduler(min_interval=1, base_interval=5, backoff=2)
+    for _ in range(5):
+        scheduler.next_interval([])
+    assert scheduler.current == 120
+
+    # Ten seconds left: poll again after half of it, not after the backed-off delay
+    assert scheduler.next_interval([row(eta='10s')]) == 5
+    assert scheduler.next_interval([row(percent='99.5')]) == 1
+
+
+def test_shortest_eta_wins_and_is_bounded():
+    scheduler = AdaptivePollScheduler(min_interval=1, active_max_interval=30)
+
+    assert scheduler.target_interval([row(eta='1h'), row(eta='20s')]) == 10
+    assert scheduler.target_interval([row(eta='1s')]) == 1  # never below min_interval
+    assert scheduler.target_interval([row(eta='3h')]) == 30  # tracked rows cap at active_max_interval
+    assert scheduler.target_interval([row(eta='')]) == 30  # no estimate
+    assert scheduler.target_interval([row(percent='100', status='Seeding', eta='')]) == 30
+
+
+def test_backoff_grows_from_min_interval_and_respects_ceiling():
+    scheduler = AdaptivePollScheduler(min_interval=1, backoff=2, active_max_interval=30)
+    scheduler.next_interval([row(percent='99.9')])
+    assert scheduler.current == 1
+
+    delays = [scheduler.next_interval([row(eta='3h')]) for _ in range(6)]
+    assert delays == [2, 4, 8, 16, 30, 30]
+    assert scheduler.next_interval([row(eta='3h')], ceiling=3) == 3
+    assert scheduler.current == 30  # the ceiling limits one wait, not the backoff state
+
+
+def test_reset_returns_to_base_interval():
+    scheduler = AdaptivePollScheduler(base_interval=5)
+    for _ in range(4):
+        scheduler.next_interval([])
+
+    scheduler.reset()
+
+    assert scheduler.current == 5
+    scheduler.next_interval([row(percent='99.5')])
+    scheduler.reset()
+    assert scheduler.current == 1  # already faster than base: left alone
@@ -0,0 +1,111 @@
+"""SQLite row-per-entry store"""
+import sqlite3
+
+import pytest
+
+from keyed_collection import KeyedCollection
+from state_store import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    yield store
+    store.close()
+
+
+def test_changes_wait_for_commit(store, tmp_path):
+    store.put('batch', 'a', {'id': 'a', 'magnet': 'm1'})
+
+    other = sqlite3.connect(str(tmp_path / 'state.db'))
+    assert other.execute('SELECT COUNT(*) FROM batch_items').fetchone() == (0,)
+    assert store.pending == 1
+    store.commit()
+    assert other.execute('SELECT key, magnet FROM batch_items').fetchall() == [('a', 'm1')]
+    assert store.pending == 0
+
+
+def test_update_keeps_position_and_delete_matches_exact_keys(store):
+    for key in ('a', 'b', 'c'):
+        store.put('batch', key, {'id': key})
+    store.put('batch', 'a', {'id': 'a', 'magnet': 'new'})
+    store.put('batch', 'a#2', {'id': 'a#2'})
+    store.delete('batch', ['a#', 'b'])
+
+    assert store.entries('batch') == {'': [{'id': 'a', 'magnet': 'new'}, {'id': 'c'}, {'id': 'a#2'}]}
+
+
+def test_replace_follows_the_collection_duplicate_rule(store):
+    entries = [{'id': 'a', 'n': 1}, {'id': 'b', 'n': 2}, {'id': 'a', 'n': 3}]
+    store.put('batch', 'old', {'id': 'old'})
+
+    store.replace('batch', entries, [e['id'] for e in entries])
+
+    in_memory = KeyedCollection(lambda e: e['id'], entries=entries)
+    assert store.entries('batch')[''] == in_memory.to_list() == [{'id': 'a', 'n': 3}, {'id': 'b', 'n': 2}]
+
+
+def test_scopes_are_separate(store):
+    store.replace('library_index', [{'id': 's1', 'series': 'S', 'seriesPath': '/s'}], ['s1'], scope='show')
+    store.replace('library_index', [{'id': 'm1'}], ['m1'], scope='movie')
+    store.replace('library_index', [], [], scope='show')
+
+    assert store.entries('library_index') == {'movie': [{'id': 'm1'}]}
+    assert store.entries('library_index', scope='show') == {}
+
+
+def test_queue_collections(store):
+    store.put('copy_jobs', 'j1', {'id': 'j1', 'state': 'queued'})
+    store.put('pending_deletions', '/t/x', {'path': '/t/x'})
+    store.put('copy_jobs', 'j1', {'id': 'j1', 'state': 'done'})
+    store.delete('pending_deletions', ['/t/x'])
+
+    assert store.entries('copy_jobs') == {'': [{'id': 'j1', 'state': 'done'}]}
+    assert store.entries('pending_deletions') == {}
+
+
+def test_failed_commit_keeps_the_changes(store, monkeypatch):
+    store.put('batch', 'a', {'id': 'a'})
+    real_write = store._write
+
+    def failing_write(statements):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(store, '_write', failing_write)
+    with pytest.raises(sqlite3.OperationalError):
+        store.commit()
+    assert store.pending == 1
+
+    monkeypatch.setattr(store, '_write', real_write)
+    store.put('batch', 'b', {'id': 'b'})
+    assert [e['id'] for e in store.entries('batch')['']] == ['a', 'b']
+
+
+def test_meta_and_reopen(store, tmp_path):
+    store.set_meta('imported_json', '123')
+    store.put('intents', 'k', {'magnet': 'm', 'infohash': 'h', 'name_hint': 'N'})
+    store.close()
+
+    reopened = StateStore(str(tmp_path / 'state.db'))
+    assert reopened.get_meta('imported_json') == '123'
+    assert reopened.get_meta('missing') is None
+    assert reopened.entries('intents') == {'': [{'magnet': 'm', 'infohash': 'h', 'name_hint': 'N'}]}
+    reopened.close()
+
+
+def test_queued_meta_commits_with_the_rows(store, tmp_path):
+    store.replace('copy_jobs', [{'id': 'j1'}], ['j1'])
+    store.queue_meta('imported_copy_jobs', '1')
+    other = sqlite3.connect(str(tmp_path / 'state.db'))
+    assert store.get_meta('imported_copy_jobs') is None
+
+    store._queue([("INSERT INTO no_such_table VALUES (1)", ())])
+    with pytest.raises(sqlite3.OperationalError):
+        store.commit()
+    # The transaction is all or nothing: no rows without the flag, no flag without the rows
+    assert other.execute('SELECT COUNT(*) FROM copy_jobs').fetchone() == (0,)
+    assert store.get_meta('imported_copy_jobs') is None
+
+    store._pending.pop()
+    store.commit()
+    assert other.execute('SELECT key FROM copy_jobs').fetchall() == [('j1',)]
+    assert store.get_meta('imported_copy_jobs') == '1'
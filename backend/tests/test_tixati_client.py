@@ -0,0 +1,97 @@
+"""Tixati WebUI client against a local HTTP server: paths, timeouts and which requests are retried"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from tixati_client import TixatiClient
+
+
+class FakeTixati(BaseHTTPRequestHandler):
+    """Answers 503 for the first `failures` requests, then 200; records every request"""
+
+    def _reply(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+        server.requests.append((self.command, self.path, parse_qs(body)))
+        if server.stall:
+            time.sleep(server.stall)
+        status = 503 if server.failures > 0 else 200
+        server.failures -= 1
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+
+    def handle_error(self, request, client_address):
+        pass  # the client gave up on a stalled reply
+
+
+@pytest.fixture
+def tixati():
+    server = Server(('127.0.0.1', 0), FakeTixati)
+    server.requests, server.failures, server.stall = [], 0, 0
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_for(server, **kwargs):
+    return TixatiClient(f'http://127.0.0.1:{server.server_address[1]}/', backoff=0, **kwargs)
+
+
+def test_pages_and_actions_hit_the_webui_paths(tixati):
+    client = client_for(tixati)
+
+    client.transfers_page()
+    client.bandwidth_page()
+    client.transfer_page('abc', 'files')
+    client.transfer_action({'start': 'Start', 'abc': '1'})
+    client.transfer_page_action('abc', 'details', {'checkfiles': 'Check Files'})
+
+    assert [(method, path) for method, path, _ in tixati.requests] == [
+        ('GET', '/transfers'), ('GET', '/bandwidth'), ('GET', '/transfers/abc/files'),
+        ('POST', '/transfers/action'), ('POST', '/transfers/abc/details/action')]
+    assert tixati.requests[4][2] == {'checkfiles': ['Check Files']}
+
+
+def test_reads_are_retried_on_a_busy_tixati(tixati):
+    tixati.failures = 2
+    response = client_for(tixati, retries=2).transfers_page()
+
+    assert response.status_code == 200
+    assert len(tixati.requests) == 3
+
+
+def test_actions_are_not_resent_after_tixati_answered(tixati):
+    tixati.failures = 1
+    response = client_for(tixati, retries=2).transfer_action({'stop': 'Stop'})
+
+    assert response.status_code == 503
+    assert len(tixati.requests) == 1  # a second POST could stop or add twice
+
+
+def test_a_stalled_tixati_times_out_per_operation(tixati):
+    tixati.stall = 0.5
+    client = client_for(tixati, retries=0, timeouts={'bandwidth': (1, 0.1)})
+
+    started = time.monotonic()
+    with pytest.raises((requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        client.bandwidth_page()
+    assert time.monotonic() - started < 0.45
+    assert client.timeouts['transfers'] == TixatiClient.DEFAULT_TIMEOUTS['transfers']
+    assert client._timeout('unknown') == client.timeouts['details']
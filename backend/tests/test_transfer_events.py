@@ -0,0 +1,81 @@
+"""Transfer snapshot diffing: the events copy_worker and the SSE stream act on"""
+from transfer_events import (EVENT_ADDED, EVENT_COMPLETED, EVENT_PROGRESS, EVENT_REMOVED, EVENT_STATUS_CHANGED,
+                             EVENT_UPDATED, TransferDiffEngine, parse_eta, row_key, status_word)
+from transfer_parser import TransferRow, parse_transfer_rows
+
+
+def row(checkbox_id='a1', name='Show.S01', percent='10', status='Downloading 3 (20) 1 (4)', dlspeed='1 M', eta='1h'):
+    return TransferRow(checkbox_id, name, '1 G', percent, status, dlspeed, '', 'Normal', eta)
+
+
+def kinds(events):
+    return [(event.kind, event.key) for event in events]
+
+
+def test_first_snapshot_adds_every_row(webui_pages):
+    rows = parse_transfer_rows(webui_pages['/transfers'])
+    engine = TransferDiffEngine()
+
+    assert kinds(engine.diff(rows)) == [(EVENT_ADDED, r.checkbox_id) for r in rows]
+    assert engine.diff(rows) == []  # an unchanged snapshot is quiet
+
+
+def test_peer_counts_alone_are_not_a_status_change():
+    engine = TransferDiffEngine()
+    engine.diff([row()])
+
+    events = engine.diff([row(status='Downloading 5 (31) 0 (2)', dlspeed='2 M')])
+
+    assert kinds(events) == [(EVENT_UPDATED, 'a1')]
+
+
+def test_status_change_progress_and_completion():
+    engine = TransferDiffEngine(thresholds=(25, 50, 99))
+    engine.diff([row()])
+
+    events = engine.diff([row(percent='100', status='Seeding 0 (15) 0 (0)')])
+
+    assert kinds(events) == [(EVENT_STATUS_CHANGED, 'a1'), (EVENT_PROGRESS, 'a1'), (EVENT_PROGRESS, 'a1'),
+                             (EVENT_PROGRESS, 'a1'), (EVENT_COMPLETED, 'a1')]
+    assert [e.threshold for e in events if e.kind == EVENT_PROGRESS] == [25, 50, 99]
+    assert events[0].previous.status.startswith('Downloading')
+
+
+def test_completed_fires_once():
+    engine = TransferDiffEngine()
+    engine.diff([row(percent='99')])
+    engine.diff([row(percent='100', status='Seeding 0 (1) 0 (0)')])
+
+    events = engine.diff([row(percent='100', status='Seeding ratio exceeded 0 (1) 0 (0)')])
+
+    assert kinds(events) == [(EVENT_STATUS_CHANGED, 'a1')]
+
+
+def test_removed_carries_the_last_row():
+    engine = TransferDiffEngine()
+    engine.diff([row(), row(checkbox_id='b2', name='Other')])
+
+    events = engine.diff([row()])
+
+    assert kinds(events) == [(EVENT_REMOVED, 'b2')]
+    assert events[0].row.name == 'Other'
+    assert list(engine.rows) == ['a1']
+
+
+def test_row_key_falls_back_to_the_name():
+    assert row_key(row(checkbox_id=None, name='Named')) == 'Named'
+
+
+def test_status_word():
+    assert status_word('Seeding 0 (15) 0 (0)') == 'seeding'
+    assert status_word('Seeding ratio exceeded 0 (0) 0 (0)') == 'seeding ratio exceeded'
+    assert status_word('  Complete - Offline ') == 'complete - offline'
+    assert status_word(None) == ''
+
+
+def test_parse_eta():
+    assert parse_eta('1:02:03') == 3723
+    assert parse_eta('2h 5m') == 7500
+    assert parse_eta('1.5d') == 129600
+    assert parse_eta('') is None
+    assert parse_eta('unknown') is None
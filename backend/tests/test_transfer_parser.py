@@ -0,0 +1,49 @@
+"""Fast xferslist tokenizer against the captured Tixati WebUI pages"""
+import pytest
+
+from transfer_parser import TransferRow, parse_eventlog_infohash, parse_file_rows, parse_transfer_rows
+
+
+def test_parses_every_transfer_in_the_dump(webui_pages):
+    rows = parse_transfer_rows(webui_pages['/transfers'])
+
+    assert len(rows) == 6
+    assert rows[0] == TransferRow('1da86917b97059', 'Juno.New.Origins.v1.3.2.rar', '401 M of 401 M', '100',
+                                  'Complete - Offline', '', '', 'Normal', '')
+    # Every row links back to its details pages through the checkbox id
+    for row in rows:
+        assert f'/transfers/{row.checkbox_id}/details' in webui_pages
+
+
+def test_matches_the_beautifulsoup_parser(webui_pages):
+    benchmark = pytest.importorskip('benchmark_transfer_parser')
+    page = webui_pages['/transfers']
+    for multiplier in (1, 50):
+        enlarged = benchmark.enlarge_page(page, multiplier)
+        assert parse_transfer_rows(enlarged) == benchmark.parse_with_bs4(enlarged)
+
+
+def test_page_without_transfer_table():
+    assert parse_transfer_rows('<html><body><table class="other"><tr><td>x</td></tr></table></body></html>') == []
+
+
+def test_short_rows_are_padded():
+    html = ('<table class="xferslist"><tr><th>h</th></tr>'
+            '<tr><td><input type="checkbox" name="abc"></td><td>Name &amp; Co</td><td>1 G</td></tr></table>')
+
+    assert parse_transfer_rows(html) == [TransferRow('abc', 'Name & Co', '1 G', '', '', '', '', '', '')]
+
+
+def test_file_rows(webui_pages):
+    files = parse_file_rows(webui_pages['/transfers/98bb43c6d733ad1a/files'])
+
+    assert len(files) == 5
+    assert all(f.name and f.size for f in files)
+    assert parse_file_rows(webui_pages['/transfers/1da86917b97059/files'])[0].complete
+
+
+def test_eventlog_infohash(webui_pages):
+    assert parse_eventlog_infohash(webui_pages['/transfers/1da86917b97059/eventlog']) == \
+        '2459fd3f31c7aa1966980019a90346ab779f8c53'
+    assert parse_eventlog_infohash(webui_pages['/transfers/1e0f72e52e9c2af5/eventlog']) is None
+    assert parse_eventlog_infohash(None) is None
@@ -0,0 +1,130 @@
+"""Shared Tixati transfer snapshot: freshness bound, versioning and one fetch for many readers"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import transfer_snapshot
+from transfer_events import EVENT_ADDED, EVENT_REMOVED, TransferDiffEngine
+from transfer_parser import TransferRow
+from transfer_snapshot import TransferSnapshotService
+
+
+def row(checkbox_id, percent='10'):
+    return TransferRow(checkbox_id, f'Name {checkbox_id}', '1 G', percent, 'Downloading', '1 M', '', 'Normal', '1h')
+
+
+class Tixati:
+    """fetch_rows stand-in counting requests"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.error = None
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        if self.error:
+            raise ConnectionError(self.error)
+        return list(self.rows)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(transfer_snapshot, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_get_reuses_a_fresh_snapshot_and_refreshes_a_stale_one(clock):
+    tixati = Tixati([row('a')])
+    service = TransferSnapshotService(tixati.fetch, max_age=3)
+
+    first = service.get()
+    clock.now += 2
+    assert service.get() is first
+    assert tixati.fetches == 1
+
+    clock.now += 2  # now 4 s old
+    assert service.get().fetched_at == clock.now
+    assert tixati.fetches == 2
+    clock.now += 1
+    assert service.get(max_age=0.5).fetched_at == clock.now  # a caller may ask for fresher data
+    assert tixati.fetches == 3
+
+
+def test_version_changes_only_with_the_content(clock):
+    tixati = Tixati([row('a')])
+    service = TransferSnapshotService(tixati.fetch)
+
+    assert service.refresh().version == 1
+    assert service.refresh().version == 1
+    tixati.rows = [row('a', percent='20')]
+    assert service.refresh().version == 2
+
+    tixati.error = 'refused'
+    failed = service.refresh()
+    assert (failed.version, failed.rows, failed.error) == (3, (), 'refused')
+    assert service.refresh().version == 3  # the same failure again is no new version
+
+
+def test_subscribers_get_diffs_but_never_a_failed_fetch(clock):
+    tixati = Tixati([row('a'), row('b')])
+    service = TransferSnapshotService(tixati.fetch, diff_engine=TransferDiffEngine())
+    seen = []
+    service.subscribe(lambda snapshot, events: 1 / 0)  # a broken subscriber does not stop the others
+    service.subscribe(lambda snapshot, events: seen.append((snapshot.version, [(e.kind, e.key) for e in events])))
+
+    service.refresh()
+    service.refresh()  # unchanged: nothing published
+    tixati.error = 'timeout'
+    service.refresh()
+    tixati.error, tixati.rows = None, [row('a')]
+    service.refresh()
+
+    assert seen == [(1, [(EVENT_ADDED, 'a'), (EVENT_ADDED, 'b')]), (3, [(EVENT_REMOVED, 'b')])]
+
+
+def test_concurrent_stale_readers_share_one_fetch(clock):
+    release = threading.Event()
+    tixati = Tixati([row('a')])
+
+    def slow_fetch():
+        release.wait(5)
+        return tixati.fetch()
+    service = TransferSnapshotService(slow_fetch, max_age=3)
+
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(service.get())) for _ in range(5)]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.1)
+    release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert tixati.fetches == 1
+    assert len({id(snapshot) for snapshot in results}) == 1
+
+
+def test_background_poll_uses_next_interval_and_wakes_early(clock):
+    tixati = Tixati([row('a')])
+    intervals = []
+
+    def next_interval(snapshot):
+        intervals.append(snapshot.version)
+        return 60
+    service = TransferSnapshotService(tixati.fetch, interval=5, next_interval=next_interval)
+    service.start()
+    service.start()  # idempotent
+
+    deadline = time.time() + 5
+    while tixati.fetches < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    service.wake()  # cut the 60 s wait short
+    while tixati.fetches < 2 and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert tixati.fetches == 2
+    assert intervals[:1] == [1]
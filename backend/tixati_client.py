@@ -0,0 +1,73 @@
+"""
+Tixati WebUI HTTP Client
+Keeps a pooled keep-alive session to Tixati with per-operation timeouts and
+bounded retries, so a stalled Tixati can never pin a Flask thread.
+"""
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class TixatiClient:
+    """Shared client for every request the backend makes to the Tixati WebUI"""
+
+    # (connect, read) timeouts in seconds per operation
+    DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+        'transfers': (3.05, 10),
+        'bandwidth': (3.05, 5),
+        'details': (3.05, 10),
+        'action': (3.05, 15),
+    }
+
+    def __init__(self, base_url: str, pool_size: int = 8, retries: int = 2,
+                 backoff: float = 0.3, timeouts: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeouts = dict(self.DEFAULT_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        # Reads are idempotent and retried with backoff. POSTs are only retried
+        # when the connection failed before the request was sent.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _timeout(self, operation: str) -> Tuple[float, float]:
+        return self.timeouts.get(operation, self.timeouts['details'])
+
+    def get(self, path: str, operation: str = 'details') -> requests.Response:
+        return self.session.get(f"{self.base_url}{path}", timeout=self._timeout(operation))
+
+    def post(self, path: str, data=None, operation: str = 'action') -> requests.Response:
+        return self.session.post(f"{self.base_url}{path}", data=data, timeout=self._timeout(operation))
+
+    # --- WebUI pages ---
+    def transfers_page(self) -> requests.Response:
+        return self.get('/transfers', 'transfers')
+
+    def bandwidth_page(self) -> requests.Response:
+        return self.get('/bandwidth', 'bandwidth')
+
+    def transfer_page(self, transfer_id: str, subpage: str) -> requests.Response:
+        return self.get(f'/transfers/{transfer_id}/{subpage}', 'details')
+
+    def transfer_action(self, data) -> requests.Response:
+        """POST to /transfers/action (add link, remove, start/stop, ...)"""
+        return self.post('/transfers/action', data, 'action')
+
+    def transfer_page_action(self, transfer_id: str, subpage: str, data) -> requests.Response:
+        """POST to one transfer's page form, e.g. details/action with checkfiles"""
+        return self.post(f'/transfers/{transfer_id}/{subpage}/action', data, 'action')
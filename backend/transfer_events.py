@@ -0,0 +1,124 @@
+"""
+Transfer-State Diff Engine
+Compares successive transfer snapshots and emits typed change events, so
+consumers react to what changed instead of rescanning every transfer.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+EVENT_ADDED = 'added'
+EVENT_REMOVED = 'removed'
+EVENT_STATUS_CHANGED = 'status_changed'
+EVENT_PROGRESS = 'progress'  # progress crossed one of the configured thresholds
+EVENT_COMPLETED = 'completed'
+EVENT_UPDATED = 'updated'  # other columns changed (speeds, ETA, ...) with the same status
+
+DEFAULT_PROGRESS_THRESHOLDS = (25, 50, 75, 90, 99)
+
+# Status fragments Tixati uses once all data is present
+_COMPLETE_STATUS_WORDS = ('seeding', 'complete', 'standby', 'ratio exceeded')
+
+# Time-left column: "2d 3h", "1h 5m", "45s" or "0:04:12"
+_ETA_PART_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([wdhms])')
+_ETA_UNIT_SECONDS = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+# Peer/seed counts Tixati appends to the status column: "Seeding 0 (15) 0 (0)"
+_STATUS_COUNTS_RE = re.compile(r'\s+[\d(].*$')
+
+
+class TransferEvent(NamedTuple):
+    """A single change between two transfer snapshots"""
+    kind: str
+    key: str
+    row: object  # current row (last known row for EVENT_REMOVED)
+    previous: Optional[object] = None  # row from the previous snapshot, if any
+    threshold: Optional[int] = None  # crossed threshold for EVENT_PROGRESS
+
+
+def row_key(row) -> str:
+    """Stable identity of a transfer: Tixati's checkbox id, falling back to the name"""
+    return row.checkbox_id or row.name
+
+
+def parse_percent(value: str) -> float:
+    try:
+        return float((value or '').replace('%', '').strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def parse_eta(value: str) -> Optional[float]:
+    """Seconds left from the time-left column, or None when Tixati shows no estimate"""
+    text = (value or '').strip().lower()
+    if not text:
+        return None
+    if ':' in text:
+        try:
+            parts = [int(part) for part in text.split(':')]
+        except ValueError:
+            return None
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return float(seconds)
+    parts = _ETA_PART_RE.findall(text)
+    if not parts:
+        return None
+    return sum(float(number) * _ETA_UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def status_word(status: str) -> str:
+    """The status without the counts after it, lowercased ("seeding ratio exceeded", "downloading")"""
+    return _STATUS_COUNTS_RE.sub('', (status or '').strip()).lower()
+
+
+def is_complete_row(row) -> bool:
+    status = (row.status or '').lower()
+    return parse_percent(row.percent) >= 100 or any(word in status for word in _COMPLETE_STATUS_WORDS)
+
+
+class TransferDiffEngine:
+    """Keeps the last seen rows and turns each new snapshot into events"""
+
+    def __init__(self, thresholds: Sequence[int] = DEFAULT_PROGRESS_THRESHOLDS):
+        self.thresholds = tuple(sorted(thresholds))
+        self._rows: Dict[str, object] = {}
+
+    @property
+    def rows(self) -> Dict[str, object]:
+        """Rows from the last diffed snapshot, keyed by row_key"""
+        return self._rows
+
+    def diff(self, rows: Iterable) -> List[TransferEvent]:
+        previous_rows = self._rows
+        current_rows = {row_key(row): row for row in rows}
+        events = []
+
+        for key, row in current_rows.items():
+            old = previous_rows.get(key)
+            if old is None:
+                events.append(TransferEvent(EVENT_ADDED, key, row))
+                continue
+            if old == row:
+                continue
+
+            if status_word(old.status) != status_word(row.status):
+                events.append(TransferEvent(EVENT_STATUS_CHANGED, key, row, old))
+            else:
+                events.append(TransferEvent(EVENT_UPDATED, key, row, old))
+
+            old_percent = parse_percent(old.percent)
+            new_percent = parse_percent(row.percent)
+            for threshold in self.thresholds:
+                if old_percent < threshold <= new_percent:
+                    events.append(TransferEvent(EVENT_PROGRESS, key, row, old, threshold))
+
+            if is_complete_row(row) and not is_complete_row(old):
+                events.append(TransferEvent(EVENT_COMPLETED, key, row, old))
+
+        for key, old in previous_rows.items():
+            if key not in current_rows:
+                events.append(TransferEvent(EVENT_REMOVED, key, old, old))
+
+        self._rows = current_rows
+        return events
@@ -0,0 +1,108 @@
+"""
+Fast Tixati Transfer-List Parser
+Extracts rows from the WebUI ``xferslist`` table with a targeted tokenizer
+instead of building a full BeautifulSoup tree.
+"""
+import re
+from html import unescape
+from typing import List, NamedTuple, Optional
+
+
+class TransferRow(NamedTuple):
+    """One row of the Tixati transfers table"""
+    checkbox_id: Optional[str]
+    name: str
+    size: str
+    percent: str
+    status: str
+    dlspeed: str
+    upspeed: str
+    priority: str
+    eta: str
+
+
+class FileRow(NamedTuple):
+    """One row of a transfer's files table"""
+    name: str
+    priority: str
+    size: str
+    status: str
+    complete: bool
+
+
+_TABLE_RE = re.compile(
+    r'<table\b[^>]*\bclass\s*=\s*["\'][^"\']*\bxferslist\b[^"\']*["\'][^>]*>(.*?)</table\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_ROW_SPLIT_RE = re.compile(r'<tr\b[^>]*>', re.IGNORECASE)
+_CELL_SPLIT_RE = re.compile(r'<td\b[^>]*>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]*>')
+_CHECKBOX_RE = re.compile(r'<input\b[^>]*\btype\s*=\s*["\']?checkbox\b[^>]*>', re.IGNORECASE)
+_NAME_ATTR_RE = re.compile(r'\bname\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+
+_TBODY_RE = re.compile(r'<tbody\b[^>]*>(.*?)</tbody\s*>', re.IGNORECASE | re.DOTALL)
+_ROW_RE = re.compile(r'<tr\b([^>]*)>(.*?)(?=<tr\b|$)', re.IGNORECASE | re.DOTALL)
+_CLASS_ATTR_RE = re.compile(r'\bclass\s*=\s*["\']([^"\']*)["\']', re.IGNORECASE)
+
+# Number of text columns after the checkbox column (name .. time left)
+_TEXT_COLUMNS = 8
+
+# Event log line Tixati writes when it learns a transfer's info-hash
+_EVENTLOG_INFOHASH_RE = re.compile(r'info-hash set\s*(?:&gt;|>)\s*([0-9a-f]{40})', re.IGNORECASE)
+
+
+def _cell_text(cell: str) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True) for a single cell"""
+    if '<' not in cell and '&' not in cell:
+        return cell.strip()
+    parts = _TAG_RE.split(cell)
+    return ''.join(unescape(p).strip() for p in parts if p and not p.isspace())
+
+
+def _checkbox_id(cell: str) -> Optional[str]:
+    match = _CHECKBOX_RE.search(cell)
+    if not match:
+        return None
+    name = _NAME_ATTR_RE.search(match.group(0))
+    if not name:
+        return None
+    return unescape(next(g for g in name.groups() if g is not None))
+
+
+def parse_transfer_rows(html: str) -> List[TransferRow]:
+    """Parse the transfers page into TransferRow records (header row skipped)"""
+    table = _TABLE_RE.search(html)
+    if not table:
+        return []
+
+    rows = []
+    for row in _ROW_SPLIT_RE.split(table.group(1))[2:]:  # [0] precedes the first <tr>, [1] is the header
+        cells = _CELL_SPLIT_RE.split(row)[1:]
+        if len(cells) < 2:
+            continue
+        texts = [_cell_text(c) for c in cells[1:_TEXT_COLUMNS + 1]]
+        texts += [''] * (_TEXT_COLUMNS - len(texts))
+        rows.append(TransferRow(_checkbox_id(cells[0]), *texts))
+    return rows
+
+
+def parse_eventlog_infohash(html: str) -> Optional[str]:
+    """Lower-case hex info-hash from a transfer's eventlog page, or None"""
+    match = _EVENTLOG_INFOHASH_RE.search(html or '')
+    return match.group(1).lower() if match else None
+
+
+def parse_file_rows(html: str) -> List[FileRow]:
+    """Parse a transfer's files page; complete means Tixati has every piece of the file on disk"""
+    body = _TBODY_RE.search(html or '')
+    if not body:
+        return []
+    files = []
+    for attrs, row in _ROW_RE.findall(body.group(1)):
+        cells = [_cell_text(c) for c in _CELL_SPLIT_RE.split(row)[2:]]
+        if len(cells) < 4:
+            continue
+        css = _CLASS_ATTR_RE.search(attrs)
+        complete = 'file_complete' in (css.group(1) if css else '') or cells[3].lower().startswith('complete')
+        files.append(FileRow(cells[0], cells[1], cells[2], cells[3], complete))
+    return files
@@ -0,0 +1,129 @@
+"""
+Tixati Transfer Snapshot Service
+Fetches and parses the Tixati transfer list once per interval and shares the
+result with every endpoint and worker as a versioned, read-only snapshot.
+"""
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+
+class TransferSnapshot(NamedTuple):
+    """Immutable view of the Tixati transfer list at one point in time"""
+    version: int
+    fetched_at: float
+    rows: Tuple
+    error: Optional[str]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class TransferSnapshotService:
+    """Background poller that keeps a shared transfer snapshot fresh.
+
+    Readers call ``get()``; if the current snapshot is older than the freshness
+    bound, the calling thread refreshes it (only one refresh runs at a time, so
+    concurrent readers share a single Tixati request).
+
+    With a diff engine attached, every new version is diffed against the
+    previous one and subscribers receive ``(snapshot, events)``.
+
+    ``next_interval(snapshot)``, if given, picks the delay before each
+    background poll instead of the fixed interval; ``wake()`` cuts it short.
+    """
+
+    def __init__(self, fetch_rows: Callable[[], List], interval: float = 5.0, max_age: float = 3.0,
+                 diff_engine=None, next_interval: Optional[Callable[[TransferSnapshot], float]] = None):
+        self._fetch_rows = fetch_rows
+        self.interval = interval
+        self.max_age = max_age
+        self._diff_engine = diff_engine
+        self._next_interval = next_interval
+        self._wake = threading.Event()
+        self._subscribers = []
+        self._snapshot = TransferSnapshot(0, 0.0, (), None)
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, callback: Callable):
+        """Register callback(snapshot, events); called on the refreshing thread, keep it fast"""
+        self._subscribers.append(callback)
+
+    @property
+    def current(self) -> TransferSnapshot:
+        """Latest snapshot without any freshness check"""
+        return self._snapshot
+
+    def get(self, max_age: Optional[float] = None) -> TransferSnapshot:
+        """Return a snapshot no older than max_age seconds (default: service bound)"""
+        if max_age is None:
+            max_age = self.max_age
+        snapshot = self._snapshot
+        if snapshot.fetched_at and snapshot.age <= max_age:
+            return snapshot
+        return self.refresh(max_age)
+
+    def refresh(self, max_age: float = 0.0) -> TransferSnapshot:
+        """Fetch a new snapshot unless another thread just did so"""
+        with self._refresh_lock:
+            snapshot = self._snapshot
+            if snapshot.fetched_at and max_age > 0 and snapshot.age <= max_age:
+                return snapshot
+
+            try:
+                rows = tuple(self._fetch_rows())
+                error = None
+            except Exception as e:
+                rows = ()
+                error = str(e)
+
+            # Only bump the version when the content actually changed
+            version = snapshot.version
+            changed = rows != snapshot.rows or error != snapshot.error or not version
+            if changed:
+                version += 1
+            snapshot = TransferSnapshot(version, time.time(), rows, error)
+            self._snapshot = snapshot
+
+            # A failed fetch is not "everything was removed": skip diffing it
+            if changed and not error:
+                self._publish(snapshot)
+            return snapshot
+
+    def _publish(self, snapshot: TransferSnapshot):
+        events = self._diff_engine.diff(snapshot.rows) if self._diff_engine else []
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, events)
+            except Exception as e:
+                print(f"[Snapshot] Subscriber error: {e}")
+
+    def wake(self):
+        """Run the next background poll now instead of after the current delay"""
+        self._wake.set()
+
+    def start(self):
+        """Start the background poller (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="TransferSnapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = self.interval
+        max_age = interval / 2
+        while True:
+            try:
+                snapshot = self.refresh(max_age=max_age)
+                if snapshot.error:
+                    print(f"[Snapshot] Tixati fetch failed: {snapshot.error}")
+                interval = self._next_interval(snapshot) if self._next_interval else self.interval
+            except Exception as e:
+                print(f"[Snapshot] Error: {e}")
+                interval = self.interval
+            woken = self._wake.wait(interval)
+            self._wake.clear()
+            # A wake-up asks for current data; otherwise reuse a reader's recent fetch
+            max_age = 0.0 if woken else min(interval, self.interval) / 2
@@ -1,6 +1,6 @@
 import 'package:flutter/material.dart';
-import 'dart:async';
 import '../services/api_client.dart';
+import '../services/live_updates.dart';
 
 class SystemUsageScreen extends StatefulWidget {
   const SystemUsageScreen({Key? key}) : super(key: key);
@@ -12,7 +12,7 @@ class SystemUsageScreen extends StatefulWidget {
 class _SystemUsageScreenState extends State<SystemUsageScreen> {
   final List<double> _inHistory = [];
   final List<double> _outHistory = [];
-  Timer? _timer;
+  late LiveUpdates _live;
   bool _loading = true;
   String? _error;
   Map<String, dynamic> _systemStats = {};
@@ -20,47 +20,74 @@ class _SystemUsageScreenState extends State<SystemUsageScreen> {
   @override
   void initState() {
     super.initState();
+    // Full details (cores, totals, GPU) once; the stream's stat samples keep bandwidth, CPU and
+    // RAM current, with polling every second only while the stream is down
     _pollSystemUsage();
-    _timer = Timer.periodic(const Duration(seconds: 1), (_) => _pollSystemUsage());
+    _live = LiveUpdates(
+      onEvent: _onStreamEvent,
+      poll: _pollSystemUsage,
+      fallbackInterval: const Duration(seconds: 1),
+    )..start();
+  }
+
+  // Parse bandwidth values from strings like "0 B/s"
+  double _parseSpeed(String? speedStr) {
+    if (speedStr == null || speedStr.isEmpty) return 0.0;
+    final match = RegExp(r'([\d.]+)\s*(B|KB|MB|GB)/s').firstMatch(speedStr);
+    if (match == null) return 0.0;
+    double value = double.tryParse(match.group(1) ?? '0') ?? 0.0;
+    switch ((match.group(2) ?? '').toUpperCase()) {
+      case 'GB': value *= 1024 * 1024; break;
+      case 'MB': value *= 1024; break;
+      case 'KB': break;
+      case 'B': value /= 1024; break;
+    }
+    return value;
+  }
+
+  void _addBandwidth(Map<String, dynamic> bandwidth) {
+    if (_inHistory.length > 60) _inHistory.removeAt(0);
+    if (_outHistory.length > 60) _outHistory.removeAt(0);
+    _inHistory.add(_parseSpeed(bandwidth['inrate'] as String?));
+    _outHistory.add(_parseSpeed(bandwidth['outrate'] as String?));
+  }
+
+  void _onStreamEvent(StreamEvent event) {
+    if (event.event != 'stats' || !mounted) return;
+    final sample = event.data as Map<String, dynamic>;
+    setState(() {
+      _addBandwidth(sample['bandwidth'] as Map<String, dynamic>? ?? {});
+      final stats = Map<String, dynamic>.from(_systemStats);
+      for (final part in ['cpu', 'ram']) {
+        final percent = (sample[part] as Map<String, dynamic>?)?['percent'];
+        if (percent != null) {
+          stats[part] = {...(stats[part] as Map<String, dynamic>? ?? {}), 'percent': percent};
+        }
+      }
+      stats['bandwidth'] = sample['bandwidth'];
+      _systemStats = stats;
+    });
   }
 
   Future<void> _pollSystemUsage() async {
     try {
       final stats = await ApiClient.getSystemUsage();
-      final bandwidth = stats['bandwidth'] as Map<String, dynamic>? ?? {};
-      
-      // Parse bandwidth values from strings like "0 B/s"
-      double parseSpeed(String? speedStr) {
-        if (speedStr == null || speedStr.isEmpty) return 0.0;
-        final match = RegExp(r'([\d.]+)\s*(B|KB|MB|GB)/s').firstMatch(speedStr);
-        if (match == null) return 0.0;
-        double value = double.tryParse(match.group(1) ?? '0') ?? 0.0;
-        switch ((match.group(2) ?? '').toUpperCase()) {
-          case 'GB': value *= 1024 * 1024; break;
-          case 'MB': value *= 1024; break;
-          case 'KB': break;
-          case 'B': value /= 1024; break;
-        }
-        return value;
-      }
-      
+      if (!mounted) return;
       setState(() {
-        if (_inHistory.length > 60) _inHistory.removeAt(0);
-        if (_outHistory.length > 60) _outHistory.removeAt(0);
-        _inHistory.add(parseSpeed(bandwidth['inrate'] as String?));
-        _outHistory.add(parseSpeed(bandwidth['outrate'] as String?));
+        _addBandwidth(stats['bandwidth'] as Map<String, dynamic>? ?? {});
         _systemStats = stats;
         _loading = false;
         _error = null;
       });
     } catch (e) {
+      if (!mounted) return;
       setState(() { _error = e.toString(); _loading = false; });
     }
   }
 
   @override
   void dispose() {
-    _timer?.cancel();
+    _live.close();
     super.dispose();
   }
 
@@ -1,6 +1,6 @@
 import 'package:flutter/material.dart';
-import 'dart:async';
 import '../services/api_client.dart';
+import '../services/live_updates.dart';
 
 class DownloadsScreen extends StatefulWidget {
   const DownloadsScreen({Key? key}) : super(key: key);
@@ -16,29 +16,64 @@ class _DownloadsScreenState extends State<DownloadsScreen> with SingleTickerProv
   bool _isLoading = true;
   String? _error;
   String _sortBy = 'status';
-  late Timer _refreshTimer;
+  // Transfer rows by key, as pushed on /api/stream (a full state, then changed rows)
+  final Map<String, dynamic> _downloadsByKey = {};
+  final Map<String, dynamic> _completedByKey = {};
+  int _version = -1;
+  late LiveUpdates _live;
 
   @override
   void initState() {
     super.initState();
     _tabController = TabController(length: 2, vsync: this);
-    _loadData();
-    // Set up auto-refresh every 5 seconds
-    _refreshTimer = Timer.periodic(const Duration(seconds: 5), (_) {
-      if (mounted) {
-        _loadData();
-      }
-    });
+    // Rows arrive over the event stream; polling every 5 seconds only while it is down
+    _live = LiveUpdates(
+      onEvent: _onStreamEvent,
+      poll: _loadData,
+      fallbackInterval: const Duration(seconds: 5),
+    )..start();
   }
 
   @override
   void dispose() {
-    _refreshTimer.cancel();
+    _live.close();
     _tabController.dispose();
     super.dispose();
   }
 
-  void _loadData() async {
+  void _onStreamEvent(StreamEvent event) {
+    if (event.event != 'transfers' || !mounted) return;
+    final data = event.data as Map<String, dynamic>;
+    final version = data['version'] as int? ?? 0;
+    final full = data['full'] == true;
+    if (!full && version <= _version) return; // already part of the full state
+    _version = version;
+    if (full) {
+      _downloadsByKey.clear();
+      _completedByKey.clear();
+    }
+    for (final row in (data['upsert'] as List<dynamic>? ?? [])) {
+      final key = row['key'].toString();
+      _downloadsByKey.remove(key);
+      _completedByKey.remove(key);
+      if (row['download'] != null) _downloadsByKey[key] = row['download'];
+      if (row['completed'] != null) _completedByKey[key] = row['completed'];
+    }
+    for (final key in (data['remove'] as List<dynamic>? ?? [])) {
+      _downloadsByKey.remove(key.toString());
+      _completedByKey.remove(key.toString());
+    }
+    setState(() {
+      _downloads = _downloadsByKey.values.toList();
+      _completed = _sortCompleted(_completedByKey.values.toList());
+      _error = data['error'] != null && _downloadsByKey.isEmpty && _completedByKey.isEmpty
+          ? data['error'].toString()
+          : null;
+      _isLoading = false;
+    });
+  }
+
+  Future<void> _loadData() async {
     try {
       final downloads = await ApiClient.getDownloads();
       final completed = await ApiClient.getCompleted();
@@ -2,6 +2,13 @@ import 'dart:convert';
 import 'dart:io';
 import 'package:http/http.dart' as http;
 
+/// One Server-Sent Event from /api/stream (data is the decoded JSON payload)
+class StreamEvent {
+  final String event;
+  final dynamic data;
+  const StreamEvent(this.event, this.data);
+}
+
 /// Tixati Node Browser Backend API Client
 /// Points to the Flask backend which scrapes Tixati WebUI
 class ApiClient {
@@ -36,8 +43,57 @@ class ApiClient {
     throw Exception('Failed to load system usage');
   }
 
+  // -------- Server push (/api/stream) --------
+  /// The server sends a keep-alive every 15 s; this much silence means the connection is dead.
+  static const Duration streamIdleTimeout = Duration(seconds: 45);
+
+  /// Server-Sent Events from /api/stream: 'transfers' (the full state, then changed rows) and
+  /// 'stats' samples. The stream ends or errors when the connection drops; callers reconnect.
+  static Stream<StreamEvent> events() async* {
+    final client = http.Client();
+    try {
+      final request = http.Request('GET', Uri.parse('$_baseUrl/api/stream'))
+        ..headers['Accept'] = 'text/event-stream';
+      final res = await client.send(request).timeout(timeout);
+      if (res.statusCode != 200) throw Exception('Failed to open event stream (${res.statusCode})');
+      var event = 'message';
+      final data = <String>[];
+      final lines = res.stream.transform(utf8.decoder).transform(const LineSplitter()).timeout(streamIdleTimeout);
+      await for (final line in lines) {
+        if (line.isEmpty) {
+          // A blank line ends the message; keep-alives (": ...") and "retry:" carry no data
+          if (data.isNotEmpty) yield StreamEvent(event, jsonDecode(data.join('\n')));
+          event = 'message';
+          data.clear();
+        } else if (line.startsWith('event:')) {
+          event = line.substring(6).trim();
+        } else if (line.startsWith('data:')) {
+          data.add(line.substring(5).trimLeft());
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
+  // -------- Conditional GET (ETag) cache --------
+  static final Map<String, http.Response> _etagCache = {};
+
+  /// GET that sends If-None-Match and replays the cached response on 304.
+  static Future<http.Response> _getCached(Uri uri) async {
+    final key = uri.toString();
+    final cached = _etagCache[key];
+    final etag = cached?.headers['etag'];
+    final res = await http.get(uri, headers: etag != null ? {'If-None-Match': etag} : null).timeout(timeout);
+    if (res.statusCode == 304 && cached != null) return cached;
+    if (res.statusCode == 200 && res.headers.containsKey('etag')) {
+      _etagCache[key] = res;
+    }
+    return res;
+  }
+
   static Future<List<Map<String, dynamic>>> getDownloads() async {
-    final res = await http.get(Uri.parse('$_baseUrl/api/downloads')).timeout(timeout);
+    final res = await _getCached(Uri.parse('$_baseUrl/api/downloads'));
     if (res.statusCode == 200) {
       final data = jsonDecode(res.body) as Map<String, dynamic>;
       final downloads = data['downloads'] as List<dynamic>? ?? [];
@@ -47,7 +103,7 @@ class ApiClient {
   }
 
   static Future<List<Map<String, dynamic>>> getCompleted() async {
-    final res = await http.get(Uri.parse('$_baseUrl/api/completed')).timeout(timeout);
+    final res = await _getCached(Uri.parse('$_baseUrl/api/completed'));
     if (res.statusCode == 200) {
       final data = jsonDecode(res.body) as Map<String, dynamic>;
       final completed = data['completed'] as List<dynamic>? ?? [];
@@ -78,7 +134,7 @@ class ApiClient {
 
   // -------- Persistent batch (shared web + mobile) --------
   static Future<List<Map<String, dynamic>>> getBatchItems() async {
-    final res = await http.get(Uri.parse('$_baseUrl/api/batch')).timeout(timeout);
+    final res = await _getCached(Uri.parse('$_baseUrl/api/batch'));
     if (res.statusCode == 200) {
       final data = jsonDecode(res.body) as Map<String, dynamic>;
       final batch = data['batch'] as List<dynamic>? ?? [];
@@ -381,7 +437,7 @@ class ApiClient {
     final uri = Uri.parse('$_baseUrl/api/library-index${refresh ? '/refresh' : ''}');
     final res = refresh
         ? await http.post(uri).timeout(timeout)
-        : await http.get(uri).timeout(timeout);
+        : await _getCached(uri);
     if (res.statusCode == 200) {
       final data = jsonDecode(res.body) as Map<String, dynamic>;
       final show = data['show'] as List<dynamic>? ?? [];
@@ -0,0 +1,52 @@
+import 'dart:async';
+import 'api_client.dart';
+
+/// Keeps a screen on the /api/stream push channel.
+///
+/// Events go to [onEvent] as they arrive. While the stream is down, [poll]
+/// runs at once and then every [fallbackInterval], and each tick tries to
+/// reconnect; the timer stops as soon as the stream delivers again.
+class LiveUpdates {
+  LiveUpdates({required this.onEvent, required this.poll, required this.fallbackInterval});
+
+  final void Function(StreamEvent event) onEvent;
+  final Future<void> Function() poll;
+  final Duration fallbackInterval;
+
+  StreamSubscription<StreamEvent>? _subscription;
+  Timer? _fallback;
+  bool _closed = false;
+
+  void start() => _connect();
+
+  void close() {
+    _closed = true;
+    _subscription?.cancel();
+    _subscription = null;
+    _fallback?.cancel();
+    _fallback = null;
+  }
+
+  void _connect() {
+    _subscription = ApiClient.events().listen(
+      (event) {
+        _fallback?.cancel();
+        _fallback = null;
+        onEvent(event);
+      },
+      onError: (_) => _disconnected(),
+      onDone: _disconnected,
+      cancelOnError: true,
+    );
+  }
+
+  void _disconnected() {
+    _subscription = null;
+    if (_closed || _fallback != null) return;
+    poll();
+    _fallback = Timer.periodic(fallbackInterval, (_) {
+      poll();
+      if (_subscription == null && !_closed) _connect();
+    });
+  }
+}